@@ -0,0 +1,494 @@
+import os
+
+# Plots are drawn off-screen so the benchmarks never open a window
+# Biểu đồ được vẽ ngầm để các phép đo không mở cửa sổ nào
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from contextlib import contextmanager, redirect_stdout
+import argparse
+import html
+import importlib.util
+import io
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.dirname(BENCHMARK_DIR)
+TASK_DIRS = {task: os.path.join(RESULTS_DIR, f'TASK {task}') for task in (1, 2, 3, 4)}
+sys.path.extend([TASK_DIRS[1], TASK_DIRS[3], TASK_DIRS[4]])
+
+from assignment_01_task_01 import (  # noqa: E402
+    EXPORT_COLUMNS, EXPORT_KEYS, STAT_KEY_ALIASES, TABLE_COLUMNS, TABLE_LINKS, build_player_set, extract_table_html
+)
+from page_cache import DEFAULT_CACHE_DIR, PageCache  # noqa: E402
+import footballtransfers_scraper  # noqa: E402
+
+# -----------------------------------------
+# Committed page fixtures, reference data and the stored baseline. The baseline is machine specific and
+# is written by --save-baseline; the fixtures are committed so every machine measures the same input
+# Các trang mẫu đã commit, dữ liệu tham chiếu và kết quả gốc đã lưu. Kết quả gốc phụ thuộc từng máy và
+# được ghi bởi --save-baseline; trang mẫu được commit để mọi máy đo trên cùng một đầu vào
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, 'fixtures')
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+RESULTS_CSV = os.path.join(TASK_DIRS[1], 'OUTPUT', 'results.csv')
+PLAYER_DATA_CSV = os.path.join(TASK_DIRS[4], 'OUTPUT', 'player_data_22731425.csv')
+COMBINED_CSV_CANDIDATES = [
+    os.path.join(TASK_DIRS[4], 'OUTPUT', 'combined_player_data.csv'),
+    os.path.join(TASK_DIRS[3], 'OUTPUT', 'combined_player_data.csv')
+]
+MODEL_FILE = os.path.join(TASK_DIRS[4], 'OUTPUT', 'best_player_value_model.pkl')
+
+# Relative slowdown or memory growth over the baseline that counts as a regression
+# Mức chậm hơn hoặc tốn bộ nhớ hơn so với kết quả gốc được coi là suy giảm
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_REPEAT = 3
+
+# =========================================
+# FIXTURES / DỮ LIỆU MẪU
+# =========================================
+# Cells that fbref repeats in front of the columns of every table; task 1 joins the tables on player + team
+# Các ô fbref lặp lại trước các cột của mọi bảng; task 1 ghép các bảng theo cầu thủ + đội
+PLAYER_STATS = ['player', 'nationality', 'position', 'team', 'age', 'birth_year', 'minutes_90s']
+
+# fbref repeats the header row inside the table body every this many players
+# fbref lặp lại hàng tiêu đề bên trong thân bảng sau mỗi từng này cầu thủ
+HEADER_EVERY_ROWS = 25
+# Season of results.csv, used to fill fbref's birth year column from the age
+# Mùa giải của results.csv, dùng để điền cột năm sinh của fbref từ tuổi
+FIXTURE_SEASON_YEAR = 2024
+
+def fixture_path(name):
+    return os.path.join(FIXTURES_DIR, f'{name}.html')
+
+def fbref_cell(stat, record, columns):
+    # Text of one data cell, derived from a results.csv row read as strings
+    # Nội dung một ô dữ liệu, suy ra từ một hàng results.csv đọc dưới dạng chuỗi
+    if stat == 'matches':
+        return '<a href="/en/players/matchlogs/">Matches</a>'
+    if stat == 'minutes_90s':
+        minutes = record.get('Minutes', '').replace(',', '')
+        return f'{int(minutes) / 90:.1f}' if minutes.isdigit() else ''
+    if stat == 'birth_year':
+        age = record.get('Age', '').split('-')[0]
+        return str(FIXTURE_SEASON_YEAR - int(age)) if age.isdigit() else ''
+    key = STAT_KEY_ALIASES.get(stat, stat)
+    value = record.get(columns.get(key), 'N/a')
+    value = '' if value in ('', 'N/a') else value
+    if key == 'nationality' and value:
+        return f'<a href="/en/country/{value}/"><span class="f-i f-{value[:2].lower()}">{value[:2].lower()}</span> {value}</a>'
+    if key == 'name' and value:
+        return f'<a href="/en/players/{html.escape(value.replace(" ", "-"))}-Stats">{html.escape(value)}</a>'
+    return html.escape(value)
+
+def synthesize_fbref_page(table_name, records):
+    """Rebuild the stats page of one fbref table from the rows of results.csv (read as strings).
+    Like the real page, the table sits inside an HTML comment, has a two-row <thead> with an over-header,
+    repeats its header row in the body every HEADER_EVERY_ROWS players, and carries the player cells,
+    birth year, 90s played and the "Matches" link column besides its own TABLE_COLUMNS.
+    Tạo lại trang thống kê của một bảng fbref từ các hàng của results.csv (đọc dưới dạng chuỗi).
+    Giống trang thật, bảng nằm trong chú thích HTML, có <thead> hai hàng với hàng tiêu đề nhóm,
+    lặp lại hàng tiêu đề trong thân bảng sau mỗi HEADER_EVERY_ROWS cầu thủ, và có các ô thông tin cầu thủ,
+    năm sinh, số trận quy đổi 90 phút và cột liên kết "Matches" bên cạnh các cột TABLE_COLUMNS của nó."""
+    table_id = TABLE_LINKS[table_name][1]
+    columns = {key: column for key, column in zip(EXPORT_KEYS, EXPORT_COLUMNS)}
+    stats = list(dict.fromkeys(PLAYER_STATS + TABLE_COLUMNS[table_name] + ['matches']))
+    labels = [html.escape(columns.get(STAT_KEY_ALIASES.get(stat, stat), stat)) for stat in stats]
+    header_cells = ''.join(f'<th aria-label="{label}" data-stat="{stat}" scope="col" class=" poptip center">{label}</th>'
+                           for stat, label in zip(stats, labels))
+    header_row = f'<th aria-label="Rk" data-stat="ranker" scope="col" class=" poptip sort_default_asc center">Rk</th>{header_cells}'
+
+    rows = []
+    for index, record in enumerate(records):
+        if index and index % HEADER_EVERY_ROWS == 0:
+            rows.append(f'<tr class="thead" data-row="{len(rows)}">{header_row}</tr>')
+        cells = [f'<th scope="row" class="right " data-stat="ranker">{index + 1}</th>']
+        cells.extend(f'<td class="left " data-stat="{stat}">{fbref_cell(stat, record, columns)}</td>'
+                     for stat in stats)
+        rows.append(f'<tr data-row="{len(rows)}">{"".join(cells)}</tr>')
+
+    return (
+        f'<!DOCTYPE html><html data-version="klecko-" lang="en"><head><meta charset="utf-8">'
+        f'<title>{table_name} | fbref.com</title></head><body class="comps">'
+        f'<div id="wrap"><div id="content" role="main">'
+        f'<div id="all_{table_id}" class="table_wrapper tabbed">'
+        f'<div class="section_heading"><h2>Player {table_name}</h2></div><div class="placeholder"></div>\n'
+        f'<!--\n<div class="table_container tabbed current" id="div_{table_id}">\n'
+        f'<table class="min_width sortable stats_table min_width shade_zero" id="{table_id}" data-cols-to-freeze=",2">'
+        f'<caption>Player {table_name} Table</caption>'
+        f'<thead><tr class="over_header"><th aria-label="" data-stat="" colspan="{len(PLAYER_STATS) + 1}" '
+        f'class=" over_header center"></th><th aria-label="" data-stat="header_{table_id}" '
+        f'colspan="{len(stats) - len(PLAYER_STATS)}" class=" over_header center">{table_name}</th></tr>'
+        f'<tr>{header_row}</tr></thead>\n'
+        f'<tbody>{"".join(rows)}</tbody></table>\n</div>\n-->\n</div></div></div></body></html>'
+    )
+
+def synthesize_footballtransfers_page(records):
+    """Rebuild the first footballtransfers.com listing page (25 players and the pager) from the rows
+    of a saved player_data CSV (read as strings).
+    Tạo lại trang danh sách đầu tiên của footballtransfers.com (25 cầu thủ và thanh phân trang) từ các hàng
+    của file player_data CSV đã lưu (đọc dưới dạng chuỗi)."""
+    league = footballtransfers_scraper.DEFAULT_LEAGUE
+    rows = []
+    for record in records[:25]:
+        skill, potential = (record['rating'].split('/') + [''])[:2]
+        rows.append(
+            '<tr><td><div class="table-skill__skill">{}</div><div class="table-skill__pot">{}</div></td>'
+            '<td><span class="d-none">{}</span></td><td><span class="td-team__teamname">{}</span></td>'
+            '<td><span class="player-tag">{}</span></td></tr>'.format(
+                *(html.escape(value) for value in
+                  (skill, potential, record['player'], record['club'], record['market_value']))
+            )
+        )
+    last_page = max(1, -(-len(records) // 25))
+    pager = ''.join(f'<li><a href="/en/players/{league}/{page_num}">{page_num}</a></li>'
+                    for page_num in range(2, last_page + 1))
+    return ('<html><body><table class="table table-striped leaguetable mvp-table similar-players-table">'
+            f'<thead><tr><th>Skill</th><th>Player</th><th>Team</th><th>Value</th></tr></thead>'
+            f'<tbody>{"".join(rows)}</tbody></table>'
+            f'<ul class="pagination">{pager}</ul></body></html>')
+
+def read_records(path):
+    # Every cell as the string written in the CSV, so the fixtures do not depend on pandas' type inference
+    # Mọi ô giữ nguyên chuỗi trong file CSV, để trang mẫu không phụ thuộc cách pandas suy luận kiểu
+    return pd.read_csv(path, dtype=str, keep_default_na=False).to_dict('records')
+
+def fixture_pages():
+    """{fixture name: page url} of every fixture.
+    {tên trang mẫu: địa chỉ trang} của mọi trang mẫu."""
+    pages = {f'fbref_{table_id}': url for url, table_id in TABLE_LINKS.values()}
+    pages['footballtransfers_page_1'] = footballtransfers_scraper.build_page_url(
+        footballtransfers_scraper.DEFAULT_LEAGUE, 1
+    )
+    return pages
+
+def ensure_fixtures():
+    """Synthesize any missing fixture from the committed outputs; existing fixtures are never overwritten.
+    Tạo các trang mẫu còn thiếu từ các kết quả đã commit; trang mẫu đã có không bao giờ bị ghi đè."""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    stats_records = None
+    for name in fixture_pages():
+        path = fixture_path(name)
+        if os.path.exists(path):
+            continue
+        if name.startswith('fbref_'):
+            if stats_records is None:
+                stats_records = read_records(RESULTS_CSV)
+            table_name = next(table for table, (_, table_id) in TABLE_LINKS.items() if name == f'fbref_{table_id}')
+            page, source = synthesize_fbref_page(table_name, stats_records), 'results.csv'
+        else:
+            page, source = synthesize_footballtransfers_page(read_records(PLAYER_DATA_CSV)), 'player_data csv'
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(page)
+        print(f"Fixture {name} created from the {source}")
+
+def record_fixtures(html_cache_dir=DEFAULT_CACHE_DIR):
+    """Replace the fixtures with the real pages saved in the scrapers' HTML cache (--record-fixtures).
+    Recorded fixtures change what is measured, so save a new baseline and commit both together.
+    Thay trang mẫu bằng các trang thật đã lưu trong bộ nhớ đệm HTML của chương trình thu thập (--record-fixtures).
+    Trang mẫu mới thay đổi thứ được đo, nên hãy lưu kết quả gốc mới và commit cả hai cùng lúc."""
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    cache = PageCache(html_cache_dir, offline=True)
+    for name, url in fixture_pages().items():
+        entry = cache.lookup(url)
+        if entry is None:
+            print(f"Fixture {name} kept: {url} is not in {html_cache_dir}")
+            continue
+        with open(fixture_path(name), 'w', encoding='utf-8') as f:
+            f.write(cache.read(entry))
+        print(f"Fixture {name} recorded from the html cache")
+
+def read_fixture(name):
+    with open(fixture_path(name), encoding='utf-8') as f:
+        return f.read()
+
+# -----------------------------------------
+def replicate_table_rows(page, table_html, scale):
+    """Repeat the body rows of a table `scale` times, leaving the rest of the page unchanged.
+    Lặp lại các hàng trong thân bảng `scale` lần, giữ nguyên phần còn lại của trang."""
+    if scale == 1 or table_html is None:
+        return page
+    body_start = table_html.find('<tbody>')
+    body_end = table_html.rfind('</tbody>')
+    if body_start == -1 or body_end == -1:
+        return page
+    body = table_html[body_start + len('<tbody>'):body_end]
+    scaled_table = table_html[:body_start + len('<tbody>')] + body * scale + table_html[body_end:]
+    return page.replace(table_html, scaled_table, 1)
+
+def replicate_rows(df, scale, name_column=None):
+    """Stack `scale` copies of a table; copies get a '#k' name suffix so players stay distinct.
+    Xếp chồng `scale` bản sao của một bảng; các bản sao có hậu tố '#k' để cầu thủ không trùng nhau."""
+    if scale == 1:
+        return df
+    copies = []
+    for k in range(scale):
+        copy = df.copy()
+        if name_column and k:
+            copy[name_column] = copy[name_column].astype(str) + f'#{k}'
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# =========================================
+# CASES / CÁC TRƯỜNG HỢP ĐO
+# Each case prepares its input outside the timed region and returns the function to time
+# Mỗi trường hợp chuẩn bị dữ liệu ngoài vùng đo và trả về hàm cần đo
+# =========================================
+def case_task1_parse(scale, workdir):
+    page_sources = {}
+    for table_name, (_, table_id) in TABLE_LINKS.items():
+        page = read_fixture(f'fbref_{table_id}')
+        page_sources[table_name] = replicate_table_rows(page, extract_table_html(page, table_id), scale)
+
+    # Rows of the other tables that fail to join are only logged by task 1, so check that each table
+    # filled its columns for at least one player
+    # Task 1 chỉ ghi log các hàng của bảng khác không ghép được, nên kiểm tra mỗi bảng
+    # đã điền cột của nó cho ít nhất một cầu thủ
+    player_set = build_player_set(page_sources)
+    for table_name, stats in TABLE_COLUMNS.items():
+        key = STAT_KEY_ALIASES.get(stats[0], stats[0])
+        if not any(player[key] != 'N/a' for player in player_set.values()):
+            raise RuntimeError(f"fbref fixtures filled no '{key}' value of the '{table_name}' table")
+    return lambda: build_player_set(page_sources)
+
+def case_task4_extract_page_data(scale, workdir):
+    page = read_fixture('footballtransfers_page_1')
+    table_start = page.find('<table')
+    table_html = page[table_start:page.find('</table>', table_start) + len('</table>')]
+    page_url = footballtransfers_scraper.build_page_url(footballtransfers_scraper.DEFAULT_LEAGUE, 1)
+    cache = PageCache(os.path.join(workdir, 'html_cache'), offline=True)
+    cache.store(page_url, replicate_table_rows(page, table_html, scale))
+
+    # The fixture carries the real multi-valued class attribute of the player table, so every one of its
+    # rows must come back; an empty parse means the table filter no longer matches the site's markup
+    # Trang mẫu mang đúng thuộc tính class nhiều giá trị của bảng cầu thủ nên mọi hàng phải được trả về;
+    # kết quả rỗng nghĩa là bộ lọc bảng không còn khớp với mã HTML của trang
+    body = table_html[table_html.find('<tbody'):table_html.rfind('</tbody>')]
+    expected_rows = body.count('<tr') * scale
+    parsed_rows = len(footballtransfers_scraper.extract_page_data(None, page_url, cache) or [])
+    if parsed_rows != expected_rows:
+        raise RuntimeError(f"footballtransfers fixture parsed {parsed_rows} rows, expected {expected_rows}")
+    return lambda: footballtransfers_scraper.extract_page_data(None, page_url, cache)
+
+def _task2_inputs(scale, workdir):
+    module = load_module('assignment_01_task_02', os.path.join(TASK_DIRS[2], 'assignment_01_task_02.py'))
+    df = replicate_rows(pd.read_csv(RESULTS_CSV), scale, 'Name')
+    numeric_cols = df.select_dtypes(include='number').columns
+    df_numeric = df[['Team'] + list(numeric_cols)]
+    module.df = df
+    os.makedirs(os.path.join(workdir, 'team_stats_results'), exist_ok=True)
+    return module, df, df_numeric
+
+def case_task2_results2(scale, workdir):
+    # Includes building the team statistics that results2.csv is made from
+    # Bao gồm cả việc tính các thống kê theo đội mà results2.csv được tạo từ đó
+    module, _, df_numeric = _task2_inputs(scale, workdir)
+    metrics = list(df_numeric.columns.drop('Team'))
+    return lambda: module.generate_results2(module.compute_team_cube(df_numeric, metrics))
+
+def case_task2_results2_stream(scale, workdir):
+    # Same report from chunked reads of results.csv with mergeable accumulators (bounded memory)
+    # Cùng báo cáo nhưng đọc results.csv theo từng khối với các bộ tích lũy gộp được (bộ nhớ giới hạn)
+    module, df, df_numeric = _task2_inputs(scale, workdir)
+    input_csv = os.path.join(workdir, 'results.csv')
+    df.to_csv(input_csv, index=False)
+    metrics = list(df_numeric.columns.drop('Team'))
+    return lambda: module.generate_results2(module.compute_team_cube_streaming([input_csv], metrics, chunksize=1000))
+
+def case_task2_top3(scale, workdir):
+    module, df, df_numeric = _task2_inputs(scale, workdir)
+    cube = module.compute_team_cube(df_numeric, list(df_numeric.columns.drop('Team')))
+    _, available_metrics = module.generate_results2(cube)
+    return lambda: module.generate_top_3_ranking(df, available_metrics)
+
+def case_task2_leaderboards(scale, workdir):
+    # Per-team and per-position top-3 tables written by the task 2 main block
+    # Bảng top-3 theo đội và theo vị trí được khối chính của task 2 ghi ra
+    module, df, df_numeric = _task2_inputs(scale, workdir)
+    cube = module.compute_team_cube(df_numeric, list(df_numeric.columns.drop('Team')))
+    _, available_metrics = module.generate_results2(cube)
+    return lambda: pd.concat([module.compute_leaderboard(df, available_metrics, k=3, by=by)
+                              for by in ('Team', 'Position')], ignore_index=True)
+
+def case_task3_pipeline(scale, workdir):
+    # Every task 3 stage (preprocessing, UMAP, KMeans sweep, plots, saved models) through run_pipeline()
+    # Mọi bước của task 3 (tiền xử lý, UMAP, quét KMeans, biểu đồ, lưu mô hình) qua run_pipeline()
+    replicate_rows(pd.read_csv(RESULTS_CSV), scale, 'Name').to_csv(os.path.join(workdir, 'results.csv'), index=False)
+    module = load_module('assignment_01_task_03', os.path.join(TASK_DIRS[3], 'assignment_01_task_03.py'))
+    return lambda: module.run_pipeline(os.path.join(workdir, 'results.csv'))
+
+def case_task4_predict(scale, workdir):
+    # Cell 3 of the task 4 notebook: rating cleanup, preprocessing and prediction with the saved model
+    # Ô 3 của notebook task 4: làm sạch rating, tiền xử lý và dự đoán bằng mô hình đã lưu
+    combined_csv = next(path for path in COMBINED_CSV_CANDIDATES if os.path.exists(path))
+    replicate_rows(pd.read_csv(combined_csv, index_col=0), scale, 'Name').to_csv(
+        os.path.join(workdir, 'combined_player_data.csv'), index=True
+    )
+    shutil.copy(MODEL_FILE, workdir)
+    with open(os.path.join(TASK_DIRS[4], 'assignment_01_task_04.ipynb'), encoding='utf-8') as f:
+        source = ''.join(json.load(f)['cells'][3]['source'])
+    code = compile(source, 'assignment_01_task_04.ipynb[cell 3]', 'exec')
+
+    def predict():
+        namespace = {'__name__': '__benchmark__'}
+        exec(code, namespace)
+        return namespace['df'].get('Predicted_Value')
+    return predict
+
+CASES = {
+    'task1_parse': case_task1_parse,
+    'task4_extract_page_data': case_task4_extract_page_data,
+    'task2_results2': case_task2_results2,
+    'task2_results2_stream': case_task2_results2_stream,
+    'task2_top3': case_task2_top3,
+    'task2_leaderboards': case_task2_leaderboards,
+    'task3_pipeline': case_task3_pipeline,
+    'task4_predict': case_task4_predict
+}
+
+# =========================================
+# MEASUREMENT / ĐO LƯỜNG
+# =========================================
+@contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+def is_empty(output):
+    """True when a case produced nothing: None, an empty table or collection, or a tuple whose first item is empty.
+    Đúng khi một trường hợp không tạo ra gì: None, bảng hoặc tập hợp rỗng, hoặc tuple có phần tử đầu rỗng."""
+    if output is None:
+        return True
+    if isinstance(output, (pd.DataFrame, pd.Series)):
+        return output.empty
+    if isinstance(output, tuple):
+        return not output or is_empty(output[0])
+    return hasattr(output, '__len__') and len(output) == 0
+
+def measure(case_name, scale, repeat):
+    """Time a case `repeat` times, then measure its peak Python memory in one extra traced run.
+    Tracing slows code down, so it is kept out of the timed runs. A case whose output is empty raises,
+    so a broken stage is reported as failed instead of timing no work.
+    Đo thời gian một trường hợp `repeat` lần, sau đó đo bộ nhớ Python cao nhất trong một lần chạy riêng.
+    Việc theo dõi bộ nhớ làm chậm chương trình nên được tách khỏi các lần đo thời gian. Trường hợp có kết quả rỗng
+    sẽ báo lỗi, để một bước bị hỏng được báo là thất bại thay vì đo một lần chạy không làm gì."""
+    workdir = tempfile.mkdtemp(prefix=f'bench_{case_name}_')
+    try:
+        with working_directory(workdir), redirect_stdout(io.StringIO()):
+            run = CASES[case_name](scale, workdir)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                output = run()
+                timings.append(time.perf_counter() - start)
+                if is_empty(output):
+                    raise RuntimeError(f"{case_name} produced no output")
+
+            tracemalloc.start()
+            try:
+                run()
+                peak_bytes = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'best_seconds': round(min(timings), 6),
+        'median_seconds': round(statistics.median(timings), 6),
+        'peak_mb': round(peak_bytes / 2 ** 20, 3)
+    }
+
+def compare(result, baseline, tolerance):
+    """List the regressions of one result against its baseline entry.
+    Liệt kê các suy giảm của một kết quả so với kết quả gốc tương ứng."""
+    regressions = []
+    for metric in ('best_seconds', 'peak_mb'):
+        if baseline.get(metric) and result[metric] > baseline[metric] * (1 + tolerance):
+            regressions.append(f"{metric} {baseline[metric]} -> {result[metric]} "
+                               f"(+{result[metric] / baseline[metric] - 1:.0%})")
+    return regressions
+
+# -----------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description='Offline benchmarks of the scraping and analysis stages')
+    parser.add_argument('cases', nargs='*', metavar='case',
+                        help=f"cases to run, any of {', '.join(CASES)} (default: all)")
+    parser.add_argument('--scale', type=int, nargs='+', default=[1],
+                        help='replicate the input rows this many times; several values are run in turn')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='timed runs per case (default: %(default)s)')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='baseline file (default: %(default)s)')
+    parser.add_argument('--save-baseline', action='store_true', help='store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='allowed slowdown or memory growth before a regression is reported (default: %(default)s)')
+    parser.add_argument('--record-fixtures', action='store_true',
+                        help='replace the committed fixtures with the real pages of the HTML cache')
+    parser.add_argument('--html-cache', default=DEFAULT_CACHE_DIR,
+                        help='HTML cache read by --record-fixtures (default: %(default)s)')
+    parser.add_argument('--output', help='also write the results to this JSON file')
+    args = parser.parse_args()
+    unknown = [case for case in args.cases if case not in CASES]
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(unknown)}")
+    return args
+
+def main():
+    args = parse_args()
+    if args.record_fixtures:
+        record_fixtures(args.html_cache)
+    ensure_fixtures()
+    case_names = args.cases or list(CASES)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    results, regressions = {}, []
+    print(f"{'case':<28}{'scale':>6}{'best s':>11}{'median s':>11}{'peak MB':>10}  vs baseline")
+    for scale in args.scale:
+        for case_name in case_names:
+            key = f'{case_name}@x{scale}'
+            try:
+                result = measure(case_name, scale, args.repeat)
+            except (Exception, SystemExit) as e:
+                print(f"{case_name:<28}{scale:>6}  failed: {e!r}")
+                continue
+            results[key] = result
+            found = compare(result, baseline[key], args.tolerance) if key in baseline else None
+            status = 'no baseline' if found is None else ('REGRESSION ' + '; '.join(found) if found else 'ok')
+            if found:
+                regressions.append(key)
+            print(f"{case_name:<28}{scale:>6}{result['best_seconds']:>11.4f}{result['median_seconds']:>11.4f}"
+                  f"{result['peak_mb']:>10.2f}  {status}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,28 @@
 from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import pandas as pd
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+import argparse
+import json
 import os
+import queue
+import threading
 import time
 import uuid
+from urllib.parse import urlparse
+
+from page_cache import DEFAULT_CACHE_DIR, DEFAULT_TTL_SECONDS, PageCache
+from rate_limiter import RetryPolicy
+from staging import DEFAULT_STAGING_DIR, StagingArea
+from instrumentation import DEFAULT_METRICS_DIR, METRICS
 
 # -----------------------------------------
 # Dictionary containing table links with their names and IDs
@@ -24,6 +38,138 @@ TABLE_LINKS = {
     'Goalkeeping': ('https://fbref.com/en/comps/9/keepers/Premier-League-Stats', 'stats_keeper')
 }
 
+# -----------------------------------------
+# fbref competition ids and the name used in their URLs (top five European leagues)
+# Mã giải đấu trên fbref và tên dùng trong đường dẫn (năm giải hàng đầu châu Âu)
+COMPETITIONS = {
+    9: 'Premier-League',
+    12: 'La-Liga',
+    11: 'Serie-A',
+    20: 'Bundesliga',
+    13: 'Ligue-1'
+}
+
+# -----------------------------------------
+# Columns (data-stat attributes) read from each table; the standard table creates the players
+# and every other table adds its columns to players already found
+# Các cột (thuộc tính data-stat) đọc từ mỗi bảng; bảng tiêu chuẩn tạo cầu thủ
+# và các bảng khác bổ sung cột cho cầu thủ đã có
+TABLE_COLUMNS = {
+    'Standard Stats': [
+        'player', 'nationality', 'position', 'team', 'age', 'games', 'games_starts', 'minutes',
+        'goals', 'assists', 'cards_yellow', 'cards_red', 'xg', 'xg_assist', 'progressive_carries',
+        'progressive_passes', 'progressive_passes_received', 'goals_per90', 'assists_per90',
+        'xg_per90', 'xg_assist_per90'
+    ],
+    'Shooting': [
+        'shots_on_target_pct', 'shots_on_target_per90', 'goals_per_shot', 'average_shot_distance'
+    ],
+    'Passing': [
+        'passes_completed', 'passes_pct', 'passes_total_distance', 'passes_pct_short',
+        'passes_pct_medium', 'passes_pct_long', 'assisted_shots', 'passes_into_final_third',
+        'passes_into_penalty_area', 'crosses_into_penalty_area', 'progressive_passes'
+    ],
+    'Goal and Shot Creation': ['sca', 'sca_per90', 'gca', 'gca_per90'],
+    'Defense': [
+        'tackles', 'tackles_won', 'challenges', 'challenges_lost', 'blocks', 'blocked_shots',
+        'blocked_passes', 'interceptions'
+    ],
+    'Possession': [
+        'touches', 'touches_def_pen_area', 'touches_def_3rd', 'touches_mid_3rd', 'touches_att_3rd',
+        'touches_att_pen_area', 'take_ons', 'take_ons_won_pct', 'take_ons_tackled_pct', 'carries',
+        'carries_progressive_distance', 'carries_into_final_third', 'carries_into_penalty_area',
+        'miscontrols', 'dispossessed', 'passes_received'
+    ],
+    'Miscellaneous': [
+        'fouls', 'fouled', 'offsides', 'crosses', 'ball_recoveries', 'aerials_won', 'aerials_lost',
+        'aerials_won_pct'
+    ],
+    'Goalkeeping': [
+        'gk_goals_against_per90', 'gk_save_pct', 'gk_clean_sheets_pct', 'gk_pens_save_pct'
+    ]
+}
+
+# -----------------------------------------
+# data-stat attributes stored under a different player data key
+# Các thuộc tính data-stat được lưu dưới khóa dữ liệu cầu thủ khác tên
+STAT_KEY_ALIASES = {
+    'player': 'name',
+    'assists': 'assist'
+}
+
+# -----------------------------------------
+# Player data keys in export order
+# Các khóa dữ liệu cầu thủ theo thứ tự xuất
+EXPORT_KEYS = [
+    'name', 'nationality', 'team', 'position', 'age', 'games', 'games_starts', 'minutes', 'goals', 'assist',
+    'cards_yellow', 'cards_red', 'xg', 'xg_assist', 'progressive_carries', 'progressive_passes',
+    'progressive_passes_received', 'goals_per90', 'assists_per90', 'xg_per90', 'xg_assist_per90',
+    'gk_goals_against_per90', 'gk_save_pct', 'gk_clean_sheets_pct', 'gk_pens_save_pct', 'shots_on_target_pct',
+    'shots_on_target_per90', 'goals_per_shot', 'average_shot_distance', 'passes_completed', 'passes_pct',
+    'passes_total_distance', 'passes_pct_short', 'passes_pct_medium', 'passes_pct_long', 'assisted_shots',
+    'passes_into_final_third', 'passes_into_penalty_area', 'crosses_into_penalty_area', 'sca', 'sca_per90',
+    'gca', 'gca_per90', 'tackles', 'tackles_won', 'challenges', 'challenges_lost', 'blocks', 'blocked_shots',
+    'blocked_passes', 'interceptions', 'touches', 'touches_def_pen_area', 'touches_def_3rd', 'touches_mid_3rd',
+    'touches_att_3rd', 'touches_att_pen_area', 'take_ons', 'take_ons_won_pct', 'take_ons_tackled_pct', 'carries',
+    'carries_progressive_distance', 'carries_into_final_third', 'carries_into_penalty_area', 'miscontrols',
+    'dispossessed', 'passes_received', 'fouls', 'fouled', 'offsides', 'crosses', 'ball_recoveries', 'aerials_won',
+    'aerials_lost', 'aerials_won_pct'
+]
+
+# -----------------------------------------
+# Column names of the exported CSV, in the same order as EXPORT_KEYS
+# Tên các cột của file CSV xuất ra, cùng thứ tự với EXPORT_KEYS
+EXPORT_COLUMNS = [
+    'Name', 'Nation', 'Team', 'Position', 'Age', 'Matches Played', 'Starts', 'Minutes', 'Goals', 'Assists',
+    'Yellow Cards', 'Red Cards', 'Expected Goals (xG)', 'Expected Assist Goals (xAG)', 'Progressive Carries (PrgC)',
+    'Progressive Passes (PrgP)', 'Progressive Passes Received (PrgR)', 'Goals per 90', 'Assists per 90',
+    'xG per 90', 'xAG per 90', 'Goals Against per 90 (GA90)', 'Save Percentage (Save%)', 'Clean Sheets Percentage (CS%)',
+    'Penalty Kicks Save Percentage', 'Shots on Target Percentage (SoT%)', 'Shots on Target per 90 (SoT/90)',
+    'Goals per Shot (G/Sh)', 'Average Shot Distance (Dist)', 'Passes Completed (Cmp)', 'Pass Completion Percentage (Cmp%)',
+    'Total Passing Distance (TotDist)', 'Short Pass Completion Percentage', 'Medium Pass Completion Percentage',
+    'Long Pass Completion Percentage', 'Key Passes (KP)', 'Passes into Final Third (1/3)', 'Passes into Penalty Area (PPA)',
+    'Crosses into Penalty Area (CrsPA)', 'Shot-Creating Actions (SCA)', 'SCA per 90', 'Goal-Creating Actions (GCA)',
+    'GCA per 90', 'Tackles (Tkl)', 'Tackles Won (TklW)', 'Challenges (Tkl)', 'Challenges Lost (TklD)', 'Blocks',
+    'Blocked Shots (Sh)', 'Blocked Passes (Pass)', 'Interceptions (Int)', 'Touches', 'Touches in Defensive Penalty Area',
+    'Touches in Defensive Third', 'Touches in Middle Third', 'Touches in Attacking Third', 'Touches in Attacking Penalty Area',
+    'Take-Ons (Att)', 'Take-On Success Percentage (Succ%)', 'Take-On Tackled Percentage (Tkl%)', 'Carries',
+    'Progressive Carrying Distance (TotDist)', 'Carries into Final Third (1/3)', 'Carries into Penalty Area (CPA)',
+    'Miscontrols (Mis)', 'Dispossessed (Dis)', 'Passes Received (Rec)', 'Fouls Committed (Fls)', 'Fouls Drawn (Fld)',
+    'Offsides (Off)', 'Crosses (Crs)', 'Ball Recoveries (Recov)', 'Aerials Won (Won)', 'Aerials Lost (Lost)',
+    'Aerials Won Percentage (Won%)'
+]
+
+# -----------------------------------------
+# Column types of the typed (Parquet) export: text columns, dictionary-encoded columns,
+# and statistics stored as decimals; every other statistic is an integer count
+# Kiểu dữ liệu của bản xuất có kiểu (Parquet): cột văn bản, cột mã hóa từ điển,
+# và các chỉ số lưu dạng số thực; các chỉ số còn lại là số nguyên
+TEXT_KEYS = ['name']
+CATEGORY_KEYS = ['nationality', 'team', 'position']
+FLOAT_KEYS = [
+    'xg', 'xg_assist', 'goals_per90', 'assists_per90', 'xg_per90', 'xg_assist_per90',
+    'gk_goals_against_per90', 'gk_save_pct', 'gk_clean_sheets_pct', 'gk_pens_save_pct',
+    'shots_on_target_pct', 'shots_on_target_per90', 'goals_per_shot', 'average_shot_distance',
+    'passes_pct', 'passes_pct_short', 'passes_pct_medium', 'passes_pct_long', 'sca_per90', 'gca_per90',
+    'take_ons_won_pct', 'take_ons_tackled_pct', 'aerials_won_pct'
+]
+MISSING_VALUES = ['N/a', '']
+
+# -----------------------------------------
+# Default output file and the columns identifying a player between snapshots
+# File kết quả mặc định và các cột nhận diện cầu thủ giữa các lần chụp dữ liệu
+OUTPUT_FILE = 'premier_league_player_stats.csv'
+KEY_COLUMNS = ['Name', 'Team']
+
+# -----------------------------------------
+# Fastest available HTML parser backend (lxml when installed)
+# Bộ phân tích HTML nhanh nhất có sẵn (lxml nếu đã cài đặt)
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
 # -----------------------------------------
 # List of player data keys for initializing player dictionary
 # Danh sách các khóa dữ liệu cầu thủ để khởi tạo từ điển cầu thủ
@@ -52,398 +198,401 @@ def initialize_player_dict():
     return {key: 'N/a' for key in PLAYER_KEYS}
 
 # -----------------------------------------
-def scrape_standard_stats():
-    """Scrape player data from the 'Standard Stats' table.
-    Thu thập dữ liệu cầu thủ từ bảng 'Standard Stats'."""
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.implicitly_wait(10)  # Wait for page elements to load / Chờ các phần tử trang tải
-    try:
-        url = TABLE_LINKS['Standard Stats'][0]
-        driver.get(url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, TABLE_LINKS['Standard Stats'][1])))
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        table = soup.find('table', attrs={'id': TABLE_LINKS['Standard Stats'][1]})
-
-        player_set = {}
+# Maximum number of concurrent page downloads, i.e. of browsers or HTTP sessions in use
+# Số lượt tải trang song song tối đa, tức số trình duyệt hoặc phiên HTTP được dùng
+MAX_WORKERS = 4
+
+# Browser-like headers for the plain HTTP backend
+# Các header giống trình duyệt cho cách tải bằng HTTP thông thường
+HTTP_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/124.0 Safari/537.36'),
+    'Accept-Language': 'en-US,en;q=0.9'
+}
+HTTP_TIMEOUT = 30
 
-        if not table:
-            print("Error: Could not find the 'Standard Stats' table.")
-            return player_set
+# How long the browser waits for the stats table; a timeout is retried by the RetryPolicy
+# Thời gian trình duyệt chờ bảng thống kê; hết thời gian chờ sẽ được RetryPolicy thử lại
+BROWSER_WAIT_SECONDS = 10
 
-        rows = table.find_all('tr', attrs={'data-row': True})
+_driver_path = None
+_driver_path_lock = threading.Lock()
 
-        for row in rows:
-            try:
-                name = row.find('td', attrs={'data-stat': 'player'}).text.strip()
-                nationality = row.find('td', attrs={'data-stat': 'nationality'}).text.strip()
-                position = row.find('td', attrs={'data-stat': 'position'}).text.strip()
-                team = row.find('td', attrs={'data-stat': 'team'}).text.strip()
-                age = row.find('td', attrs={'data-stat': 'age'}).text.strip()
-                games = row.find('td', attrs={'data-stat': 'games'}).text.strip()
-                games_starts = row.find('td', attrs={'data-stat': 'games_starts'}).text.strip()
-                minutes_str = row.find('td', attrs={'data-stat': 'minutes'}).text.strip()
-                goals = row.find('td', attrs={'data-stat': 'goals'}).text.strip()
-                assist = row.find('td', attrs={'data-stat': 'assists'}).text.strip()
-                cards_yellow = row.find('td', attrs={'data-stat': 'cards_yellow'}).text.strip()
-                cards_red = row.find('td', attrs={'data-stat': 'cards_red'}).text.strip()
-                xg = row.find('td', attrs={'data-stat': 'xg'}).text.strip()
-                xg_assist = row.find('td', attrs={'data-stat': 'xg_assist'}).text.strip()
-                progressive_carries = row.find('td', attrs={'data-stat': 'progressive_carries'}).text.strip()
-                progressive_passes = row.find('td', attrs={'data-stat': 'progressive_passes'}).text.strip()
-                progressive_passes_received = row.find('td', attrs={'data-stat': 'progressive_passes_received'}).text.strip()
-                goals_per90 = row.find('td', attrs={'data-stat': 'goals_per90'}).text.strip()
-                assists_per90 = row.find('td', attrs={'data-stat': 'assists_per90'}).text.strip()
-                xg_per90 = row.find('td', attrs={'data-stat': 'xg_per90'}).text.strip()
-                xg_assist_per90 = row.find('td', attrs={'data-stat': 'xg_assist_per90'}).text.strip()
-
-                player_data = initialize_player_dict()
-                player_data.update({
-                    'name': name,
-                    'nationality': nationality,
-                    'position': position,
-                    'team': team,
-                    'age': age,
-                    'games': games,
-                    'games_starts': games_starts,
-                    'minutes': minutes_str,
-                    'goals': goals,
-                    'assist': assist,
-                    'cards_yellow': cards_yellow,
-                    'cards_red': cards_red,
-                    'xg': xg,
-                    'xg_assist': xg_assist,
-                    'progressive_carries': progressive_carries,
-                    'progressive_passes': progressive_passes,
-                    'progressive_passes_received': progressive_passes_received,
-                    'goals_per90': goals_per90,
-                    'assists_per90': assists_per90,
-                    'xg_per90': xg_per90,
-                    'xg_assist_per90': xg_assist_per90
-                })
-
-                minutes_str_cleaned = minutes_str.replace(',', '')
-                if minutes_str_cleaned.isdigit() and int(minutes_str_cleaned) <= 90:
-                    continue
-
-                player_key = str(name) + str(team)
-                player_set[player_key] = player_data
+# -----------------------------------------
+class ResourcePool:
+    """Pool of reusable browsers or HTTP sessions shared by the download threads.
+    Resources are created lazily, so there are never more than there are threads using them.
+    Nhóm trình duyệt hoặc phiên HTTP dùng lại được, chia sẻ giữa các luồng tải trang.
+    Tài nguyên chỉ được tạo khi cần nên không bao giờ nhiều hơn số luồng đang dùng."""
+
+    def __init__(self, create, close):
+        self.create = create
+        self.close = close
+        self.idle = queue.Queue()
+        self.created = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def borrow(self):
+        # Borrow an idle resource, or create one if every resource is busy
+        # Mượn một tài nguyên rảnh, hoặc tạo mới nếu tất cả đang bận
+        try:
+            resource = self.idle.get_nowait()
+        except queue.Empty:
+            resource = self.create()
+            with self.lock:
+                self.created.append(resource)
+        try:
+            yield resource
+        finally:
+            self.idle.put(resource)
+
+    def close_all(self):
+        for resource in self.created:
+            self.close(resource)
 
-            except Exception as e:
-                print(f"Error processing row: {e}")
-                continue
+# -----------------------------------------
+def get_driver_path():
+    """Install ChromeDriver once per run and reuse its path.
+    Cài đặt ChromeDriver một lần cho mỗi lần chạy và dùng lại đường dẫn."""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            with METRICS.stage('driver_install'):
+                _driver_path = ChromeDriverManager().install()
+    return _driver_path
 
-    finally:
-        driver.quit()
+# -----------------------------------------
+def create_driver():
+    """Start a headless Chrome browser for page downloads.
+    Khởi động trình duyệt Chrome chạy ẩn để tải trang."""
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--no-sandbox')
+    driver_path = get_driver_path()
+    with METRICS.stage('browser_start'):
+        return webdriver.Chrome(service=Service(driver_path), options=options)
 
-    return player_set
+# -----------------------------------------
+def create_session():
+    """Create an HTTP session with browser-like headers.
+    Tạo một phiên HTTP với các header giống trình duyệt."""
+    session = requests.Session()
+    session.headers.update(HTTP_HEADERS)
+    return session
 
 # -----------------------------------------
-def update_goalkeeping_stats(player_set):
-    """Update player data with goalkeeping statistics.
-    Cập nhật dữ liệu cầu thủ với thống kê thủ môn."""
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.implicitly_wait(10)
-    try:
-        url = TABLE_LINKS['Goalkeeping'][0]
+def fetch_table_page(driver, url, table_id):
+    """Load one stats page in the browser and return its HTML once the table is present.
+    Tải một trang thống kê bằng trình duyệt và trả về HTML khi bảng đã xuất hiện."""
+    with METRICS.stage('page_load', url):
         driver.get(url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, TABLE_LINKS['Goalkeeping'][1])))
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        table = soup.find('table', attrs={'id': TABLE_LINKS['Goalkeeping'][1]})
+    with METRICS.stage('table_wait', url):
+        WebDriverWait(driver, BROWSER_WAIT_SECONDS).until(EC.presence_of_element_located((By.ID, table_id)))
+    page_source = driver.page_source
+    METRICS.count('pages_downloaded', host=urlparse(url).netloc, backend='selenium')
+    METRICS.count('bytes_downloaded', len(page_source.encode('utf-8')), host=urlparse(url).netloc)
+    return page_source
 
-        if not table:
-            print("Error: Could not find the 'Goalkeeping' table.")
-            return
-
-        rows = table.find_all('tr', attrs={'data-row': True})
+# -----------------------------------------
+def fetch_table_page_http(session, url, table_id, request_headers=None):
+    """Download one stats page with a plain HTTP request.
+    Returns (status_code, html, response_headers) and fails if the table is missing from the HTML.
+    Tải một trang thống kê bằng yêu cầu HTTP thông thường.
+    Trả về (status_code, html, response_headers) và báo lỗi nếu HTML không chứa bảng."""
+    with METRICS.stage('http_get', url):
+        response = session.get(url, headers=request_headers, timeout=HTTP_TIMEOUT)
+    METRICS.count('pages_downloaded', host=urlparse(url).netloc, backend='http')
+    METRICS.count('bytes_downloaded', len(response.content), host=urlparse(url).netloc)
+    if response.status_code == 304:
+        return 304, None, response.headers
+    response.raise_for_status()
+
+    if extract_table_html(response.text, table_id) is None:
+        raise ValueError(f"table '{table_id}' not found in the HTML")
+    return response.status_code, response.text, response.headers
 
-        for row in rows:
+# -----------------------------------------
+class PageFetcher:
+    """Downloads stats pages through the cache with pooled HTTP sessions, falling back to pooled browsers.
+    With the 'http' backend a browser is only started for pages the plain request could not read.
+    Every download is paced and retried by the shared RetryPolicy.
+    Tải các trang thống kê qua bộ nhớ đệm bằng các phiên HTTP dùng chung, dự phòng bằng trình duyệt dùng chung.
+    Với cách tải 'http', trình duyệt chỉ được mở cho các trang mà yêu cầu thông thường không đọc được.
+    Mỗi lượt tải đều theo nhịp và được thử lại bởi RetryPolicy dùng chung."""
+
+    def __init__(self, cache=None, backend='http', retry=None):
+        self.cache = cache
+        self.backend = backend
+        self.retry = RetryPolicy() if retry is None else retry
+        self.sessions = ResourcePool(create_session, lambda session: session.close())
+        self.drivers = ResourcePool(create_driver, lambda driver: driver.quit())
+
+    def load_http(self, url, table_id, request_headers):
+        with self.sessions.borrow() as session:
+            return fetch_table_page_http(session, url, table_id, request_headers)
+
+    def load_browser(self, url, table_id):
+        # The browser cannot send conditional requests, so it always reports a full 200 response
+        # Trình duyệt không gửi được yêu cầu có điều kiện nên luôn trả về phản hồi 200 đầy đủ
+        with self.drivers.borrow() as driver:
+            return 200, fetch_table_page(driver, url, table_id), {}
+
+    def load(self, url, table_id, request_headers):
+        if self.backend == 'http':
             try:
-                name = row.find('td', attrs={'data-stat': 'player'}).text.strip()
-                team = row.find('td', attrs={'data-stat': 'team'}).text.strip()
-                player_key = str(name) + str(team)
-
-                if player_key in player_set:
-                    player_set[player_key].update({
-                        'gk_goals_against_per90': row.find('td', attrs={'data-stat': 'gk_goals_against_per90'}).text.strip(),
-                        'gk_save_pct': row.find('td', attrs={'data-stat': 'gk_save_pct'}).text.strip(),
-                        'gk_clean_sheets_pct': row.find('td', attrs={'data-stat': 'gk_clean_sheets_pct'}).text.strip(),
-                        'gk_pens_save_pct': row.find('td', attrs={'data-stat': 'gk_pens_save_pct'}).text.strip()
-                    })
+                return self.retry.call(url, lambda: self.load_http(url, table_id, request_headers))
             except Exception as e:
-                print(f"Error processing goalkeeping row: {e}")
-                continue
+                print(f"HTTP download of {url} failed ({e}), falling back to Selenium")
+        return self.retry.call(url, lambda: self.load_browser(url, table_id))
 
-    finally:
-        driver.quit()
+    def fetch(self, url, table_id):
+        """Return the HTML of a stats page containing the given table.
+        Trả về HTML của một trang thống kê có chứa bảng cần lấy."""
+        if self.cache is None:
+            return self.load(url, table_id, {})[1]
+        return self.cache.fetch(url, lambda url, request_headers: self.load(url, table_id, request_headers))
 
-# -----------------------------------------
-def update_shooting_stats(player_set):
-    """Update player data with shooting statistics.
-    Cập nhật dữ liệu cầu thủ với thống kê sút bóng."""
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.implicitly_wait(10)
-    try:
-        url = TABLE_LINKS['Shooting'][0]
-        driver.get(url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, TABLE_LINKS['Shooting'][1])))
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        table = soup.find('table', attrs={'id': TABLE_LINKS['Shooting'][1]})
+    def close(self):
+        self.sessions.close_all()
+        self.drivers.close_all()
 
-        if not table:
-            print("Error: Could not find the 'Shooting' table.")
-            return
+# -----------------------------------------
+def build_table_links(competition=9, season=None):
+    """Build the TABLE_LINKS of any competition and season (None means the current season).
+    Tạo TABLE_LINKS cho một giải đấu và mùa giải bất kỳ (None là mùa giải hiện tại)."""
+    slug = COMPETITIONS[competition]
+    table_links = {}
+    for table_name, (url, table_id) in TABLE_LINKS.items():
+        page = url.split('/')[-2]
+        if season is None:
+            table_links[table_name] = (f'https://fbref.com/en/comps/{competition}/{page}/{slug}-Stats', table_id)
+        else:
+            table_links[table_name] = (
+                f'https://fbref.com/en/comps/{competition}/{season}/{page}/{season}-{slug}-Stats', table_id
+            )
+    return table_links
 
-        rows = table.find_all('tr', attrs={'data-row': True})
+# -----------------------------------------
+def fetch_all_tables(table_links=None, max_workers=MAX_WORKERS, cache=None, backend='http'):
+    """Download the pages of a TABLE_LINKS dictionary concurrently with a small pool of reused HTTP sessions or browsers.
+    Pages already in the cache are served from disk without any download.
+    Tải song song các trang trong từ điển TABLE_LINKS với một nhóm nhỏ phiên HTTP hoặc trình duyệt được dùng lại.
+    Các trang đã có trong bộ nhớ đệm được đọc từ đĩa mà không cần tải lại."""
+    if table_links is None:
+        table_links = TABLE_LINKS
+
+    fetcher = PageFetcher(cache, backend)
+    page_sources = {}
+    failed = []
+    try:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(table_links))) as executor:
+            futures = {table_name: executor.submit(fetcher.fetch, url, table_id)
+                       for table_name, (url, table_id) in table_links.items()}
+            for table_name, future in futures.items():
+                try:
+                    page_sources[table_name] = future.result()
+                except Exception as e:
+                    print(f"Error loading the '{table_name}' page: {e}")
+                    METRICS.count('pages_failed', table=table_name)
+                    page_sources[table_name] = None
+                    failed.append(table_links[table_name][0])
+    finally:
+        fetcher.close()
 
-        for row in rows:
-            try:
-                name = row.find('td', attrs={'data-stat': 'player'}).text.strip()
-                team = row.find('td', attrs={'data-stat': 'team'}).text.strip()
-                player_key = str(name) + str(team)
-
-                if player_key in player_set:
-                    player_set[player_key].update({
-                        'shots_on_target_pct': row.find('td', attrs={'data-stat': 'shots_on_target_pct'}).text.strip(),
-                        'shots_on_target_per90': row.find('td', attrs={'data-stat': 'shots_on_target_per90'}).text.strip(),
-                        'goals_per_shot': row.find('td', attrs={'data-stat': 'goals_per_shot'}).text.strip(),
-                        'average_shot_distance': row.find('td', attrs={'data-stat': 'average_shot_distance'}).text.strip()
-                    })
-            except Exception as e:
-                print(f"Error processing shooting row: {e}")
-                continue
+    # Report the pages that still failed after every retry
+    # Báo cáo các trang vẫn lỗi sau tất cả các lần thử lại
+    if failed:
+        print(f"{len(failed)} pages failed permanently:")
+        for url in failed:
+            print(f"  {url}")
 
-    finally:
-        driver.quit()
+    return page_sources
 
 # -----------------------------------------
-def update_passing_stats(player_set):
-    """Update player data with passing statistics.
-    Cập nhật dữ liệu cầu thủ với thống kê chuyền bóng."""
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.implicitly_wait(10)
-    try:
-        url = TABLE_LINKS['Passing'][0]
-        driver.get(url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, TABLE_LINKS['Passing'][1])))
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        table = soup.find('table', attrs={'id': TABLE_LINKS['Passing'][1]})
-
-        if not table:
-            print("Error: Could not find the 'Passing' table.")
-            return
+def iter_table_rows(table_links=None, max_workers=MAX_WORKERS, cache=None, backend='http'):
+    """Yield (table_name, row_maps) as soon as each page is downloaded and parsed, in completion order.
+    The page HTML is dropped right after parsing; row_maps is None when the page or table could not be read.
+    Trả về lần lượt (table_name, row_maps) ngay khi mỗi trang được tải và phân tích xong, theo thứ tự hoàn thành.
+    HTML của trang được bỏ ngay sau khi phân tích; row_maps là None nếu không đọc được trang hoặc bảng."""
+    if table_links is None:
+        table_links = TABLE_LINKS
+    if not table_links:
+        return
 
-        rows = table.find_all('tr', attrs={'data-row': True})
+    fetcher = PageFetcher(cache, backend)
 
-        for row in rows:
-            try:
-                name = row.find('td', attrs={'data-stat': 'player'}).text.strip()
-                team = row.find('td', attrs={'data-stat': 'team'}).text.strip()
-                player_key = str(name) + str(team)
-
-                if player_key in player_set:
-                    player_set[player_key].update({
-                        'passes_completed': row.find('td', attrs={'data-stat': 'passes_completed'}).text.strip(),
-                        'passes_pct': row.find('td', attrs={'data-stat': 'passes_pct'}).text.strip(),
-                        'passes_total_distance': row.find('td', attrs={'data-stat': 'passes_total_distance'}).text.strip(),
-                        'passes_pct_short': row.find('td', attrs={'data-stat': 'passes_pct_short'}).text.strip(),
-                        'passes_pct_medium': row.find('td', attrs={'data-stat': 'passes_pct_medium'}).text.strip(),
-                        'passes_pct_long': row.find('td', attrs={'data-stat': 'passes_pct_long'}).text.strip(),
-                        'assisted_shots': row.find('td', attrs={'data-stat': 'assisted_shots'}).text.strip(),
-                        'passes_into_final_third': row.find('td', attrs={'data-stat': 'passes_into_final_third'}).text.strip(),
-                        'passes_into_penalty_area': row.find('td', attrs={'data-stat': 'passes_into_penalty_area'}).text.strip(),
-                        'crosses_into_penalty_area': row.find('td', attrs={'data-stat': 'crosses_into_penalty_area'}).text.strip(),
-                        'progressive_passes': row.find('td', attrs={'data-stat': 'progressive_passes'}).text.strip()
-                    })
-            except Exception as e:
-                print(f"Error processing passing row: {e}")
-                continue
+    def fetch_and_parse(url, table_id):
+        return parse_table_rows(fetcher.fetch(url, table_id), table_id)
 
+    try:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(table_links))) as executor:
+            futures = {executor.submit(fetch_and_parse, url, table_id): table_name
+                       for table_name, (url, table_id) in table_links.items()}
+            for future in as_completed(futures):
+                table_name = futures[future]
+                try:
+                    yield table_name, future.result()
+                except Exception as e:
+                    print(f"Error loading the '{table_name}' page: {e}")
+                    METRICS.count('pages_failed', table=table_name)
+                    yield table_name, None
     finally:
-        driver.quit()
+        fetcher.close()
 
 # -----------------------------------------
-def update_goal_shot_creation_stats(player_set):
-    """Update player data with goal and shot creation statistics.
-    Cập nhật dữ liệu cầu thủ với thống kê tạo bàn và tạo cơ hội sút."""
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.implicitly_wait(10)
-    try:
-        url = TABLE_LINKS['Goal and Shot Creation'][0]
-        driver.get(url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, TABLE_LINKS['Goal and Shot Creation'][1])))
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        table = soup.find('table', attrs={'id': TABLE_LINKS['Goal and Shot Creation'][1]})
-
-        if not table:
-            print("Error: Could not find the 'Goal and Shot Creation' table.")
-            return
-
-        rows = table.find_all('tr', attrs={'data-row': True})
+def extract_table_html(page_source, table_id):
+    """Cut the markup of one <table id=...> out of a page, even when fbref wraps it in an HTML comment.
+    Returns None when the page does not contain the table.
+    Cắt phần mã của một <table id=...> ra khỏi trang, kể cả khi fbref bọc bảng trong chú thích HTML.
+    Trả về None nếu trang không chứa bảng."""
+    marker = f'id="{table_id}"'
+    position = page_source.find(marker)
+    while position != -1:
+        table_start = page_source.rfind('<table', 0, position)
+        # The id must belong to the <table> tag itself, not to a later element
+        # Thuộc tính id phải nằm trong chính thẻ <table>, không phải phần tử phía sau
+        if table_start != -1 and '>' not in page_source[table_start:position]:
+            table_end = page_source.find('</table>', position)
+            if table_end == -1:
+                return None
+            return page_source[table_start:table_end + len('</table>')]
+        position = page_source.find(marker, position + len(marker))
+    return None
 
-        for row in rows:
-            try:
-                name = row.find('td', attrs={'data-stat': 'player'}).text.strip()
-                team = row.find('td', attrs={'data-stat': 'team'}).text.strip()
-                player_key = str(name) + str(team)
-
-                if player_key in player_set:
-                    player_set[player_key].update({
-                        'sca': row.find('td', attrs={'data-stat': 'sca'}).text.strip(),
-                        'sca_per90': row.find('td', attrs={'data-stat': 'sca_per90'}).text.strip(),
-                        'gca': row.find('td', attrs={'data-stat': 'gca'}).text.strip(),
-                        'gca_per90': row.find('td', attrs={'data-stat': 'gca_per90'}).text.strip()
-                    })
-            except Exception as e:
-                print(f"Error processing goal and shot creation row: {e}")
+# -----------------------------------------
+def parse_table_rows(page_source, table_id):
+    """Parse only the target table and map each player row to {data-stat: text} in one pass.
+    Chỉ phân tích bảng cần lấy và ánh xạ mỗi hàng cầu thủ thành {data-stat: text} trong một lượt duyệt."""
+    with METRICS.stage('table_slice'):
+        table_html = extract_table_html(page_source, table_id)
+    if table_html is None:
+        return None
+
+    with METRICS.stage('html_parse'):
+        strainer = SoupStrainer('table', attrs={'id': table_id})
+        soup = BeautifulSoup(table_html, HTML_PARSER, parse_only=strainer)
+        table = soup.find('table', attrs={'id': table_id})
+    if not table:
+        return None
+
+    with METRICS.stage('row_extract'):
+        row_maps = []
+        for row in table.find_all('tr', attrs={'data-row': True}):
+            # Skip the header rows repeated inside the table body
+            # Bỏ qua các hàng tiêu đề lặp lại trong thân bảng
+            if 'thead' in (row.get('class') or []):
                 continue
-
-    finally:
-        driver.quit()
+            row_maps.append({cell['data-stat']: cell.get_text().strip()
+                             for cell in row.find_all('td', attrs={'data-stat': True})})
+    METRICS.count('rows_parsed', len(row_maps), table=table_id)
+    return row_maps
 
 # -----------------------------------------
-def update_defensive_stats(player_set):
-    """Update player data with defensive actions statistics.
-    Cập nhật dữ liệu cầu thủ với thống kê hành động phòng ngự."""
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.implicitly_wait(10)
-    try:
-        url = TABLE_LINKS['Defense'][0]
-        driver.get(url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, TABLE_LINKS['Defense'][1])))
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        table = soup.find('table', attrs={'id': TABLE_LINKS['Defense'][1]})
+def extract_table_columns(row_map, table_name):
+    """Pick the TABLE_COLUMNS of one table from a parsed row, keyed by player data key.
+    Lấy các cột TABLE_COLUMNS của một bảng từ hàng đã phân tích, theo khóa dữ liệu cầu thủ."""
+    extracted = {}
+    for stat in TABLE_COLUMNS[table_name]:
+        if stat not in row_map:
+            raise KeyError(f"missing column '{stat}'")
+        extracted[STAT_KEY_ALIASES.get(stat, stat)] = row_map[stat]
+    return extracted
 
-        if not table:
-            print("Error: Could not find the 'Defense' table.")
-            return
+# -----------------------------------------
+def scrape_standard_stats(page_source):
+    """Scrape player data from the 'Standard Stats' table.
+    Thu thập dữ liệu cầu thủ từ bảng 'Standard Stats'."""
+    player_set = {}
 
-        rows = table.find_all('tr', attrs={'data-row': True})
+    if not page_source:
+        print("Error: No page source for the 'Standard Stats' table.")
+        return player_set
 
-        for row in rows:
-            try:
-                name = row.find('td', attrs={'data-stat': 'player'}).text.strip()
-                team = row.find('td', attrs={'data-stat': 'team'}).text.strip()
-                player_key = str(name) + str(team)
-
-                if player_key in player_set:
-                    player_set[player_key].update({
-                        'tackles': row.find('td', attrs={'data-stat': 'tackles'}).text.strip(),
-                        'tackles_won': row.find('td', attrs={'data-stat': 'tackles_won'}).text.strip(),
-                        'challenges': row.find('td', attrs={'data-stat': 'challenges'}).text.strip(),
-                        'challenges_lost': row.find('td', attrs={'data-stat': 'challenges_lost'}).text.strip(),
-                        'blocks': row.find('td', attrs={'data-stat': 'blocks'}).text.strip(),
-                        'blocked_shots': row.find('td', attrs={'data-stat': 'blocked_shots'}).text.strip(),
-                        'blocked_passes': row.find('td', attrs={'data-stat': 'blocked_passes'}).text.strip(),
-                        'interceptions': row.find('td', attrs={'data-stat': 'interceptions'}).text.strip()
-                    })
-            except Exception as e:
-                print(f"Error processing defensive actions row: {e}")
-                continue
+    row_maps = parse_table_rows(page_source, TABLE_LINKS['Standard Stats'][1])
+    if row_maps is None:
+        print("Error: Could not find the 'Standard Stats' table.")
+        return player_set
 
-    finally:
-        driver.quit()
+    return players_from_rows(row_maps)
 
 # -----------------------------------------
-def update_possession_stats(player_set):
-    """Update player data with possession statistics.
-    Cập nhật dữ liệu cầu thủ với thống kê kiểm soát bóng."""
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.implicitly_wait(10)
-    try:
-        url = TABLE_LINKS['Possession'][0]
-        driver.get(url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, TABLE_LINKS['Possession'][1])))
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        table = soup.find('table', attrs={'id': TABLE_LINKS['Possession'][1]})
-
-        if not table:
-            print("Error: Could not find the 'Possession' table.")
-            return
+def players_from_rows(row_maps):
+    """Create the players from the parsed rows of the 'Standard Stats' table.
+    Tạo danh sách cầu thủ từ các hàng đã phân tích của bảng 'Standard Stats'."""
+    player_set = {}
+    for row_map in row_maps:
+        try:
+            player_data = initialize_player_dict()
+            player_data.update(extract_table_columns(row_map, 'Standard Stats'))
+
+            minutes_str_cleaned = player_data['minutes'].replace(',', '')
+            if minutes_str_cleaned.isdigit() and int(minutes_str_cleaned) <= 90:
+                METRICS.count('rows_filtered', table='Standard Stats')
+                continue
 
-        rows = table.find_all('tr', attrs={'data-row': True})
+            player_key = str(player_data['name']) + str(player_data['team'])
+            player_set[player_key] = player_data
 
-        for row in rows:
-            try:
-                name = row.find('td', attrs={'data-stat': 'player'}).text.strip()
-                team = row.find('td', attrs={'data-stat': 'team'}).text.strip()
-                player_key = str(name) + str(team)
-
-                if player_key in player_set:
-                    player_set[player_key].update({
-                        'touches': row.find('td', attrs={'data-stat': 'touches'}).text.strip(),
-                        'touches_def_pen_area': row.find('td', attrs={'data-stat': 'touches_def_pen_area'}).text.strip(),
-                        'touches_def_3rd': row.find('td', attrs={'data-stat': 'touches_def_3rd'}).text.strip(),
-                        'touches_mid_3rd': row.find('td', attrs={'data-stat': 'touches_mid_3rd'}).text.strip(),
-                        'touches_att_3rd': row.find('td', attrs={'data-stat': 'touches_att_3rd'}).text.strip(),
-                        'touches_att_pen_area': row.find('td', attrs={'data-stat': 'touches_att_pen_area'}).text.strip(),
-                        'take_ons': row.find('td', attrs={'data-stat': 'take_ons'}).text.strip(),
-                        'take_ons_won_pct': row.find('td', attrs={'data-stat': 'take_ons_won_pct'}).text.strip(),
-                        'take_ons_tackled_pct': row.find('td', attrs={'data-stat': 'take_ons_tackled_pct'}).text.strip(),
-                        'carries': row.find('td', attrs={'data-stat': 'carries'}).text.strip(),
-                        'carries_progressive_distance': row.find('td', attrs={'data-stat': 'carries_progressive_distance'}).text.strip(),
-                        'carries_into_final_third': row.find('td', attrs={'data-stat': 'carries_into_final_third'}).text.strip(),
-                        'carries_into_penalty_area': row.find('td', attrs={'data-stat': 'carries_into_penalty_area'}).text.strip(),
-                        'miscontrols': row.find('td', attrs={'data-stat': 'miscontrols'}).text.strip(),
-                        'dispossessed': row.find('td', attrs={'data-stat': 'dispossessed'}).text.strip(),
-                        'passes_received': row.find('td', attrs={'data-stat': 'passes_received'}).text.strip()
-                    })
-            except Exception as e:
-                print(f"Error processing possession row: {e}")
-                continue
+        except Exception as e:
+            print(f"Error processing row: {e}")
+            METRICS.count('rows_dropped', table='Standard Stats')
+            continue
 
-    finally:
-        driver.quit()
+    return player_set
 
 # -----------------------------------------
-def update_miscellaneous_stats(player_set):
-    """Update player data with miscellaneous statistics.
-    Cập nhật dữ liệu cầu thủ với thống kê linh tinh."""
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()))
-    driver.implicitly_wait(10)
-    try:
-        url = TABLE_LINKS['Miscellaneous'][0]
-        driver.get(url)
-        WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, TABLE_LINKS['Miscellaneous'][1])))
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        table = soup.find('table', attrs={'id': TABLE_LINKS['Miscellaneous'][1]})
+def update_table_stats(player_set, table_name, page_source):
+    """Update player data with the statistics of one additional table.
+    Cập nhật dữ liệu cầu thủ với thống kê của một bảng bổ sung."""
+    if not page_source:
+        print(f"Error: No page source for the '{table_name}' table.")
+        return
 
-        if not table:
-            print("Error: Could not find the 'Miscellaneous' table.")
-            return
+    row_maps = parse_table_rows(page_source, TABLE_LINKS[table_name][1])
+    if row_maps is None:
+        print(f"Error: Could not find the '{table_name}' table.")
+        return
 
-        rows = table.find_all('tr', attrs={'data-row': True})
+    update_table_rows(player_set, table_name, row_maps)
 
-        for row in rows:
-            try:
-                name = row.find('td', attrs={'data-stat': 'player'}).text.strip()
-                team = row.find('td', attrs={'data-stat': 'team'}).text.strip()
-                player_key = str(name) + str(team)
-
-                if player_key in player_set:
-                    player_set[player_key].update({
-                        'fouls': row.find('td', attrs={'data-stat': 'fouls'}).text.strip(),
-                        'fouled': row.find('td', attrs={'data-stat': 'fouled'}).text.strip(),
-                        'offsides': row.find('td', attrs={'data-stat': 'offsides'}).text.strip(),
-                        'crosses': row.find('td', attrs={'data-stat': 'crosses'}).text.strip(),
-                        'ball_recoveries': row.find('td', attrs={'data-stat': 'ball_recoveries'}).text.strip(),
-                        'aerials_won': row.find('td', attrs={'data-stat': 'aerials_won'}).text.strip(),
-                        'aerials_lost': row.find('td', attrs={'data-stat': 'aerials_lost'}).text.strip(),
-                        'aerials_won_pct': row.find('td', attrs={'data-stat': 'aerials_won_pct'}).text.strip()
-                    })
-            except Exception as e:
-                print(f"Error processing miscellaneous row: {e}")
-                continue
+# -----------------------------------------
+def update_table_rows(player_set, table_name, row_maps):
+    """Add the statistics of the parsed rows of one additional table to the players.
+    Bổ sung thống kê từ các hàng đã phân tích của một bảng bổ sung vào dữ liệu cầu thủ."""
+    for row_map in row_maps:
+        try:
+            player_key = row_map['player'] + row_map['team']
+            if player_key in player_set:
+                player_set[player_key].update(extract_table_columns(row_map, table_name))
+        except Exception as e:
+            print(f"Error processing {table_name} row: {e}")
+            METRICS.count('rows_dropped', table=table_name)
+            continue
 
-    finally:
-        driver.quit()
+# -----------------------------------------
+def build_player_set(page_sources):
+    """Create the players from the standard table and add the statistics of every other table.
+    Tạo danh sách cầu thủ từ bảng tiêu chuẩn và bổ sung thống kê của các bảng còn lại."""
+    player_set = scrape_standard_stats(page_sources.get('Standard Stats'))
+    if player_set:
+        for table_name in TABLE_LINKS:
+            if table_name != 'Standard Stats':
+                update_table_stats(player_set, table_name, page_sources.get(table_name))
+    return player_set
+
+# -----------------------------------------
+def build_player_set_from_staging(staging):
+    """Build the players from the rows of every table checkpointed in a StagingArea, streaming them from disk.
+    Tạo danh sách cầu thủ từ các hàng của mọi bảng đã lưu điểm trong StagingArea, đọc dần từ đĩa."""
+    if not staging.is_done('Standard Stats'):
+        return {}
+    player_set = players_from_rows(staging.iter_rows('Standard Stats'))
+    for table_name in TABLE_LINKS:
+        if table_name != 'Standard Stats' and staging.is_done(table_name):
+            update_table_rows(player_set, table_name, staging.iter_rows(table_name))
+    return player_set
 
 # -----------------------------------------
 def get_player_name(player_dict):
@@ -455,29 +604,13 @@ def get_player_name(player_dict):
 def format_player_data(player_dict):
     """Format player data into a list for export in correct order.
     Định dạng dữ liệu cầu thủ thành danh sách để xuất theo thứ tự đúng."""
-    export_order_keys = [
-        'name', 'nationality', 'team', 'position', 'age', 'games', 'games_starts', 'minutes', 'goals', 'assist',
-        'cards_yellow', 'cards_red', 'xg', 'xg_assist', 'progressive_carries', 'progressive_passes',
-        'progressive_passes_received', 'goals_per90', 'assists_per90', 'xg_per90', 'xg_assist_per90',
-        'gk_goals_against_per90', 'gk_save_pct', 'gk_clean_sheets_pct', 'gk_pens_save_pct', 'shots_on_target_pct',
-        'shots_on_target_per90', 'goals_per_shot', 'average_shot_distance', 'passes_completed', 'passes_pct',
-        'passes_total_distance', 'passes_pct_short', 'passes_pct_medium', 'passes_pct_long', 'assisted_shots',
-        'passes_into_final_third', 'passes_into_penalty_area', 'crosses_into_penalty_area', 'sca', 'sca_per90',
-        'gca', 'gca_per90', 'tackles', 'tackles_won', 'challenges', 'challenges_lost', 'blocks', 'blocked_shots',
-        'blocked_passes', 'interceptions', 'touches', 'touches_def_pen_area', 'touches_def_3rd', 'touches_mid_3rd',
-        'touches_att_3rd', 'touches_att_pen_area', 'take_ons', 'take_ons_won_pct', 'take_ons_tackled_pct', 'carries',
-        'carries_progressive_distance', 'carries_into_final_third', 'carries_into_penalty_area', 'miscontrols',
-        'dispossessed', 'passes_received', 'fouls', 'fouled', 'offsides', 'crosses', 'ball_recoveries', 'aerials_won',
-        'aerials_lost', 'aerials_won_pct'
-    ]
-
     nationality = player_dict.get('nationality', 'N/a')
     age = player_dict.get('age', 'N/a')
     nationality_processed = nationality.split()[1] if ' ' in nationality else nationality
     age_processed = age.split('-')[0] if '-' in age else age
 
     exported_list = []
-    for key in export_order_keys:
+    for key in EXPORT_KEYS:
         if key == 'nationality':
             exported_list.append(nationality_processed)
         elif key == 'age':
@@ -488,59 +621,256 @@ def format_player_data(player_dict):
     return exported_list
 
 # -----------------------------------------
-def export_to_csv(player_set_dict):
-    """Export player data to a CSV file.
-    Xuất dữ liệu cầu thủ ra file CSV."""
+def build_player_table(player_set_dict):
+    """Build the export table of all players, sorted by name.
+    Tạo bảng xuất dữ liệu của tất cả cầu thủ, sắp xếp theo tên."""
     playerlist = list(player_set_dict.values())
     playerlist.sort(key=get_player_name)
     result = [format_player_data(player_dict) for player_dict in playerlist]
+    return pd.DataFrame(result, columns=EXPORT_COLUMNS)
 
-    column_names = [
-        'Name', 'Nation', 'Team', 'Position', 'Age', 'Matches Played', 'Starts', 'Minutes', 'Goals', 'Assists',
-        'Yellow Cards', 'Red Cards', 'Expected Goals (xG)', 'Expected Assist Goals (xAG)', 'Progressive Carries (PrgC)',
-        'Progressive Passes (PrgP)', 'Progressive Passes Received (PrgR)', 'Goals per 90', 'Assists per 90',
-        'xG per 90', 'xAG per 90', 'Goals Against per 90 (GA90)', 'Save Percentage (Save%)', 'Clean Sheets Percentage (CS%)',
-        'Penalty Kicks Save Percentage', 'Shots on Target Percentage (SoT%)', 'Shots on Target per 90 (SoT/90)',
-        'Goals per Shot (G/Sh)', 'Average Shot Distance (Dist)', 'Passes Completed (Cmp)', 'Pass Completion Percentage (Cmp%)',
-        'Total Passing Distance (TotDist)', 'Short Pass Completion Percentage', 'Medium Pass Completion Percentage',
-        'Long Pass Completion Percentage', 'Key Passes (KP)', 'Passes into Final Third (1/3)', 'Passes into Penalty Area (PPA)',
-        'Crosses into Penalty Area (CrsPA)', 'Shot-Creating Actions (SCA)', 'SCA per 90', 'Goal-Creating Actions (GCA)',
-        'GCA per 90', 'Tackles (Tkl)', 'Tackles Won (TklW)', 'Challenges (Tkl)', 'Challenges Lost (TklD)', 'Blocks',
-        'Blocked Shots (Sh)', 'Blocked Passes (Pass)', 'Interceptions (Int)', 'Touches', 'Touches in Defensive Penalty Area',
-        'Touches in Defensive Third', 'Touches in Middle Third', 'Touches in Attacking Third', 'Touches in Attacking Penalty Area',
-        'Take-Ons (Att)', 'Take-On Success Percentage (Succ%)', 'Take-On Tackled Percentage (Tkl%)', 'Carries',
-        'Progressive Carrying Distance (TotDist)', 'Carries into Final Third (1/3)', 'Carries into Penalty Area (CPA)',
-        'Miscontrols (Mis)', 'Dispossessed (Dis)', 'Passes Received (Rec)', 'Fouls Committed (Fls)', 'Fouls Drawn (Fld)',
-        'Offsides (Off)', 'Crosses (Crs)', 'Ball Recoveries (Recov)', 'Aerials Won (Won)', 'Aerials Lost (Lost)',
-        'Aerials Won Percentage (Won%)'
-    ]
-
-    df = pd.DataFrame(result, columns=column_names)
-    output_file = 'premier_league_player_stats.csv'
+# -----------------------------------------
+def export_to_csv(player_set_dict, output_file=OUTPUT_FILE):
+    """Export player data to a CSV file.
+    Xuất dữ liệu cầu thủ ra file CSV."""
+    df = build_player_table(player_set_dict)
     df.to_csv(output_file, index=False, encoding='utf-8')
     print(f"Data exported successfully to {output_file}")
+    export_to_parquet(df, output_file)
 
 # -----------------------------------------
-def main():
-    """Main function to orchestrate the scraping and exporting process.
-    Hàm chính để điều phối quá trình thu thập và xuất dữ liệu."""
+def build_typed_table(df):
+    """Convert the string export table to proper dtypes with real nulls.
+    Chuyển bảng xuất dạng chuỗi sang kiểu dữ liệu phù hợp với giá trị rỗng thực sự."""
+    typed = pd.DataFrame(index=df.index)
+    for key, column in zip(EXPORT_KEYS, EXPORT_COLUMNS):
+        values = df[column].astype(str).str.strip().replace(MISSING_VALUES, pd.NA)
+        if key in TEXT_KEYS:
+            typed[column] = values.astype('string')
+        elif key in CATEGORY_KEYS:
+            typed[column] = values.astype('category')
+        else:
+            # Thousands separators ("1,234") are removed before the numeric conversion
+            # Bỏ dấu phân cách hàng nghìn ("1,234") trước khi chuyển sang số
+            numbers = pd.to_numeric(values.str.replace(',', '', regex=False), errors='coerce')
+            typed[column] = numbers.astype('float64' if key in FLOAT_KEYS else 'Int64')
+    return typed
+
+# -----------------------------------------
+def export_to_parquet(df, output_file=OUTPUT_FILE):
+    """Write the typed player table as Parquet next to the CSV, with an embedded schema description.
+    Skipped with a message when pyarrow is not installed.
+    Ghi bảng cầu thủ có kiểu dữ liệu ra file Parquet cạnh file CSV, kèm mô tả lược đồ.
+    Bỏ qua kèm thông báo nếu chưa cài đặt pyarrow."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("pyarrow is not installed, skipping the Parquet export")
+        return None
+
+    typed = build_typed_table(df)
+    table = pa.Table.from_pandas(typed, preserve_index=False)
+    schema_description = {
+        'source': 'fbref.com',
+        'missing_values': MISSING_VALUES,
+        'columns': {column: key for key, column in zip(EXPORT_KEYS, EXPORT_COLUMNS)}
+    }
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'player_stats'] = json.dumps(schema_description, ensure_ascii=False).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+
+    parquet_file = os.path.splitext(output_file)[0] + '.parquet'
+    pq.write_table(table, parquet_file, compression='zstd')
+    print(f"Typed data exported successfully to {parquet_file}")
+    return parquet_file
+
+# -----------------------------------------
+def fingerprint_rows(df):
+    """Index a snapshot by its Name+Team key and hash the stat cells of every row.
+    Đánh chỉ mục bản chụp theo khóa Name+Team và băm các ô thống kê của từng hàng."""
+    keyed = df.set_index(KEY_COLUMNS, drop=False)
+    keyed = keyed[~keyed.index.duplicated(keep='last')]
+    stat_columns = [col for col in EXPORT_COLUMNS if col not in KEY_COLUMNS]
+    fingerprints = pd.util.hash_pandas_object(keyed[stat_columns], index=False)
+    return keyed, fingerprints
+
+# -----------------------------------------
+def diff_snapshots(previous_df, current_df):
+    """Compare two snapshots and list the inserted, changed and removed players.
+    So sánh hai bản chụp và liệt kê các cầu thủ được thêm, thay đổi và bị xóa."""
+    previous, previous_hashes = fingerprint_rows(previous_df)
+    current, current_hashes = fingerprint_rows(current_df)
+
+    inserted = current.index.difference(previous.index)
+    removed = previous.index.difference(current.index)
+    common = current.index.intersection(previous.index)
+    changed = common[current_hashes[common].values != previous_hashes[common].values]
+
+    # Only the changed rows are compared cell by cell to record which columns moved
+    # Chỉ so sánh từng ô ở các hàng thay đổi để ghi lại cột nào đã đổi
+    stat_columns = [col for col in EXPORT_COLUMNS if col not in KEY_COLUMNS]
+    cell_changes = current.loc[changed, stat_columns] != previous.loc[changed, stat_columns]
+    changed_columns = {key: [col for col, moved in row.items() if moved] for key, row in cell_changes.iterrows()}
+
+    return {
+        'inserted': list(inserted),
+        'changed': changed_columns,
+        'removed': list(removed),
+        'unchanged': len(common) - len(changed)
+    }
+
+# -----------------------------------------
+def apply_changes(previous_df, current_df, changes):
+    """Apply inserted, changed and removed rows to the previous snapshot.
+    Áp dụng các hàng được thêm, thay đổi và bị xóa vào bản chụp trước đó."""
+    previous, _ = fingerprint_rows(previous_df)
+    current, _ = fingerprint_rows(current_df)
+
+    updated = previous.drop(index=changes['removed'])
+    changed_keys = list(changes['changed'])
+    if changed_keys:
+        updated.loc[changed_keys, EXPORT_COLUMNS] = current.loc[changed_keys, EXPORT_COLUMNS]
+    updated = pd.concat([updated, current.loc[changes['inserted']]])
+
+    return updated.reset_index(drop=True).sort_values('Name', kind='stable')[EXPORT_COLUMNS]
+
+# -----------------------------------------
+def write_change_log(changes, output_file, previous_rows, current_rows):
+    """Write a compact JSON change log next to the output file.
+    Ghi nhật ký thay đổi dạng JSON gọn nhẹ bên cạnh file kết quả."""
+    changed_columns = sorted({col for cols in changes['changed'].values() for col in cols})
+    change_log = {
+        'snapshot': os.path.basename(output_file),
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'previous_rows': previous_rows,
+        'current_rows': current_rows,
+        'unchanged': changes['unchanged'],
+        'changed_columns': changed_columns,
+        'inserted': [list(key) for key in changes['inserted']],
+        'changed': [{'key': list(key), 'columns': cols} for key, cols in changes['changed'].items()],
+        'removed': [list(key) for key in changes['removed']]
+    }
+    log_file = os.path.splitext(output_file)[0] + '_changes.json'
+    with open(log_file, 'w', encoding='utf-8') as f:
+        json.dump(change_log, f, ensure_ascii=False, indent=1)
+    return log_file
+
+# -----------------------------------------
+def export_incremental(player_set_dict, output_file=OUTPUT_FILE):
+    """Update the previous snapshot with only the players that changed and log the changes.
+    The output file is left untouched when nothing changed, so later stages can skip their work.
+    Cập nhật bản chụp trước chỉ với các cầu thủ có thay đổi và ghi lại nhật ký thay đổi.
+    File kết quả được giữ nguyên khi không có thay đổi để các bước sau có thể bỏ qua."""
+    current_df = build_player_table(player_set_dict)
+
+    if os.path.exists(output_file):
+        previous_df = pd.read_csv(output_file, dtype=str, keep_default_na=False, encoding='utf-8')
+    else:
+        previous_df = pd.DataFrame(columns=EXPORT_COLUMNS, dtype=str)
+
+    changes = diff_snapshots(previous_df, current_df)
+    log_file = write_change_log(changes, output_file, len(previous_df), len(current_df))
+    print(f"Changes: {len(changes['inserted'])} inserted, {len(changes['changed'])} changed, "
+          f"{len(changes['removed'])} removed, {changes['unchanged']} unchanged (log: {log_file})")
+
+    if not (changes['inserted'] or changes['changed'] or changes['removed']):
+        print(f"No changes since the previous snapshot, {output_file} left as is")
+        return
+
+    updated_df = apply_changes(previous_df, current_df, changes)
+    updated_df.to_csv(output_file, index=False, encoding='utf-8')
+    print(f"Data exported successfully to {output_file}")
+    export_to_parquet(updated_df, output_file)
+
+# -----------------------------------------
+def parse_args():
+    """Parse command-line options of the scraper.
+    Phân tích các tùy chọn dòng lệnh của chương trình thu thập."""
+    parser = argparse.ArgumentParser(description='Scrape Premier League player statistics from fbref.com')
+    parser.add_argument('--backend', choices=['http', 'selenium'], default='http',
+                        help='download pages with plain HTTP requests (falling back to Selenium) '
+                             'or always with Selenium (default: %(default)s)')
+    parser.add_argument('--offline', action='store_true',
+                        help='replay pages from the HTML cache only, without any network access')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help='directory of the HTML cache (default: %(default)s)')
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL_SECONDS / 3600,
+                        help='hours before a cached page is fetched again (default: %(default)s)')
+    parser.add_argument('--output', default=OUTPUT_FILE,
+                        help='CSV file to write (default: %(default)s)')
+    parser.add_argument('--staging-dir', default=DEFAULT_STAGING_DIR,
+                        help='where parsed tables are checkpointed so an interrupted run can resume '
+                             '(default: %(default)s)')
+    parser.add_argument('--fresh', action='store_true',
+                        help='discard the checkpoint of an interrupted run and scrape every table again')
+    parser.add_argument('--metrics-dir', default=DEFAULT_METRICS_DIR,
+                        help='where the JSON run report and the Prometheus file are written '
+                             '(default: %(default)s)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='only apply inserted, changed or removed players to the previous output '
+                             'and write a change log next to it')
+    return parser.parse_args()
+
+# -----------------------------------------
+def run_scrape(args):
+    """Scrape every table into the staging area, build the players and export them.
+    Thu thập mọi bảng vào vùng lưu tạm, tạo danh sách cầu thủ và xuất dữ liệu."""
+    cache = PageCache(args.cache_dir, ttl=args.cache_ttl * 3600, offline=args.offline)
+
+    staging = StagingArea(os.path.join(args.staging_dir, 'fbref'))
+    if args.fresh:
+        staging.clear()
+        staging = StagingArea(os.path.join(args.staging_dir, 'fbref'))
+
+    # Tables checkpointed by an interrupted run are not scraped again
+    # Các bảng đã được lưu điểm bởi lần chạy bị gián đoạn không được thu thập lại
+    pending_links = {table_name: link for table_name, link in TABLE_LINKS.items() if not staging.is_done(table_name)}
+    if len(pending_links) < len(TABLE_LINKS):
+        print(f"Resuming: {len(TABLE_LINKS) - len(pending_links)} tables already staged in {staging.directory}")
+
     print("Starting data scraping...")
-    player_set = scrape_standard_stats()
+    failed_tables = []
+    for table_name, row_maps in iter_table_rows(pending_links, cache=cache, backend=args.backend):
+        if row_maps is None:
+            failed_tables.append(table_name)
+            continue
+        staging.commit(table_name, row_maps)
+        print(f"Staged {len(row_maps)} rows of the '{table_name}' table")
+
+    print("Parsing player data from all stats tables...")
+    with METRICS.stage('build_players'):
+        player_set = build_player_set_from_staging(staging)
     if not player_set:
         print("No player data collected. Exiting.")
         return
 
-    print("Updating player data with additional stats...")
-    update_goalkeeping_stats(player_set)
-    update_shooting_stats(player_set)
-    update_passing_stats(player_set)
-    update_goal_shot_creation_stats(player_set)
-    update_defensive_stats(player_set)
-    update_possession_stats(player_set)
-    update_miscellaneous_stats(player_set)
-
     print("Exporting data to CSV...")
-    export_to_csv(player_set)
+    with METRICS.stage('export'):
+        if args.incremental:
+            export_incremental(player_set, args.output)
+        else:
+            export_to_csv(player_set, args.output)
+
+    # Keep the checkpoint while tables are missing so the next run only scrapes those
+    # Giữ điểm lưu khi còn thiếu bảng để lần chạy sau chỉ thu thập các bảng đó
+    if failed_tables:
+        print(f"Missing tables {failed_tables}; run again to resume from {staging.directory}")
+    else:
+        staging.clear()
+
+# -----------------------------------------
+def main():
+    """Main function to orchestrate the scraping and exporting process.
+    The run report is written even when the scrape fails part-way.
+    Hàm chính để điều phối quá trình thu thập và xuất dữ liệu.
+    Báo cáo lần chạy vẫn được ghi kể cả khi quá trình thu thập lỗi giữa chừng."""
+    args = parse_args()
+    try:
+        with METRICS.stage('total'):
+            run_scrape(args)
+    finally:
+        METRICS.write('fbref', args.metrics_dir)
 
 # -----------------------------------------
 if __name__ == "__main__":
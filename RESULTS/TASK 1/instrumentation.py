@@ -0,0 +1,160 @@
+from contextlib import contextmanager
+import json
+import os
+import threading
+import time
+
+# -----------------------------------------
+# Default directory of the run reports and Prometheus files
+# Thư mục mặc định của các báo cáo lần chạy và file Prometheus
+DEFAULT_METRICS_DIR = 'scrape_metrics'
+
+# Help text of every counter, also used as the list of counters written to Prometheus
+# Mô tả của từng bộ đếm, cũng là danh sách bộ đếm được ghi ra Prometheus
+COUNTERS = {
+    'bytes_downloaded': 'Bytes of HTML downloaded',
+    'pages_downloaded': 'Pages downloaded from the network',
+    'cache_hits': 'Pages served from the HTML cache without a request',
+    'cache_revalidated': 'Cached pages confirmed unchanged by a 304 response',
+    'rows_parsed': 'Table rows parsed',
+    'rows_dropped': 'Table rows dropped because they could not be processed',
+    'rows_filtered': 'Table rows filtered out on purpose (e.g. 90 minutes or less)',
+    'retries': 'Download attempts retried after a transient error',
+    'pages_failed': 'Pages that failed after every retry'
+}
+
+# -----------------------------------------
+def _quantile(sorted_values, q):
+    index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _labels(labels):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+# -----------------------------------------
+class RunMetrics:
+    """Thread-safe timings and counters of one scrape run.
+    Stages are timed with `with METRICS.stage('parse', url):`; counters are increased with METRICS.count().
+    Thời gian và bộ đếm an toàn đa luồng của một lần thu thập.
+    Các giai đoạn được đo bằng `with METRICS.stage('parse', url):`; bộ đếm được tăng bằng METRICS.count()."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started_at = time.time()
+            self.stage_samples = {}
+            self.url_timings = {}
+            self.counters = {}
+
+    # -----------------------------------------
+    @contextmanager
+    def stage(self, name, url=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, url)
+
+    def record(self, name, seconds, url=None):
+        with self.lock:
+            self.stage_samples.setdefault(name, []).append(seconds)
+            if url is not None:
+                timings = self.url_timings.setdefault(url, {})
+                timings[name] = timings.get(name, 0.0) + seconds
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    # -----------------------------------------
+    def summary(self):
+        """Per-stage count, total, mean, p50, p95 and max in seconds.
+        Số lần, tổng, trung bình, p50, p95 và lớn nhất (giây) của từng giai đoạn."""
+        with self.lock:
+            samples = {name: sorted(values) for name, values in self.stage_samples.items()}
+        return {
+            name: {
+                'count': len(values),
+                'total': round(sum(values), 6),
+                'mean': round(sum(values) / len(values), 6),
+                'p50': round(_quantile(values, 0.5), 6),
+                'p95': round(_quantile(values, 0.95), 6),
+                'max': round(values[-1], 6)
+            }
+            for name, values in samples.items()
+        }
+
+    def write_report(self, path, scraper):
+        """Write the JSON run report: stages, per-URL timings and counters.
+        Ghi báo cáo lần chạy dạng JSON: các giai đoạn, thời gian theo URL và các bộ đếm."""
+        with self.lock:
+            counters = [dict(labels, name=name, value=value) for (name, labels), value in self.counters.items()]
+            url_timings = {url: {stage: round(seconds, 6) for stage, seconds in timings.items()}
+                           for url, timings in self.url_timings.items()}
+        report = {
+            'scraper': scraper,
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(self.started_at)),
+            'duration_seconds': round(time.time() - self.started_at, 3),
+            'stages': self.summary(),
+            'counters': counters,
+            'urls': url_timings
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    def write_prometheus(self, path, scraper):
+        """Write the metrics in the Prometheus text format (for the node_exporter textfile collector).
+        Ghi các chỉ số theo định dạng văn bản Prometheus (cho textfile collector của node_exporter)."""
+        lines = [
+            '# HELP scrape_run_duration_seconds Wall time of the scrape run',
+            '# TYPE scrape_run_duration_seconds gauge',
+            f'scrape_run_duration_seconds{_labels({"scraper": scraper})} {time.time() - self.started_at:.6f}',
+            '# HELP scrape_run_timestamp_seconds Start time of the scrape run',
+            '# TYPE scrape_run_timestamp_seconds gauge',
+            f'scrape_run_timestamp_seconds{_labels({"scraper": scraper})} {self.started_at:.3f}',
+            '# HELP scrape_stage_seconds Time spent in each scrape stage',
+            '# TYPE scrape_stage_seconds summary'
+        ]
+        for name, stats in self.summary().items():
+            labels = {'scraper': scraper, 'stage': name}
+            for key, quantile in (('p50', '0.5'), ('p95', '0.95')):
+                lines.append(f'scrape_stage_seconds{_labels(dict(labels, quantile=quantile))} {stats[key]}')
+            lines.append(f'scrape_stage_seconds_sum{_labels(labels)} {stats["total"]}')
+            lines.append(f'scrape_stage_seconds_count{_labels(labels)} {stats["count"]}')
+
+        with self.lock:
+            counters = dict(self.counters)
+        for name, help_text in COUNTERS.items():
+            lines.append(f'# HELP scrape_{name}_total {help_text}')
+            lines.append(f'# TYPE scrape_{name}_total counter')
+            for (counter_name, labels), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f'scrape_{name}_total{_labels(dict(labels, scraper=scraper))} {value}')
+
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, path)
+
+    def write(self, scraper, metrics_dir=DEFAULT_METRICS_DIR):
+        """Write <scraper>_<timestamp>.json and <scraper>.prom into metrics_dir and return their paths.
+        Ghi <scraper>_<timestamp>.json và <scraper>.prom vào metrics_dir và trả về đường dẫn của chúng."""
+        os.makedirs(metrics_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+        report_path = os.path.join(metrics_dir, f'{scraper}_{stamp}.json')
+        prometheus_path = os.path.join(metrics_dir, f'{scraper}.prom')
+        self.write_report(report_path, scraper)
+        self.write_prometheus(prometheus_path, scraper)
+        print(f"Run report written to {report_path} and {prometheus_path}")
+        return report_path, prometheus_path
+
+# -----------------------------------------
+# Metrics shared by every module of the process
+# Các chỉ số dùng chung cho mọi mô-đun trong tiến trình
+METRICS = RunMetrics()
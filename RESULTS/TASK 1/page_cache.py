@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import time
+
+from instrumentation import METRICS
+
+# -----------------------------------------
+# Default cache location and freshness window for downloaded pages
+# Vị trí bộ nhớ đệm mặc định và thời gian còn hiệu lực của các trang đã tải
+DEFAULT_CACHE_DIR = 'html_cache'
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+
+# -----------------------------------------
+class OfflineCacheMiss(LookupError):
+    """Raised in offline mode when a URL has never been cached.
+    Được phát sinh ở chế độ ngoại tuyến khi một URL chưa từng được lưu đệm."""
+
+# -----------------------------------------
+class PageCache:
+    """Content-addressed on-disk cache of raw page HTML keyed by URL.
+    Bộ nhớ đệm HTML trên đĩa, lưu theo nội dung và tra cứu theo URL.
+
+    Layout / Cấu trúc:
+        <cache_dir>/index/<sha256(url)>.json      URL, content hash, fetch time, ETag, Last-Modified
+        <cache_dir>/objects/<hh>/<sha256(html)>.html   raw HTML, stored once per distinct content
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL_SECONDS, offline=False):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.offline = offline
+        self.index_dir = os.path.join(cache_dir, 'index')
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        os.makedirs(self.index_dir, exist_ok=True)
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    # -----------------------------------------
+    def _index_path(self, url):
+        url_hash = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.index_dir, f'{url_hash}.json')
+
+    def _object_path(self, content_hash):
+        return os.path.join(self.objects_dir, content_hash[:2], f'{content_hash}.html')
+
+    @staticmethod
+    def _write_atomic(path, text):
+        # Write to a temporary file first so readers never see a partial file
+        # Ghi ra file tạm trước để không ai đọc phải file ghi dở
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    # -----------------------------------------
+    def lookup(self, url):
+        """Return the cache entry of a URL, or None if it was never cached.
+        Trả về mục đệm của một URL, hoặc None nếu chưa từng được lưu."""
+        try:
+            with open(self._index_path(url), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not os.path.exists(self._object_path(entry['content_hash'])):
+            return None
+        return entry
+
+    def read(self, entry):
+        """Read the HTML stored for a cache entry.
+        Đọc HTML được lưu cho một mục đệm."""
+        with open(self._object_path(entry['content_hash']), encoding='utf-8') as f:
+            return f.read()
+
+    def store(self, url, html, headers=None):
+        """Store the HTML of a URL together with its ETag/Last-Modified validators.
+        Lưu HTML của một URL cùng với các giá trị kiểm tra ETag/Last-Modified."""
+        headers = headers or {}
+        content_hash = hashlib.sha256(html.encode('utf-8')).hexdigest()
+        object_path = self._object_path(content_hash)
+        if not os.path.exists(object_path):
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            self._write_atomic(object_path, html)
+
+        entry = {
+            'url': url,
+            'content_hash': content_hash,
+            'fetched_at': time.time(),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified')
+        }
+        self._write_atomic(self._index_path(url), json.dumps(entry, indent=2))
+        return entry
+
+    def touch(self, entry):
+        """Mark a cached entry as fresh again after a successful revalidation.
+        Đánh dấu một mục đệm còn mới sau khi kiểm tra lại thành công."""
+        entry['fetched_at'] = time.time()
+        self._write_atomic(self._index_path(entry['url']), json.dumps(entry, indent=2))
+
+    def is_fresh(self, entry):
+        """Check whether a cache entry is younger than the TTL.
+        Kiểm tra một mục đệm có còn trong thời gian TTL hay không."""
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        """Build If-None-Match/If-Modified-Since request headers from a cache entry.
+        Tạo các header If-None-Match/If-Modified-Since từ một mục đệm."""
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    # -----------------------------------------
+    def fetch(self, url, loader):
+        """Return the HTML of a URL from the cache, revalidating or downloading it when needed.
+        Trả về HTML của một URL từ bộ nhớ đệm, kiểm tra lại hoặc tải mới khi cần.
+
+        loader(url, request_headers) must return (status_code, html, response_headers).
+        A 304 status keeps the cached copy; any other status stores the returned HTML.
+        loader(url, request_headers) phải trả về (status_code, html, response_headers).
+        Mã 304 giữ bản đã lưu; các mã khác sẽ lưu HTML được trả về.
+        """
+        entry = self.lookup(url)
+
+        if self.offline:
+            if entry is None:
+                raise OfflineCacheMiss(f"No cached copy of {url}")
+            METRICS.count('cache_hits')
+            return self.read(entry)
+
+        if entry is not None and self.is_fresh(entry):
+            METRICS.count('cache_hits')
+            return self.read(entry)
+
+        request_headers = self.conditional_headers(entry) if entry is not None else {}
+        status_code, html, response_headers = loader(url, request_headers)
+
+        if status_code == 304 and entry is not None:
+            METRICS.count('cache_revalidated')
+            self.touch(entry)
+            return self.read(entry)
+
+        self.store(url, html, response_headers)
+        return html
@@ -0,0 +1,165 @@
+from urllib.parse import urlparse
+import random
+import threading
+import time
+
+import requests
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from instrumentation import METRICS
+
+# -----------------------------------------
+# Starting and maximum request rates (requests per second) of each host.
+# The rate is halved when a host pushes back and grows slowly again while requests succeed.
+# Tốc độ yêu cầu ban đầu và tối đa (yêu cầu mỗi giây) của từng máy chủ.
+# Tốc độ giảm một nửa khi máy chủ từ chối và tăng dần trở lại khi các yêu cầu thành công.
+HOST_RATES = {
+    'fbref.com': {'rate': 0.15, 'max_rate': 0.3, 'burst': 2},
+    'www.footballtransfers.com': {'rate': 1.0, 'max_rate': 5.0, 'burst': 4}
+}
+DEFAULT_HOST_RATE = {'rate': 1.0, 'max_rate': 4.0, 'burst': 2}
+MIN_RATE = 0.02
+
+# HTTP status codes worth retrying: rate limiting and temporary server errors
+# Các mã HTTP nên thử lại: bị giới hạn tốc độ và lỗi máy chủ tạm thời
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+THROTTLE_STATUS = {429, 503}
+
+MAX_ATTEMPTS = 4
+BASE_DELAY = 2.0
+MAX_DELAY = 60.0
+
+# -----------------------------------------
+class TokenBucket:
+    """Thread-safe token bucket whose rate adapts to the host (additive increase, multiplicative decrease).
+    Callers reserve a token and sleep until it becomes available, so waiting threads never spin.
+    Thùng token an toàn đa luồng, tốc độ tự điều chỉnh theo máy chủ (tăng cộng, giảm nhân).
+    Mỗi lời gọi đặt trước một token và ngủ tới khi token sẵn sàng, nên các luồng chờ không chạy vòng lặp rỗng."""
+
+    def __init__(self, rate, max_rate, burst=1):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.step = max_rate / 20
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        with self.lock:
+            self._refill()
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            time.sleep(wait)
+
+    def reward(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.step)
+
+    def penalize(self, retry_after=None):
+        with self.lock:
+            self._refill()
+            self.rate = max(MIN_RATE, self.rate / 2)
+            # Honour Retry-After by pushing the next free token that far into the future
+            # Tuân thủ Retry-After bằng cách dời token rảnh tiếp theo ra sau khoảng thời gian đó
+            if retry_after:
+                self.tokens = min(self.tokens, -retry_after * self.rate)
+
+# -----------------------------------------
+class HostRateLimiter:
+    """One adaptive token bucket per host, shared by every scraper of the process.
+    Mỗi máy chủ có một thùng token tự điều chỉnh, dùng chung cho mọi chương trình thu thập trong tiến trình."""
+
+    def __init__(self, host_rates=None):
+        self.host_rates = HOST_RATES if host_rates is None else host_rates
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(**self.host_rates.get(host, DEFAULT_HOST_RATE))
+            return self.buckets[host]
+
+    def acquire(self, url):
+        self.bucket(url).acquire()
+
+    def on_success(self, url):
+        self.bucket(url).reward()
+
+    def on_throttle(self, url, retry_after=None):
+        self.bucket(url).penalize(retry_after)
+
+# -----------------------------------------
+def response_status(error):
+    """HTTP status code carried by a requests error, or None.
+    Mã trạng thái HTTP của một lỗi requests, hoặc None."""
+    response = getattr(error, 'response', None)
+    return None if response is None else response.status_code
+
+def retry_after_seconds(error):
+    """Retry-After header of a failed response in seconds, or None when absent or given as a date.
+    Header Retry-After của phản hồi lỗi tính bằng giây, hoặc None nếu không có hoặc ở dạng ngày tháng."""
+    response = getattr(error, 'response', None)
+    try:
+        return float(response.headers['Retry-After'])
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+def is_retryable(error):
+    """Timeouts, dropped connections, browser errors and 429/5xx responses are worth another attempt.
+    Hết thời gian chờ, mất kết nối, lỗi trình duyệt và phản hồi 429/5xx đáng để thử lại."""
+    if isinstance(error, requests.HTTPError):
+        return response_status(error) in RETRYABLE_STATUS
+    return isinstance(error, (requests.Timeout, requests.ConnectionError, TimeoutException, WebDriverException))
+
+# -----------------------------------------
+class RetryPolicy:
+    """Bounded retries with exponential backoff and full jitter, paced by a shared HostRateLimiter.
+    Thử lại có giới hạn với thời gian chờ tăng theo hàm mũ và ngẫu nhiên hoàn toàn, theo nhịp của một HostRateLimiter dùng chung."""
+
+    def __init__(self, limiter=None, max_attempts=MAX_ATTEMPTS, base_delay=BASE_DELAY, max_delay=MAX_DELAY):
+        self.limiter = DEFAULT_LIMITER if limiter is None else limiter
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, url, request):
+        """Run request() for a URL, waiting for the host's rate limit and retrying transient errors.
+        The last error is raised once the attempts are used up or the error is not transient.
+        Chạy request() cho một URL, chờ theo giới hạn tốc độ của máy chủ và thử lại các lỗi tạm thời.
+        Lỗi cuối cùng được phát sinh khi hết số lần thử hoặc lỗi không phải tạm thời."""
+        for attempt in range(self.max_attempts):
+            with METRICS.stage('rate_limit_wait', url):
+                self.limiter.acquire(url)
+            try:
+                result = request()
+            except Exception as e:
+                if not is_retryable(e) or attempt == self.max_attempts - 1:
+                    raise
+                METRICS.count('retries', host=urlparse(url).netloc)
+                retry_after = retry_after_seconds(e)
+                if response_status(e) in THROTTLE_STATUS or isinstance(e, requests.Timeout):
+                    self.limiter.on_throttle(url, retry_after)
+                wait = max(self.delay(attempt), retry_after or 0)
+                print(f"Attempt {attempt + 1} for {url} failed ({e}), retrying in {wait:.1f}s")
+                with METRICS.stage('retry_backoff', url):
+                    time.sleep(wait)
+            else:
+                self.limiter.on_success(url)
+                return result
+
+# -----------------------------------------
+# Limiter shared by all scrapers of the process, so concurrent jobs on one host share its budget
+# Bộ giới hạn dùng chung cho mọi chương trình thu thập trong tiến trình, để các công việc cùng máy chủ chia sẻ hạn mức
+DEFAULT_LIMITER = HostRateLimiter()
@@ -0,0 +1,348 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import zip_longest
+from urllib.parse import urlparse
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+
+from assignment_01_task_01 import (
+    COMPETITIONS, TABLE_LINKS, PageFetcher, ResourcePool, build_player_set, build_player_table,
+    build_table_links, export_to_parquet, extract_table_html
+)
+from page_cache import DEFAULT_CACHE_DIR, DEFAULT_TTL_SECONDS, PageCache
+from rate_limiter import RetryPolicy
+from instrumentation import DEFAULT_METRICS_DIR, METRICS
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'TASK 4'))
+import footballtransfers_scraper  # noqa: E402
+
+# -----------------------------------------
+# footballtransfers.com league names for the fbref competition ids
+# Tên giải đấu trên footballtransfers.com tương ứng với mã giải đấu của fbref
+FOOTBALLTRANSFERS_LEAGUES = {
+    9: 'uk-premier-league',
+    12: 'es-laliga',
+    11: 'it-serie-a',
+    20: 'de-bundesliga',
+    13: 'fr-ligue-1'
+}
+
+# -----------------------------------------
+# Maximum number of simultaneous downloads per host
+# Số lượt tải đồng thời tối đa cho mỗi máy chủ
+HOST_CONCURRENCY = {
+    'fbref.com': 2,
+    'www.footballtransfers.com': 4
+}
+DEFAULT_HOST_CONCURRENCY = 2
+
+CURRENT_SEASON = 'current'
+OUTPUT_DIR = 'scraped_data'
+STATE_FILE = 'scrape_state.json'
+
+# -----------------------------------------
+# One unit of work: a single table (fbref) or page (footballtransfers) of one competition and season
+# Một đơn vị công việc: một bảng (fbref) hoặc một trang (footballtransfers) của một giải đấu và mùa giải
+ScrapeJob = namedtuple('ScrapeJob', ['site', 'competition', 'season', 'table'])
+
+# -----------------------------------------
+def job_id(job):
+    """Unique, human-readable identifier of a job, used as key of the saved state.
+    Mã định danh duy nhất, dễ đọc của một công việc, dùng làm khóa trong trạng thái đã lưu."""
+    return '/'.join(str(part) for part in job)
+
+# -----------------------------------------
+def partition_dir(output_dir, site, competition, season):
+    """Output directory of one (site, competition, season) partition.
+    Thư mục kết quả của một phân vùng (trang, giải đấu, mùa giải)."""
+    return os.path.join(output_dir, site, f'competition={competition}', f'season={season}')
+
+# -----------------------------------------
+def build_jobs(sites, competitions, seasons):
+    """Create the jobs of every requested site, competition and season.
+    footballtransfers.com only publishes current values, so it only gets jobs for the current season.
+    Each league starts with its page 1 job only; the scheduler adds the other pages once it has read
+    the pager of page 1 (see ScrapeScheduler.expand_pages).
+    Tạo các công việc cho mọi trang, giải đấu và mùa giải được yêu cầu.
+    footballtransfers.com chỉ có giá trị hiện tại nên chỉ có công việc cho mùa giải hiện tại.
+    Mỗi giải đấu chỉ bắt đầu với công việc trang 1; bộ lập lịch thêm các trang còn lại sau khi
+    đọc thanh phân trang của trang 1 (xem ScrapeScheduler.expand_pages)."""
+    jobs = []
+    for competition in competitions:
+        for season in seasons:
+            if 'fbref' in sites:
+                jobs.extend(ScrapeJob('fbref', competition, season, table_name) for table_name in TABLE_LINKS)
+            if 'footballtransfers' in sites and season == CURRENT_SEASON:
+                jobs.append(ScrapeJob('footballtransfers', competition, season, 1))
+    return jobs
+
+# -----------------------------------------
+class ScrapeScheduler:
+    """Runs scrape jobs in parallel, respects per-host concurrency limits and persists job state.
+    An interrupted run started again with the same state file skips the jobs that already finished.
+    Chạy song song các công việc thu thập, tuân thủ giới hạn đồng thời theo máy chủ và lưu trạng thái công việc.
+    Một lần chạy bị gián đoạn khi chạy lại với cùng file trạng thái sẽ bỏ qua các công việc đã xong."""
+
+    def __init__(self, output_dir=OUTPUT_DIR, state_file=STATE_FILE, workers=8, cache=None, backend='http'):
+        self.output_dir = output_dir
+        self.state_file = state_file
+        self.workers = workers
+        self.cache = cache
+        self.retry = RetryPolicy()
+        self.fetcher = PageFetcher(cache, backend, self.retry)
+        self.browsers = ResourcePool(footballtransfers_scraper.initialize_browser, lambda browser: browser.quit())
+        self.host_slots = {}
+        self.lock = threading.Lock()
+        self.state = self.load_state()
+
+    # -----------------------------------------
+    def load_state(self):
+        if os.path.exists(self.state_file):
+            with open(self.state_file, encoding='utf-8') as f:
+                return json.load(f)
+        return {}
+
+    def save_state(self):
+        # Called with self.lock held; write to a temporary file so the state is never half-written
+        # Được gọi khi đang giữ self.lock; ghi ra file tạm để trạng thái không bao giờ bị ghi dở
+        tmp_file = f'{self.state_file}.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_file, self.state_file)
+
+    def record(self, job, **fields):
+        with self.lock:
+            entry = self.state.setdefault(job_id(job), {'attempts': 0})
+            entry.update(fields, updated_at=time.strftime('%Y-%m-%dT%H:%M:%S'))
+            self.save_state()
+
+    def is_done(self, job):
+        entry = self.state.get(job_id(job))
+        return bool(entry) and entry.get('status') == 'done' and os.path.exists(entry.get('output', ''))
+
+    def host_slot(self, url):
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.Semaphore(HOST_CONCURRENCY.get(host, DEFAULT_HOST_CONCURRENCY))
+            return self.host_slots[host]
+
+    # -----------------------------------------
+    def job_url(self, job):
+        if job.site == 'fbref':
+            season = None if job.season == CURRENT_SEASON else job.season
+            return build_table_links(job.competition, season)[job.table][0]
+        league = FOOTBALLTRANSFERS_LEAGUES[job.competition]
+        return footballtransfers_scraper.build_page_url(league, job.table)
+
+    def job_output(self, job):
+        directory = partition_dir(self.output_dir, job.site, job.competition, job.season)
+        if job.site == 'fbref':
+            return os.path.join(directory, 'tables', f'{TABLE_LINKS[job.table][1]}.html')
+        return os.path.join(directory, 'pages', f'page_{job.table:03d}.csv')
+
+    def load_footballtransfers_page(self, url, request_headers):
+        def load():
+            with self.browsers.borrow() as browser:
+                return footballtransfers_scraper.load_page_with_browser(browser, url)
+        return 200, self.retry.call(url, load), {}
+
+    def download(self, job):
+        """Download the page of one job while holding a slot of its host.
+        Tải trang của một công việc trong khi giữ một lượt của máy chủ."""
+        url = self.job_url(job)
+        with self.host_slot(url):
+            if job.site == 'fbref':
+                return self.fetcher.fetch(url, TABLE_LINKS[job.table][1])
+            if self.cache is not None:
+                return self.cache.fetch(url, self.load_footballtransfers_page)
+            return self.load_footballtransfers_page(url, {})[1]
+
+    def run_job(self, job):
+        """Download and stage one job; only the download holds a slot of the host.
+        Tải và lưu tạm một công việc; chỉ bước tải mới chiếm một lượt của máy chủ."""
+        return self.stage(job, self.download(job))
+
+    def stage(self, job, html):
+        url = self.job_url(job)
+        output = self.job_output(job)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        if job.site == 'fbref':
+            table_html = extract_table_html(html, TABLE_LINKS[job.table][1])
+            if table_html is None:
+                raise ValueError(f"table '{TABLE_LINKS[job.table][1]}' not found on {url}")
+            with open(output, 'w', encoding='utf-8') as f:
+                f.write(table_html)
+        else:
+            rows = footballtransfers_scraper.parse_page_html(html, url)
+            pd.DataFrame(rows, columns=['player', 'club', 'market_value', 'rating']).to_csv(output, index=False)
+        return output
+
+    # -----------------------------------------
+    def last_page(self, job):
+        """Last page of the league of a footballtransfers page 1 job, read from the pager of page 1.
+        Page 1 is staged at the same time and the last page is kept in the state, so a resumed run
+        does not download it again. None when the page has no pager.
+        Trang cuối của giải đấu ứng với công việc trang 1 của footballtransfers, đọc từ thanh phân trang.
+        Trang 1 được lưu tạm cùng lúc và trang cuối được giữ trong trạng thái, nên lần chạy lại
+        không phải tải lại trang này. None nếu trang không có thanh phân trang."""
+        entry = self.state.get(job_id(job), {})
+        if self.is_done(job) and 'last_page' in entry:
+            return entry['last_page']
+        attempts = entry.get('attempts', 0) + 1
+        try:
+            html = self.download(job)
+            output = self.stage(job, html)
+        except Exception as e:
+            self.record(job, status='failed', attempts=attempts, error=str(e))
+            raise
+        last_page = footballtransfers_scraper.find_last_page(html, FOOTBALLTRANSFERS_LEAGUES[job.competition])
+        self.record(job, status='done', output=output, attempts=attempts, error=None, last_page=last_page)
+        return last_page
+
+    def expand_pages(self, jobs, max_pages=footballtransfers_scraper.DEFAULT_MAX_PAGES):
+        """Add the jobs of pages 2 to the last page of every footballtransfers league, at most max_pages.
+        Leagues have different page counts, and a page past the last one has no player table,
+        so its download would fail after every retry and the league would never be finalized.
+        Without a pager, max_pages is used as before. Returns (jobs, page 1 jobs that failed).
+        Thêm các công việc từ trang 2 tới trang cuối của mọi giải đấu footballtransfers, tối đa max_pages.
+        Các giải đấu có số trang khác nhau, và trang sau trang cuối không có bảng cầu thủ,
+        nên việc tải nó sẽ lỗi sau mọi lần thử lại và giải đấu không bao giờ được hoàn tất.
+        Nếu không có thanh phân trang, max_pages được dùng như trước. Trả về (công việc, các công việc trang 1 bị lỗi)."""
+        expanded, failed = [], []
+        for job in jobs:
+            expanded.append(job)
+            if job.site != 'footballtransfers' or job.table != 1:
+                continue
+            try:
+                last_page = self.last_page(job)
+            except Exception as e:
+                # The partition stays incomplete until page 1 can be read
+                # Phân vùng chưa hoàn tất cho tới khi đọc được trang 1
+                print(f"Job {job_id(job)} failed: {e}")
+                failed.append(job)
+                continue
+            limit = max_pages if last_page is None else min(last_page, max_pages)
+            print(f"footballtransfers / {job.competition}: "
+                  f"{limit} pages ({'last page ' + str(last_page) if last_page else 'no pager, using --max-pages'})")
+            expanded.extend(job._replace(table=page_num) for page_num in range(2, limit + 1))
+        return expanded, failed
+
+    # -----------------------------------------
+    def finalize_partition(self, site, competition, season, jobs):
+        """Merge the staged outputs of a finished partition into its result files.
+        Gộp các kết quả tạm của một phân vùng đã xong thành các file kết quả."""
+        directory = partition_dir(self.output_dir, site, competition, season)
+        if site == 'fbref':
+            page_sources = {}
+            for job in jobs:
+                with open(self.job_output(job), encoding='utf-8') as f:
+                    page_sources[job.table] = f.read()
+            player_set = build_player_set(page_sources)
+            df = build_player_table(player_set)
+            output_file = os.path.join(directory, 'results.csv')
+            df.to_csv(output_file, index=False, encoding='utf-8')
+            export_to_parquet(df, output_file)
+        else:
+            pages = [pd.read_csv(self.job_output(job)) for job in sorted(jobs, key=lambda job: job.table)]
+            df = pd.concat(pages, ignore_index=True).drop_duplicates(subset=['player', 'club'])
+            output_file = os.path.join(directory, 'player_data.csv')
+            df.to_csv(output_file, index=False)
+        print(f"Partition {site} / {competition} / {season}: {len(df)} players -> {output_file}")
+        return output_file
+
+    # -----------------------------------------
+    def run(self, jobs, max_pages=footballtransfers_scraper.DEFAULT_MAX_PAGES):
+        """Run every unfinished job, then finalize the partitions whose jobs are all done.
+        Chạy mọi công việc chưa xong, sau đó hoàn tất các phân vùng có tất cả công việc đã xong."""
+        try:
+            jobs, failed = self.expand_pages(jobs, max_pages)
+            pending = [job for job in jobs if not self.is_done(job) and job not in failed]
+            print(f"{len(jobs) - len(pending)} of {len(jobs)} jobs already done, {len(pending)} to run")
+
+            # Interleave the hosts so that workers are not all waiting on the limit of a single host
+            # Xen kẽ các máy chủ để các luồng không cùng chờ giới hạn của một máy chủ
+            by_host = {}
+            for job in pending:
+                by_host.setdefault(urlparse(self.job_url(job)).netloc, []).append(job)
+            ordered = [job for group in zip_longest(*by_host.values()) for job in group if job is not None]
+
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {executor.submit(self.run_job, job): job for job in ordered}
+                for future in as_completed(futures):
+                    job = futures[future]
+                    attempts = self.state.get(job_id(job), {}).get('attempts', 0) + 1
+                    try:
+                        output = future.result()
+                        self.record(job, status='done', output=output, attempts=attempts, error=None)
+                    except Exception as e:
+                        print(f"Job {job_id(job)} failed: {e}")
+                        self.record(job, status='failed', attempts=attempts, error=str(e))
+                        failed.append(job)
+        finally:
+            self.fetcher.close()
+            self.browsers.close_all()
+
+        partitions = {}
+        for job in jobs:
+            partitions.setdefault((job.site, job.competition, job.season), []).append(job)
+        for (site, competition, season), partition_jobs in partitions.items():
+            if all(self.is_done(job) for job in partition_jobs):
+                self.finalize_partition(site, competition, season, partition_jobs)
+            else:
+                print(f"Partition {site} / {competition} / {season} is incomplete, run again to resume")
+
+        return failed
+
+# -----------------------------------------
+def parse_args():
+    """Parse command-line options of the scheduler.
+    Phân tích các tùy chọn dòng lệnh của bộ lập lịch."""
+    parser = argparse.ArgumentParser(description='Scrape several competitions and seasons in parallel')
+    parser.add_argument('--sites', nargs='+', choices=['fbref', 'footballtransfers'],
+                        default=['fbref', 'footballtransfers'])
+    parser.add_argument('--competitions', nargs='+', type=int, choices=sorted(COMPETITIONS),
+                        default=sorted(COMPETITIONS), help='fbref competition ids (default: top five leagues)')
+    parser.add_argument('--seasons', nargs='+', default=[CURRENT_SEASON],
+                        help=f"seasons such as 2023-2024, or '{CURRENT_SEASON}' (default: %(default)s)")
+    parser.add_argument('--max-pages', type=int, default=footballtransfers_scraper.DEFAULT_MAX_PAGES,
+                        help='at most this many footballtransfers pages per league; the last page '
+                             'is read from the pager of page 1 (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=8, help='parallel workers (default: %(default)s)')
+    parser.add_argument('--backend', choices=['http', 'selenium'], default='http')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--state-file', default=STATE_FILE)
+    parser.add_argument('--metrics-dir', default=DEFAULT_METRICS_DIR)
+    parser.add_argument('--offline', action='store_true', help='replay pages from the HTML cache only')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--cache-ttl', type=float, default=DEFAULT_TTL_SECONDS / 3600,
+                        help='hours before a cached page is fetched again (default: %(default)s)')
+    return parser.parse_args()
+
+# -----------------------------------------
+def main():
+    """Build the jobs from the command line and run them.
+    Tạo các công việc từ dòng lệnh và chạy chúng."""
+    args = parse_args()
+    cache = PageCache(args.cache_dir, ttl=args.cache_ttl * 3600, offline=args.offline)
+    jobs = build_jobs(args.sites, args.competitions, args.seasons)
+    scheduler = ScrapeScheduler(args.output_dir, args.state_file, args.workers, cache, args.backend)
+    try:
+        with METRICS.stage('total'):
+            failed = scheduler.run(jobs, args.max_pages)
+    finally:
+        METRICS.write('scheduler', args.metrics_dir)
+    if failed:
+        print(f"{len(failed)} jobs failed permanently after retries (details in {args.state_file}):")
+        for job in failed:
+            print(f"  {job_id(job)}")
+
+# -----------------------------------------
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import time
+
+# -----------------------------------------
+# Default location of the staging areas of interrupted scrapes
+# Vị trí mặc định của vùng lưu tạm cho các lần thu thập bị gián đoạn
+DEFAULT_STAGING_DIR = 'scrape_staging'
+
+# -----------------------------------------
+class StagingArea:
+    """Append-only staging file of scraped rows plus a manifest of the finished pages or tables.
+    Rows of one key are appended and flushed to disk before the key is marked finished in the manifest,
+    so after a crash only finished keys are visible and a restarted run scrapes the rest.
+    Vùng lưu tạm chỉ ghi nối các hàng đã thu thập cùng một bản kê các trang hoặc bảng đã xong.
+    Các hàng của một khóa được ghi nối và đẩy xuống đĩa trước khi khóa được đánh dấu xong trong bản kê,
+    nên sau sự cố chỉ các khóa đã xong được nhìn thấy và lần chạy lại sẽ thu thập phần còn lại.
+
+    Layout / Cấu trúc:
+        <directory>/rows.jsonl      one JSON object per row, grouped by key
+        <directory>/manifest.json   committed file size and byte range of every finished key
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.rows_path = os.path.join(directory, 'rows.jsonl')
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self._load_manifest()
+
+        # Drop rows written after the last checkpoint (a key that was interrupted mid-way)
+        # Bỏ các hàng được ghi sau điểm lưu cuối cùng (một khóa bị gián đoạn giữa chừng)
+        with open(self.rows_path, 'ab') as f:
+            f.truncate(self.manifest['size'])
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'size': 0, 'completed': {}}
+
+    def _save_manifest(self):
+        tmp_path = f'{self.manifest_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+    # -----------------------------------------
+    @property
+    def completed(self):
+        """Keys already checkpointed, in the order they finished.
+        Các khóa đã được lưu điểm, theo thứ tự hoàn thành."""
+        return list(self.manifest['completed'])
+
+    def is_done(self, key):
+        return key in self.manifest['completed']
+
+    def commit(self, key, rows):
+        """Append the rows of one page or table and checkpoint it.
+        Ghi nối các hàng của một trang hoặc bảng và lưu điểm cho nó."""
+        with open(self.rows_path, 'ab') as f:
+            start = f.tell()
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False).encode('utf-8') + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+            end = f.tell()
+
+        self.manifest['completed'][key] = {
+            'start': start, 'end': end, 'rows': len(rows), 'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        self.manifest['size'] = end
+        self._save_manifest()
+
+    def iter_rows(self, key):
+        """Stream the staged rows of one key from disk.
+        Đọc dần các hàng đã lưu tạm của một khóa từ đĩa."""
+        entry = self.manifest['completed'][key]
+        with open(self.rows_path, 'rb') as f:
+            f.seek(entry['start'])
+            while f.tell() < entry['end']:
+                yield json.loads(f.readline())
+
+    def clear(self):
+        """Remove the staging area once its rows have been exported.
+        Xóa vùng lưu tạm sau khi các hàng đã được xuất."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.manifest = {'size': 0, 'completed': {}}
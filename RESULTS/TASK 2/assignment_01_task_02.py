@@ -1,20 +1,43 @@
 import pandas as pd
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # Chỉ lưu file PNG, không cần giao diện; an toàn khi vẽ trong nhiều tiến trình
 import matplotlib.pyplot as plt
 import seaborn as sns
 import os
+import json
+import math
+import hashlib
+import argparse
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from matplotlib import rcParams
-import matplotlib.colors as mcolors
 
 # ====================
 # 1. CÀI ĐẶT GIAO DIỆN ĐỒ HỌA
 # ====================
-rcParams['font.family'] = 'sans-serif'
-rcParams['font.sans-serif'] = ['Roboto', 'Arial']
-rcParams['axes.linewidth'] = 1.2
-rcParams['axes.edgecolor'] = '#333333'
-rcParams['grid.color'] = '#D3D3D3'
-rcParams['grid.alpha'] = 0.5
+# Mọi thiết lập ảnh hưởng tới hình vẽ; thay đổi bất kỳ giá trị nào sẽ vẽ lại toàn bộ biểu đồ
+PLOT_STYLE = {
+    'version': 1,
+    'golden_ratio': 1.618,
+    'fig_width': 16,
+    'dpi': 300,
+    # Trên ngưỡng này (số cầu thủ của đội đông nhất), swarmplot được thay bằng violin dựng từ histogram
+    'swarm_max_points': 300,
+    'density_bins': 60,
+    'rc': {
+        'font.family': 'sans-serif',
+        'font.sans-serif': ['Roboto', 'Arial'],
+        'axes.linewidth': 1.2,
+        'axes.edgecolor': '#333333',
+        'grid.color': '#D3D3D3',
+        'grid.alpha': 0.5
+    }
+}
+PLOT_DIR = 'team_distribution_plots'
+PLOT_HASHES_FILE = 'plot_hashes.json'
+
+rcParams.update(PLOT_STYLE['rc'])
 
 available_styles = plt.style.available
 if 'seaborn-v0_8-darkgrid' in available_styles:
@@ -49,36 +72,351 @@ TEAM_PALETTE = {
 }
 
 # ====================
-# 2. HÀM VẼ BIỂU ĐỒ NÂNG CAO
+# 2. BẢNG TỔNG HỢP THỐNG KÊ THEO ĐỘI (TÍNH MỘT LẦN, DÙNG CHO MỌI BÁO CÁO VÀ BIỂU ĐỒ)
 # ====================
-def plot_enhanced_distribution(metric):
-    golden_ratio = 1.618
-    fig_width = 16
-    fig_height = fig_width / golden_ratio
-    plt.figure(figsize=(fig_width, fig_height), dpi=300)
-    
-    team_order = df.groupby('Team')[metric].mean().sort_values(ascending=False).index
-    
-    gradient_palette = {
-        team: mcolors.LinearSegmentedColormap.from_list(
-            f"{team}_gradient", ["#FFFFFF", color, color]
-        ) for team, color in TEAM_PALETTE.items()
-    }
-    
-    ax = sns.violinplot(data=df, x='Team', y=metric, order=team_order,
-                       palette=TEAM_PALETTE, inner=None, linewidth=1.5,
-                       saturation=0.8, alpha=0.9)
-    
-    sns.swarmplot(data=df, x='Team', y=metric, order=team_order,
-                 color='black', alpha=0.6, size=3, ax=ax)
+def _grouped_stats(values, codes, n_groups):
+    # values: ma trận (số cầu thủ x số chỉ số), codes: mã nhóm của từng hàng (0..n_groups-1)
+    # Sắp xếp các hàng theo nhóm một lần, sau đó mọi thống kê được tính bằng reduceat trên từng đoạn liên tiếp
+    order = np.argsort(codes, kind='stable')
+    codes_sorted = codes[order]
+    values_sorted = values[order]
+    starts = np.searchsorted(codes_sorted, np.arange(n_groups))
+    row_group = np.repeat(np.arange(n_groups), np.diff(np.append(starts, len(codes_sorted))))
+    
+    valid = ~np.isnan(values_sorted)
+    filled = np.where(valid, values_sorted, 0.0)
+    count = np.add.reduceat(valid.astype('float64'), starts, axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.add.reduceat(filled, starts, axis=0) / count
+        # Độ lệch chuẩn mẫu (ddof=1) tính theo hai lượt để tránh sai số của công thức tổng bình phương
+        deviation = np.where(valid, values_sorted - mean[row_group], 0.0)
+        std = np.sqrt(np.add.reduceat(deviation ** 2, starts, axis=0) / (count - 1))
+    std[count < 2] = np.nan
+    
+    # Trung vị: sắp xếp từng cột theo (nhóm, giá trị); NaN nằm cuối mỗi nhóm nên
+    # phần tử giữa của các giá trị hợp lệ được lấy trực tiếp bằng chỉ số
+    by_value = np.argsort(values_sorted, axis=0, kind='stable')
+    by_group = np.argsort(codes_sorted[by_value], axis=0, kind='stable')
+    ordered = np.take_along_axis(values_sorted, np.take_along_axis(by_value, by_group, axis=0), axis=0)
+    n_valid = count.astype(int)
+    lower = starts[:, None] + np.maximum(n_valid - 1, 0) // 2
+    upper = starts[:, None] + n_valid // 2
+    upper = np.minimum(upper, len(codes_sorted) - 1)
+    columns = np.arange(values.shape[1])
+    median = (ordered[lower, columns] + ordered[upper, columns]) / 2
+    median[n_valid == 0] = np.nan
+    
+    return {'count': count, 'mean': mean, 'median': median, 'std': std}
+
+def compute_team_cube(df_numeric, metrics):
+    # Tính trung bình, trung vị, độ lệch chuẩn và số lượng của mọi chỉ số cho từng đội và toàn giải
+    # trong một lượt trên ma trận NumPy; kết quả được giữ lại để phục vụ mọi báo cáo và biểu đồ
+    data = df_numeric[df_numeric['Team'].notna()]
+    codes, teams = pd.factorize(data['Team'], sort=True)
+    values = data[metrics].to_numpy(dtype='float64', na_value=np.nan)
+    
+    team_stats = _grouped_stats(values, codes, len(teams))
+    overall_stats = _grouped_stats(values, np.zeros(len(values), dtype=codes.dtype), 1)
+    
+    cube = {'teams': pd.Index(teams, name='Team'), 'metrics': list(metrics)}
+    for stat, matrix in team_stats.items():
+        cube[stat] = pd.DataFrame(matrix, index=cube['teams'], columns=metrics)
+    cube['overall'] = pd.DataFrame({stat: matrix[0] for stat, matrix in overall_stats.items()}, index=metrics)
+    return cube
+
+# Khoảng tin cậy bootstrap: số lần lấy mẫu lại, mức tin cậy và số phần tử tối đa của một khối mẫu
+BOOTSTRAP_RESAMPLES = 2000
+BOOTSTRAP_CONFIDENCE = 0.95
+BOOTSTRAP_BLOCK_ELEMENTS = 20_000_000
+
+def _bootstrap_intervals(values, codes, n_groups, n_resamples, confidence, rng):
+    # Bootstrap phân tầng theo nhóm: một ma trận chỉ số (B, n) lấy mẫu lại mọi đội cùng lúc,
+    # mỗi vị trí chỉ rút từ các cầu thủ của chính đội đó, và áp dụng cho mọi chỉ số một lần
+    order = np.argsort(codes, kind='stable')
+    codes_sorted = codes[order]
+    starts = np.searchsorted(codes_sorted, np.arange(n_groups))
+    sizes = np.diff(np.append(starts, len(codes_sorted)))
+    row_start = np.repeat(starts, sizes)
+    row_size = np.repeat(sizes, sizes)
+    
+    # Sắp xếp sẵn từng cột trong đoạn của mỗi đội (NaN ở cuối đoạn). Khi ma trận chỉ số được sắp xếp
+    # theo hàng, các đoạn giữ nguyên vị trí và mẫu lấy ra đã có thứ tự, nên trung vị lấy trực tiếp theo chỉ số
+    values_sorted = values[order]
+    by_value = np.argsort(values_sorted, axis=0, kind='stable')
+    by_group = np.argsort(codes_sorted[by_value], axis=0, kind='stable')
+    ordered = np.take_along_axis(values_sorted, np.take_along_axis(by_value, by_group, axis=0), axis=0)
+    valid = ~np.isnan(ordered)
+    filled = np.where(valid, ordered, 0.0)
+    
+    n_rows, n_metrics = values.shape
+    block = max(1, BOOTSTRAP_BLOCK_ELEMENTS // max(1, n_rows * n_metrics))
+    means, medians = [], []
+    for first in range(0, n_resamples, block):
+        size = min(block, n_resamples - first)
+        index = np.sort(row_start + (rng.random((size, n_rows)) * row_size).astype(np.int64), axis=1)
+        
+        count = np.add.reduceat(valid[index].astype('float64'), starts, axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means.append(np.add.reduceat(filled[index], starts, axis=1) / count)
+        
+        sample = ordered[index]
+        n_valid = count.astype(np.int64)
+        lower = starts[None, :, None] + np.maximum(n_valid - 1, 0) // 2
+        upper = np.minimum(starts[None, :, None] + n_valid // 2, n_rows - 1)
+        median = (np.take_along_axis(sample, lower, axis=1) + np.take_along_axis(sample, upper, axis=1)) / 2
+        median[n_valid == 0] = np.nan
+        medians.append(median)
+    
+    tail = (1 - confidence) / 2 * 100
+    intervals = {}
+    with np.errstate(invalid='ignore'):
+        for stat, samples in (('mean', np.concatenate(means)), ('median', np.concatenate(medians))):
+            low, high = np.nanpercentile(samples, [tail, 100 - tail], axis=0)
+            intervals[f'{stat}_low'], intervals[f'{stat}_high'] = low, high
+    return intervals
+
+def add_bootstrap_intervals(cube, df_numeric, n_resamples=BOOTSTRAP_RESAMPLES,
+                            confidence=BOOTSTRAP_CONFIDENCE, seed=0):
+    # Thêm khoảng tin cậy của trung bình và trung vị cho từng đội (cube['ci']) và toàn giải (cột của cube['overall'])
+    metrics = cube['metrics']
+    data = df_numeric[df_numeric['Team'].notna()]
+    codes = pd.Categorical(data['Team'], categories=cube['teams']).codes.astype(np.int64)
+    values = data[metrics].to_numpy(dtype='float64', na_value=np.nan)
+    rng = np.random.default_rng(seed)
+    
+    with warnings.catch_warnings():
+        # Cột toàn NaN của một đội cho ra khoảng NaN, không cần cảnh báo
+        warnings.simplefilter('ignore', RuntimeWarning)
+        team_intervals = _bootstrap_intervals(values, codes, len(cube['teams']), n_resamples, confidence, rng)
+        overall_intervals = _bootstrap_intervals(values, np.zeros(len(values), dtype=np.int64), 1,
+                                                 n_resamples, confidence, rng)
+    
+    cube['ci'] = {bound: pd.DataFrame(matrix, index=cube['teams'], columns=metrics)
+                  for bound, matrix in team_intervals.items()}
+    for bound, matrix in overall_intervals.items():
+        cube['overall'][bound] = matrix[0]
+    cube['confidence'] = confidence
+    return cube
+
+# ====================
+# 3. THỐNG KÊ THEO LUỒNG CHO DỮ LIỆU LỚN (ĐỌC TỪNG KHỐI, BỘ TÍCH LŨY GỘP ĐƯỢC)
+# ====================
+STREAM_CHUNKSIZE = 100_000
+# Sai số tương đối của phác thảo phân vị: trung vị xấp xỉ nằm trong ±1% giá trị thật
+SKETCH_RELATIVE_ERROR = 0.01
+SKETCH_GAMMA = (1 + SKETCH_RELATIVE_ERROR) / (1 - SKETCH_RELATIVE_ERROR)
+SKETCH_MIN_VALUE = 1e-9
+
+def _sketch_buckets(values):
+    # Phác thảo kiểu DDSketch: mỗi giá trị được gộp vào bucket logarit cơ số gamma và thay bằng
+    # giá trị đại diện của bucket; số bucket chỉ phụ thuộc khoảng giá trị, không phụ thuộc số cầu thủ
+    magnitude = np.abs(values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        keys = np.ceil(np.log(magnitude) / math.log(SKETCH_GAMMA))
+        buckets = np.sign(values) * 2 * SKETCH_GAMMA ** keys / (SKETCH_GAMMA + 1)
+    return np.where(magnitude < SKETCH_MIN_VALUE, 0.0, buckets)
+
+def _sketch_quantile(sketch, q, levels):
+    # sketch: Series số lượng theo (*levels, 'Value'); trả về phân vị q của từng nhóm với nội suy
+    # tuyến tính giữa hai hạng liền kề, giống cách pandas tính trung vị khi số phần tử chẵn
+    sketch = sketch.sort_index()
+    cumulative = sketch.groupby(level=levels).cumsum()
+    position = q * (sketch.groupby(level=levels).transform('sum') - 1)
+    
+    def value_at(rank):
+        reached = cumulative[cumulative > rank].reset_index()
+        return reached.groupby(levels)['Value'].first()
+    
+    lower, upper = value_at(np.floor(position)), value_at(np.ceil(position))
+    fraction = (position - np.floor(position)).groupby(level=levels).first()
+    return lower * (1 - fraction) + upper * fraction
+
+class TeamStatsAccumulator:
+    # Bộ tích lũy gộp được của số lượng, trung bình, M2 (Welford/Chan) và phác thảo phân vị theo đội.
+    # Mỗi khối dữ liệu, mỗi file hoặc mỗi tiến trình có một bộ tích lũy riêng; merge() gộp chúng
+    # thành đúng kết quả như khi đọc toàn bộ dữ liệu (trung vị xấp xỉ theo SKETCH_RELATIVE_ERROR).
+    
+    def __init__(self, metrics):
+        self.metrics = list(metrics)
+        empty = pd.DataFrame(columns=self.metrics, dtype='float64').rename_axis('Team')
+        self.count, self.mean, self.m2 = empty, empty.copy(), empty.copy()
+        self.sketch = pd.Series(dtype='float64', index=pd.MultiIndex.from_arrays(
+            [[], [], []], names=['Team', 'Metric', 'Value']))
+    
+    def update(self, chunk):
+        # Thêm một khối hàng: thống kê của khối tính bằng _grouped_stats rồi gộp theo công thức Chan
+        data = chunk[chunk['Team'].notna()]
+        if data.empty:
+            return self
+        codes, teams = pd.factorize(data['Team'], sort=True)
+        values = data[self.metrics].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        stats = _grouped_stats(values, codes, len(teams))
+        
+        part = TeamStatsAccumulator(self.metrics)
+        index = pd.Index(teams, name='Team')
+        part.count = pd.DataFrame(stats['count'], index=index, columns=self.metrics)
+        part.mean = pd.DataFrame(np.where(stats['count'] > 0, stats['mean'], 0.0), index=index, columns=self.metrics)
+        part.m2 = pd.DataFrame(np.nan_to_num(stats['std'] ** 2 * (stats['count'] - 1)), index=index, columns=self.metrics)
+        
+        rows, cols = np.nonzero(~np.isnan(values))
+        buckets = pd.DataFrame({
+            'Team': teams[codes[rows]],
+            'Metric': np.asarray(self.metrics, dtype=object)[cols],
+            'Value': _sketch_buckets(values[rows, cols])
+        })
+        part.sketch = buckets.groupby(['Team', 'Metric', 'Value']).size().astype('float64')
+        return self.merge(part)
+    
+    def merge(self, other):
+        teams = self.count.index.union(other.count.index)
+        n_a = self.count.reindex(teams, fill_value=0.0)
+        n_b = other.count.reindex(teams, fill_value=0.0)
+        mean_a = self.mean.reindex(teams, fill_value=0.0)
+        mean_b = other.mean.reindex(teams, fill_value=0.0)
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = (n_b / n).fillna(0.0)
+            self.mean = mean_a + delta * weight
+            self.m2 = (self.m2.reindex(teams, fill_value=0.0) + other.m2.reindex(teams, fill_value=0.0)
+                       + delta ** 2 * n_a * weight)
+        self.count = n
+        self.sketch = pd.concat([self.sketch, other.sketch]).groupby(level=['Team', 'Metric', 'Value']).sum()
+        return self
+    
+    def _summary(self, count, mean, m2, sketch, levels):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(m2 / (count - 1))
+        median = _sketch_quantile(sketch, 0.5, levels) if len(sketch) else pd.Series(dtype='float64')
+        return {'count': count, 'mean': mean.where(count > 0), 'std': std.where(count > 1), 'median': median}
+    
+    def to_cube(self):
+        # Trả về bảng tổng hợp cùng cấu trúc với compute_team_cube để dùng lại mọi hàm báo cáo
+        teams = self.count.index.sort_values()
+        stats = self._summary(self.count.loc[teams], self.mean.loc[teams], self.m2.loc[teams],
+                              self.sketch, ['Team', 'Metric'])
+        stats['median'] = stats['median'].unstack('Metric').reindex(index=teams, columns=self.metrics)
+        
+        # Toàn giải: công thức Chan gộp mọi đội cùng lúc (M2 = tổng M2 + tổng n * (mean đội - mean chung)^2)
+        overall_count = self.count.sum()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            overall_mean = (self.count * self.mean).sum() / overall_count
+        overall_m2 = self.m2.sum() + (self.count * (self.mean - overall_mean) ** 2).sum()
+        overall_sketch = self.sketch.groupby(level=['Metric', 'Value']).sum()
+        overall_stats = self._summary(overall_count, overall_mean, overall_m2, overall_sketch, ['Metric'])
+        
+        cube = {'teams': pd.Index(teams, name='Team'), 'metrics': list(self.metrics)}
+        for stat in ('count', 'mean', 'median', 'std'):
+            cube[stat] = stats[stat]
+        cube['overall'] = pd.DataFrame({stat: overall_stats[stat].reindex(self.metrics)
+                                        for stat in ('count', 'mean', 'median', 'std')}, index=self.metrics)
+        return cube
+
+def infer_metrics(path, nrows=10_000):
+    # Các cột số được xác định từ đầu file đầu tiên để mọi khối và mọi file dùng chung một bộ chỉ số
+    sample = pd.read_csv(path, nrows=nrows)
+    return list(sample.select_dtypes(include=[np.number]).columns)
+
+def accumulate_file(path, metrics, chunksize=STREAM_CHUNKSIZE):
+    # Đọc một file theo từng khối; bộ nhớ chỉ phụ thuộc chunksize và số bucket của phác thảo
+    accumulator = TeamStatsAccumulator(metrics)
+    for chunk in pd.read_csv(path, usecols=['Team'] + metrics, chunksize=chunksize):
+        accumulator.update(chunk)
+    return accumulator
+
+def compute_team_cube_streaming(paths, metrics=None, chunksize=STREAM_CHUNKSIZE, workers=None):
+    # Mỗi file (phân vùng) được tích lũy trong một tiến trình riêng, sau đó các kết quả được gộp lại
+    metrics = infer_metrics(paths[0]) if metrics is None else list(metrics)
+    total = TeamStatsAccumulator(metrics)
+    if len(paths) == 1:
+        return total.merge(accumulate_file(paths[0], metrics, chunksize)).to_cube()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for partial in executor.map(accumulate_file, paths, [metrics] * len(paths), [chunksize] * len(paths)):
+            total.merge(partial)
+    return total.to_cube()
+
+# ====================
+# 4. HÀM VẼ BIỂU ĐỒ NÂNG CAO
+# ====================
+def _binned_densities(values, codes, n_teams, bins):
+    # Histogram của mọi đội trên cùng một bộ cạnh bin, tính bằng một lần bincount
+    valid = ~np.isnan(values) & (codes >= 0)
+    values, codes = values[valid], codes[valid]
+    edges = np.histogram_bin_edges(values, bins=bins) if len(values) else np.linspace(0, 1, bins + 1)
+    bin_index = np.clip(np.searchsorted(edges, values, side='right') - 1, 0, bins - 1)
+    counts = np.bincount(codes * bins + bin_index, minlength=n_teams * bins).reshape(n_teams, bins)
+    return counts, edges
+
+def _draw_binned_violins(ax, data, metric, team_order):
+    # Violin dựng từ histogram, hộp tứ phân vị và chỉ các điểm ngoại lai:
+    # chi phí vẽ phụ thuộc số đội và số bin thay vì số cầu thủ
+    values = data[metric].to_numpy(dtype='float64', na_value=np.nan)
+    codes = pd.Categorical(data['Team'], categories=team_order).codes.astype('int64')
+    counts, edges = _binned_densities(values, codes, len(team_order), PLOT_STYLE['density_bins'])
+    centers = (edges[:-1] + edges[1:]) / 2
+    half_widths = 0.4 * counts / np.maximum(counts.max(axis=1, keepdims=True), 1)
+    
+    bodies = []
+    for i, team in enumerate(team_order):
+        # Chỉ vẽ từ bin khác 0 đầu tiên tới bin khác 0 cuối cùng của đội, để violin không kéo dài
+        # tới min/max chung; đội không có dữ liệu vẫn có một body rỗng để giữ đúng chỉ số
+        filled = np.flatnonzero(counts[i])
+        span = slice(filled[0], filled[-1] + 1) if len(filled) else slice(0, 0)
+        bodies.append(ax.fill_betweenx(centers[span], i - half_widths[i, span], i + half_widths[i, span],
+                                       facecolor=TEAM_PALETTE.get(team, '#999999'),
+                                       edgecolor='#333333', linewidth=1.5, alpha=0.9))
+    
+    positions = np.arange(len(team_order))
+    quartiles = data.groupby('Team')[metric].quantile([0.25, 0.5, 0.75]).unstack().reindex(team_order)
+    ax.vlines(positions, quartiles[0.25], quartiles[0.75], color='black', linewidth=4, alpha=0.6)
+    ax.scatter(positions, quartiles[0.5], color='white', s=20, zorder=3)
+    
+    # Điểm ngoại lai theo quy tắc Tukey (ngoài Q1 - 1.5 IQR và Q3 + 1.5 IQR của đội)
+    iqr = quartiles[0.75] - quartiles[0.25]
+    low = data['Team'].map(quartiles[0.25] - 1.5 * iqr)
+    high = data['Team'].map(quartiles[0.75] + 1.5 * iqr)
+    outliers = (codes >= 0) & ((data[metric] < low) | (data[metric] > high)).to_numpy()
+    # Độ lệch ngang cố định (seed 0) để cùng dữ liệu luôn cho cùng một ảnh
+    jitter = np.random.default_rng(0).uniform(-0.15, 0.15, outliers.sum())
+    ax.scatter(codes[outliers] + jitter, values[outliers], color='black', alpha=0.6, s=9)
+    
+    ax.set_xticks(positions)
+    ax.set_xticklabels(team_order)
+    ax.set_xlim(-0.5, len(team_order) - 0.5)
+    return bodies
+
+def plot_enhanced_distribution(metric, data, team_means, output_dir=PLOT_DIR, mode='auto'):
+    # data: bảng gồm cột 'Team' và cột chỉ số; team_means: trung bình theo đội lấy từ bảng tổng hợp
+    # mode: 'points' (violin + swarmplot), 'binned' (histogram + ngoại lai) hoặc 'auto' chọn theo số điểm
+    fig_width = PLOT_STYLE['fig_width']
+    fig_height = fig_width / PLOT_STYLE['golden_ratio']
+    plt.figure(figsize=(fig_width, fig_height), dpi=PLOT_STYLE['dpi'])
+    
+    team_order = team_means.sort_values(ascending=False).index
+    
+    if mode == 'auto':
+        largest_team = data['Team'].value_counts().max() if len(data) else 0
+        mode = 'binned' if largest_team > PLOT_STYLE['swarm_max_points'] else 'points'
+    
+    if mode == 'binned':
+        ax = plt.gca()
+        bodies = _draw_binned_violins(ax, data, metric, team_order)
+    else:
+        ax = sns.violinplot(data=data, x='Team', y=metric, order=team_order,
+                           palette=TEAM_PALETTE, inner=None, linewidth=1.5,
+                           saturation=0.8, alpha=0.9)
+        
+        sns.swarmplot(data=data, x='Team', y=metric, order=team_order,
+                     color='black', alpha=0.6, size=3, ax=ax)
+        bodies = ax.get_children()
     
     for i, team in enumerate(team_order[:3]):
-        ax.get_children()[i].set_edgecolor('gold')
-        ax.get_children()[i].set_linewidth(2.5)
-        ax.get_children()[i].set_alpha(0.95)
+        bodies[i].set_edgecolor('gold')
+        bodies[i].set_linewidth(2.5)
+        bodies[i].set_alpha(0.95)
     
     for i, team in enumerate(team_order):
-        mean_val = df[df['Team'] == team][metric].mean()
+        mean_val = team_means[team]
         ax.plot([i-0.4, i+0.4], [mean_val, mean_val], 
                 color='black', linestyle='--', linewidth=1.5, alpha=0.7)
         ax.text(i, mean_val + 0.02 * (ax.get_ylim()[1] - ax.get_ylim()[0]), 
@@ -101,15 +439,73 @@ def plot_enhanced_distribution(metric):
     
     plt.tight_layout()
     
-    safe_name = metric.replace(' ', '_').replace('/', '_')
-    plt.savefig(f'team_distribution_plots/ENHANCED_{safe_name}.png',
-               dpi=300, bbox_inches='tight', facecolor='white')
+    path = plot_path(metric, output_dir)
+    plt.savefig(path, dpi=PLOT_STYLE['dpi'], bbox_inches='tight', facecolor='white')
     plt.close()
+    return path
+
+def plot_path(metric, output_dir=PLOT_DIR):
+    safe_name = metric.replace(' ', '_').replace('/', '_')
+    return os.path.join(output_dir, f'ENHANCED_{safe_name}.png')
+
+def plot_hash(metric, data, team_means):
+    # Khóa của một biểu đồ: dữ liệu cột chỉ số, thứ tự đội, bảng màu và thiết lập giao diện
+    team_order = list(team_means.sort_values(ascending=False).index)
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(data[['Team', metric]], index=False).to_numpy().tobytes())
+    digest.update(json.dumps([metric, team_order, TEAM_PALETTE, PLOT_STYLE],
+                             sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+def _render_plot(task):
+    # Chạy trong tiến trình con: mỗi tiến trình vẽ trọn một chỉ số
+    metric, data, team_means, output_dir = task
+    return metric, plot_enhanced_distribution(metric, data, team_means, output_dir)
+
+def render_distribution_plots(df, cube, metrics, workers=None, output_dir=PLOT_DIR):
+    # Vẽ song song các chỉ số, bỏ qua biểu đồ có dữ liệu và thiết lập không đổi so với lần vẽ trước
+    hashes_path = os.path.join(output_dir, PLOT_HASHES_FILE)
+    try:
+        with open(hashes_path, encoding='utf-8') as f:
+            saved_hashes = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        saved_hashes = {}
+    
+    tasks, new_hashes = [], {}
+    for metric in metrics:
+        data = df[['Team', metric]]
+        team_means = cube['mean'][metric]
+        new_hashes[metric] = plot_hash(metric, data, team_means)
+        if saved_hashes.get(metric) != new_hashes[metric] or not os.path.exists(plot_path(metric, output_dir)):
+            tasks.append((metric, data, team_means, output_dir))
+    
+    rendered = []
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(_render_plot, task): task[0] for task in tasks}
+            for future in as_completed(futures):
+                metric = futures[future]
+                try:
+                    future.result()
+                    rendered.append(metric)
+                except Exception as e:
+                    # Không lưu khóa của biểu đồ lỗi để lần chạy sau vẽ lại
+                    print(f"Lỗi khi vẽ biểu đồ {metric}: {e}")
+                    new_hashes.pop(metric)
+    
+    saved_hashes.update(new_hashes)
+    tmp_path = f'{hashes_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(saved_hashes, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, hashes_path)
+    
+    print(f"Đã vẽ {len(rendered)} biểu đồ, bỏ qua {len(metrics) - len(tasks)} biểu đồ không thay đổi")
+    return rendered
 
 # ====================
-# 3. HÀM TẠO BẢNG XẾP HẠNG ĐẦY ĐỦ (KHÔNG LƯU CSV)
+# 5. HÀM TẠO BẢNG XẾP HẠNG ĐẦY ĐỦ (KHÔNG LƯU CSV)
 # ====================
-def create_complete_ranking(team_stats):
+def create_complete_ranking(cube):
     key_metrics = [
         'Matches Played', 'Starts', 'Goals', 'Assists',
         'Expected Goals (xG)', 'Expected Assist Goals (xAG)',
@@ -117,12 +513,10 @@ def create_complete_ranking(team_stats):
         'Tackles (Tkl)', 'Interceptions (Int)', 'Blocks'
     ]
     
-    available_metrics = [m for m in key_metrics if m in team_stats.columns.get_level_values(0)]
-    
-    performance_score = team_stats.xs('mean', axis=1, level=1)[available_metrics].mean(axis=1)
+    available_metrics = [m for m in key_metrics if m in cube['metrics']]
     
-    ranking_df = team_stats.xs('mean', axis=1, level=1)[available_metrics]
-    ranking_df['Performance Score'] = performance_score
+    ranking_df = cube['mean'][available_metrics].copy()
+    ranking_df['Performance Score'] = ranking_df.mean(axis=1)
     ranking_df = ranking_df.sort_values('Performance Score', ascending=False)
     
     ranking_df = ranking_df.round(2)
@@ -130,9 +524,9 @@ def create_complete_ranking(team_stats):
     return ranking_df
 
 # ====================
-# 4. HÀM TẠO RESULTS2.CSV
+# 6. HÀM TẠO RESULTS2.CSV
 # ====================
-def generate_results2(df_numeric):
+def generate_results2(cube):
     numeric_metrics = [
         'Age', 'Matches Played', 'Starts', 'Minutes', 'Goals', 'Assists',
         'Yellow Cards', 'Red Cards', 'Expected Goals (xG)', 'Expected Assist Goals (xAG)',
@@ -156,97 +550,317 @@ def generate_results2(df_numeric):
         'Ball Recoveries (Recov)', 'Aerials Won (Won)', 'Aerials Lost (Lost)', 'Aerials Won Percentage (Won%)'
     ]
     
-    available_metrics = [m for m in numeric_metrics if m in df_numeric.columns]
+    available_metrics = [m for m in numeric_metrics if m in cube['metrics']]
     
-    team_median = df_numeric.groupby('Team')[available_metrics].median().round(2)
-    team_median.columns = [f"{col}_Median" for col in team_median.columns]
+    # Bố cục cột giữ nguyên: mọi cột _Median trước, sau đó từng cặp _Mean/_Std theo chỉ số
+    median_columns = [f"{metric}_Median" for metric in available_metrics]
+    mean_std_columns = [f"{metric}_{stat}" for metric in available_metrics for stat in ('Mean', 'Std')]
     
-    team_stats = df_numeric.groupby('Team')[available_metrics].agg(['mean', 'std']).round(2)
-    team_stats.columns = [f"{col[0]}_{col[1].capitalize()}" for col in team_stats.columns]
+    team_median = cube['median'][available_metrics].set_axis(median_columns, axis=1)
+    team_mean_std = pd.concat([cube['mean'][available_metrics], cube['std'][available_metrics]], axis=1, keys=['Mean', 'Std'])
+    team_mean_std.columns = [f"{metric}_{stat}" for stat, metric in team_mean_std.columns]
+    results2_df = team_median.join(team_mean_std[mean_std_columns])
+    results2_df.index = list(results2_df.index)
     
-    overall_stats = df_numeric[available_metrics].agg(['mean', 'std']).T.round(2)
-    overall_stats.columns = ['Overall_Mean', 'Overall_Std']
+    overall = cube['overall'].loc[available_metrics]
+    overall_values = list(overall['median']) + [value for metric in available_metrics
+                                                for value in overall.loc[metric, ['mean', 'std']]]
+    overall_row = pd.DataFrame([overall_values], index=['Overall'], columns=median_columns + mean_std_columns)
     
-    results2_df = team_median.join(team_stats)
+    results2_df = pd.concat([results2_df, overall_row[results2_df.columns]])
     
-    overall_row = pd.DataFrame(index=['Overall'], columns=results2_df.columns)
-    for metric in available_metrics:
-        overall_row[f"{metric}_Median"] = df_numeric[metric].median()
-        overall_row[f"{metric}_Mean"] = overall_stats.loc[metric, 'Overall_Mean']
-        overall_row[f"{metric}_Std"] = overall_stats.loc[metric, 'Overall_Std']
-    overall_row = overall_row.round(2)
+    # Tùy chọn CI: thêm các cột khoảng tin cậy sau bố cục cũ, theo thứ tự chỉ số
+    if 'ci' in cube:
+        bounds = [('mean_low', 'Mean_CI_Low'), ('mean_high', 'Mean_CI_High'),
+                  ('median_low', 'Median_CI_Low'), ('median_high', 'Median_CI_High')]
+        ci_columns = {f"{metric}_{suffix}": pd.concat([
+            cube['ci'][bound][metric], pd.Series([overall.loc[metric, bound]], index=['Overall'])
+        ]).set_axis(results2_df.index) for metric in available_metrics for bound, suffix in bounds}
+        results2_df = pd.concat([results2_df, pd.DataFrame(ci_columns, index=results2_df.index)], axis=1)
     
-    results2_df = pd.concat([results2_df, overall_row])
+    results2_df = results2_df.round(2)
     
     results2_df.to_csv('team_stats_results/results2.csv', encoding='utf-8-sig', float_format='%.2f')
     
     return results2_df, available_metrics
 
 # ====================
-# 5. HÀM TẠO TOP_TEAM_PER_METRIC.TXT
+# 7. HÀM TẠO TOP_TEAM_PER_METRIC.TXT
 # ====================
-def generate_top_team_per_metric(df_numeric, available_metrics):
+def generate_top_team_per_metric(cube, available_metrics):
     output = []
-    team_means = df_numeric.groupby('Team')[available_metrics].mean()
+    team_means = cube['mean'][available_metrics]
     
     for metric in available_metrics:
         top_team = team_means[metric].idxmax()
         top_value = team_means[metric].max()
-        output.append(f"{metric}: {top_team} ({top_value:.2f})")
+        line = f"{metric}: {top_team} ({top_value:.2f})"
+        if 'ci' in cube:
+            low, high = cube['ci']['mean_low'].loc[top_team, metric], cube['ci']['mean_high'].loc[top_team, metric]
+            line += f" [CI {cube['confidence']:.0%}: {low:.2f} - {high:.2f}]"
+        output.append(line)
     
     with open('team_stats_results/top_team_per_metric.txt', 'w', encoding='utf-8') as f:
         f.write("\n".join(output))
 
 # ====================
-# 6. HÀM TẠO TOP_3_RANKING.TXT
+# 8. BỘ MÁY BẢNG XẾP HẠNG TOP-K (TOÀN GIẢI, THEO ĐỘI, THEO VỊ TRÍ)
 # ====================
-def generate_top_3_ranking(df, available_metrics):
+def _top_k(values, k):
+    # values: ma trận (số cầu thủ x số chỉ số). Trả về (hàng, cột, hạng) của top-k mọi cột cùng lúc.
+    # argpartition tìm ngưỡng giá trị thứ k của từng cột mà không sắp xếp toàn bộ; chỉ các ứng viên
+    # vượt ngưỡng được sắp xếp. Khi bằng điểm, cầu thủ đứng trước trong bảng xếp trên (kết quả cố định).
+    n_rows, n_cols = values.shape
+    missing = np.isnan(values)
+    filled = np.where(missing, -np.inf, values)
+    if n_rows > k:
+        kth_rows = np.argpartition(-filled, k - 1, axis=0)[k - 1]
+        threshold = filled[kth_rows, np.arange(n_cols)]
+        candidates = (filled >= threshold) & ~missing
+    else:
+        candidates = ~missing
+    
+    rows, cols = np.nonzero(candidates)
+    order = np.lexsort((rows, -filled[rows, cols], cols))
+    rows, cols = rows[order], cols[order]
+    
+    # Hạng trong từng cột = vị trí trong đoạn của cột đó
+    starts = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]]) if len(cols) else np.array([], dtype=int)
+    ranks = np.arange(len(cols)) - np.repeat(starts, np.diff(np.r_[starts, len(cols)]))
+    keep = ranks < k
+    return rows[keep], cols[keep], ranks[keep] + 1
+
+def primary_position(positions):
+    # Vị trí chính là vị trí đầu tiên fbref liệt kê (ví dụ 'MF,FW' -> 'MF')
+    return positions.astype(str).str.split(',').str[0]
+
+def compute_leaderboard(df, metrics, k=3, by=None):
+    # Top-k của mọi chỉ số; by=None cho toàn giải, by='Team' theo đội, by='Position' theo vị trí chính.
+    # Trả về bảng dạng dài: [Group], Metric, Rank, Name, Team, Position, Value
+    # (khóa nhóm nằm ở cột Group riêng vì Team và Position đã là cột của từng cầu thủ)
+    if by is None:
+        groups = [(None, df)]
+    else:
+        keys = primary_position(df['Position']) if by == 'Position' else df[by]
+        groups = df.groupby(keys, sort=True)
+    
+    frames = []
+    for key, part in groups:
+        values = part[metrics].to_numpy(dtype='float64', na_value=np.nan)
+        rows, cols, ranks = _top_k(values, k)
+        frame = pd.DataFrame({
+            'Metric': np.asarray(metrics, dtype=object)[cols],
+            'Rank': ranks,
+            'Name': part['Name'].to_numpy()[rows],
+            'Team': part['Team'].to_numpy()[rows],
+            'Position': part['Position'].to_numpy()[rows],
+            'Value': values[rows, cols]
+        })
+        if by is not None:
+            frame.insert(0, 'Group', key)
+        frames.append(frame)
+    
+    columns = (['Group'] if by else []) + ['Metric', 'Rank', 'Name', 'Team', 'Position', 'Value']
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+def scout(df, metric, k=10, position=None, team=None):
+    # Truy vấn tuyển trạch, ví dụ scout(df, 'Progressive Passes (PrgP)', 10, position='MF'):
+    # position khớp với bất kỳ vị trí nào cầu thủ được liệt kê
+    mask = pd.Series(True, index=df.index)
+    if position is not None:
+        mask &= df['Position'].astype(str).str.split(',').apply(lambda listed: position in listed)
+    if team is not None:
+        mask &= df['Team'] == team
+    return compute_leaderboard(df[mask], [metric], k).drop(columns='Metric')
+
+# ====================
+# 9. CHỈ MỤC PHẦN TRĂM THEO VỊ TRÍ (CHO CÔNG CỤ TUYỂN TRẠCH)
+# ====================
+def minutes_played(df, column='Minutes'):
+    # Số phút có thể là chuỗi có dấu phẩy hàng nghìn trong results.csv (ví dụ "2,430")
+    return pd.to_numeric(df[column].astype(str).str.replace(',', '', regex=False), errors='coerce')
+
+PERCENTILE_MIN_MINUTES = 450
+PERCENTILE_INDEX_FILE = 'team_stats_results/percentile_index.npz'
+
+class PercentileIndex:
+    # Các mảng giá trị đã sắp xếp theo (vị trí chính, chỉ số), dựng một lần từ results.csv.
+    # Phần trăm của một giá trị = (số cầu thủ thấp hơn + một nửa số cầu thủ bằng) / số cầu thủ * 100,
+    # tính bằng tìm kiếm nhị phân thay vì rank() trên toàn bảng cho mỗi truy vấn.
+    
+    def __init__(self, metrics, sorted_values, counts, min_minutes=0):
+        self.metrics = list(metrics)
+        self.metric_columns = {metric: i for i, metric in enumerate(self.metrics)}
+        # sorted_values[vị trí]: ma trận (số cầu thủ x số chỉ số), mỗi cột tăng dần, NaN ở cuối
+        self.sorted_values = sorted_values
+        # counts[vị trí]: số giá trị hợp lệ của từng cột
+        self.counts = counts
+        self.min_minutes = min_minutes
+    
+    @classmethod
+    def build(cls, df, metrics, min_minutes=0):
+        # Chỉ cầu thủ thi đấu ít nhất min_minutes phút được đưa vào nhóm so sánh
+        pool = df[minutes_played(df) >= min_minutes] if min_minutes else df
+        positions = primary_position(pool['Position'])
+        sorted_values, counts = {}, {}
+        for position, part in pool.groupby(positions, sort=True):
+            values = part[metrics].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            sorted_values[position] = np.sort(values, axis=0)
+            counts[position] = (~np.isnan(values)).sum(axis=0)
+        return cls(metrics, sorted_values, counts, min_minutes)
+    
+    @property
+    def positions(self):
+        return list(self.sorted_values)
+    
+    def _percentiles(self, position, columns, values):
+        # values: ma trận (số truy vấn x len(columns)); trả về phần trăm cùng kích thước, NaN nếu không xác định
+        result = np.full(values.shape, np.nan)
+        if position not in self.sorted_values:
+            return result
+        for j, column in enumerate(columns):
+            n = self.counts[position][column]
+            if n == 0:
+                continue
+            ordered = self.sorted_values[position][:n, column]
+            below = np.searchsorted(ordered, values[:, j], side='left')
+            at_or_below = np.searchsorted(ordered, values[:, j], side='right')
+            result[:, j] = np.where(np.isnan(values[:, j]), np.nan, (below + at_or_below) / 2 / n * 100)
+        return result
+    
+    def percentile(self, position, metric, value):
+        # Một truy vấn: ví dụ index.percentile('MF', 'Progressive Passes (PrgP)', 120)
+        column = self.metric_columns[metric]
+        return float(self._percentiles(position, [column], np.array([[value]], dtype='float64'))[0, 0])
+    
+    def lookup(self, players, metrics=None):
+        # Tra cứu theo lô cho cả một đội hình: mỗi cầu thủ được so với nhóm cùng vị trí chính.
+        # Trả về bảng Name, Team, Position và phần trăm của từng chỉ số
+        metrics = self.metrics if metrics is None else list(metrics)
+        columns = [self.metric_columns[metric] for metric in metrics]
+        values = players[metrics].apply(pd.to_numeric, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        positions = primary_position(players['Position']).to_numpy()
+        
+        result = np.full(values.shape, np.nan)
+        for position in pd.unique(positions):
+            rows = positions == position
+            result[rows] = self._percentiles(position, columns, values[rows])
+        
+        table = players[['Name', 'Team', 'Position']].reset_index(drop=True)
+        return pd.concat([table, pd.DataFrame(result, columns=metrics)], axis=1)
+    
+    def save(self, path):
+        arrays = {f'values_{i}': self.sorted_values[position] for i, position in enumerate(self.positions)}
+        arrays.update({f'counts_{i}': self.counts[position] for i, position in enumerate(self.positions)})
+        np.savez_compressed(path, metrics=np.array(self.metrics), positions=np.array(self.positions),
+                            min_minutes=np.array(self.min_minutes), **arrays)
+    
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            positions = [str(position) for position in data['positions']]
+            sorted_values = {position: data[f'values_{i}'] for i, position in enumerate(positions)}
+            counts = {position: data[f'counts_{i}'] for i, position in enumerate(positions)}
+            return cls([str(metric) for metric in data['metrics']], sorted_values, counts,
+                       data['min_minutes'].item())
+
+# ====================
+# 10. HÀM TẠO TOP_3_RANKING.TXT
+# ====================
+def render_top_ranking(leaderboard, metrics):
     output = []
-    
-    for metric in available_metrics:
-        top_3 = df[['Name', 'Team', metric]].sort_values(by=metric, ascending=False).head(3)
+    by_metric = dict(tuple(leaderboard.groupby('Metric', sort=False)))
+    for metric in metrics:
         output.append(f"\n{metric}:")
-        for _, row in top_3.iterrows():
-            output.append(f"  {row['Name']} ({row['Team']}): {row[metric]:.2f}")
+        if metric in by_metric:
+            for name, team, value in by_metric[metric][['Name', 'Team', 'Value']].itertuples(index=False):
+                output.append(f"  {name} ({team}): {value:.2f}")
+    return "\n".join(output)
+
+def generate_top_3_ranking(df, available_metrics):
+    leaderboard = compute_leaderboard(df, available_metrics, k=3)
     
     with open('team_stats_results/top_3_ranking.txt', 'w', encoding='utf-8') as f:
-        f.write("\n".join(output))
+        f.write(render_top_ranking(leaderboard, available_metrics))
+    
+    return leaderboard
 
 # ====================
-# 7. THỰC THI CHÍNH
+# 11. THỰC THI CHÍNH
 # ====================
+def parse_args():
+    parser = argparse.ArgumentParser(description='Thống kê cầu thủ theo đội (task 2)')
+    parser.add_argument('inputs', nargs='*', default=['results.csv'],
+                        help='File CSV đầu vào của chế độ theo luồng, mỗi file là một phân vùng (mặc định: results.csv)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Đọc dữ liệu theo từng khối với bộ nhớ giới hạn; chỉ tạo các báo cáo theo đội')
+    parser.add_argument('--chunksize', type=int, default=STREAM_CHUNKSIZE, help='Số hàng mỗi khối ở chế độ theo luồng')
+    parser.add_argument('--workers', type=int, default=None, help='Số tiến trình xử lý các phân vùng song song')
+    parser.add_argument('--ci', action='store_true',
+                        help='Thêm khoảng tin cậy bootstrap của trung bình và trung vị vào results2.csv')
+    parser.add_argument('--resamples', type=int, default=BOOTSTRAP_RESAMPLES, help='Số lần lấy mẫu lại bootstrap')
+    parser.add_argument('--min-minutes', type=int, default=PERCENTILE_MIN_MINUTES,
+                        help='Số phút tối thiểu để cầu thủ được đưa vào chỉ mục phần trăm')
+    return parser.parse_args()
+
 if __name__ == '__main__':
-    os.makedirs('team_distribution_plots', exist_ok=True)
+    args = parse_args()
+    os.makedirs(PLOT_DIR, exist_ok=True)
     os.makedirs('team_stats_results', exist_ok=True)
     
-    try:
-        df = pd.read_csv('results.csv')
-    except FileNotFoundError:
-        print("Lỗi: Không tìm thấy file results.csv")
-        print("Vui lòng đảm bảo file được đặt đúng thư mục")
-        exit()
-    
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    df_numeric = df[['Team'] + list(numeric_cols)]
-    
-    team_stats = df_numeric.groupby('Team').agg(['mean', 'median', 'std'])
-    
-    for metric in ['Goals', 'Expected Goals (xG)', 'Assists', 'Progressive Passes (PrgP)']:
-        if metric in df_numeric.columns:
-            plot_enhanced_distribution(metric)
-        else:
-            print(f"Cảnh báo: Cột '{metric}' không tồn tại trong dữ liệu.")
-    
-    ranking = create_complete_ranking(team_stats)
-    
-    results2, available_metrics = generate_results2(df_numeric)
-    
-    generate_top_team_per_metric(df_numeric, available_metrics)
-    generate_top_3_ranking(df, available_metrics)
+    df = None
+    if args.stream:
+        # Dữ liệu lưu trữ nhiều mùa giải/giải đấu: không nạp toàn bộ vào bộ nhớ
+        cube = compute_team_cube_streaming(args.inputs, chunksize=args.chunksize, workers=args.workers)
+    else:
+        try:
+            # Ưu tiên file Parquet có kiểu dữ liệu của task 1 (Minutes, Age... đã là số, ô trống là null)
+            if os.path.exists('results.parquet'):
+                df = pd.read_parquet('results.parquet')
+                df[['Nation', 'Team', 'Position']] = df[['Nation', 'Team', 'Position']].astype(object)
+            else:
+                df = pd.read_csv('results.csv')
+        except FileNotFoundError:
+            print("Lỗi: Không tìm thấy file results.csv")
+            print("Vui lòng đảm bảo file được đặt đúng thư mục")
+            exit()
+        
+        numeric_cols = df.select_dtypes(include=[np.number]).columns
+        df_numeric = df[['Team'] + list(numeric_cols)]
+        
+        # Mọi thống kê theo đội và toàn giải được tính một lần ở đây
+        cube = compute_team_cube(df_numeric, list(numeric_cols))
+        if args.ci:
+            add_bootstrap_intervals(cube, df_numeric, args.resamples)
+        
+        # Vẽ biểu đồ phân phối cho mọi chỉ số số, mỗi chỉ số trong một tiến trình riêng
+        render_distribution_plots(df_numeric, cube, cube['metrics'])
+    
+    ranking = create_complete_ranking(cube)
+    
+    results2, available_metrics = generate_results2(cube)
+    
+    generate_top_team_per_metric(cube, available_metrics)
+    
+    if df is not None:
+        generate_top_3_ranking(df, available_metrics)
+        
+        # Bảng xếp hạng top-3 theo đội và theo vị trí chính cho công việc tuyển trạch
+        for by, file_name in (('Team', 'leaderboard_by_team.csv'), ('Position', 'leaderboard_by_position.csv')):
+            compute_leaderboard(df, available_metrics, k=3, by=by).to_csv(
+                f'team_stats_results/{file_name}', index=False, encoding='utf-8-sig')
+        
+        # Chỉ mục phần trăm theo vị trí được lưu lại để công cụ tuyển trạch tải và truy vấn ngay
+        PercentileIndex.build(df, available_metrics, args.min_minutes).save(PERCENTILE_INDEX_FILE)
     
     print("Hoàn thành phân tích nâng cao!")
     print("\nTop 5 đội mạnh nhất:")
     print(ranking.head(5))
     print("\nĐã tạo file results2.csv với thống kê trung vị, trung bình và độ lệch chuẩn cho tất cả chỉ số số.")
     print("Đã tạo file top_team_per_metric.txt với đội có chỉ số cao nhất cho mỗi metric.")
-    print("Đã tạo file top_3_ranking.txt với top 3 cầu thủ cho mỗi metric.")
\ No newline at end of file
+    if df is not None:
+        print("Đã tạo file top_3_ranking.txt với top 3 cầu thủ cho mỗi metric.")
+        print("Đã tạo file leaderboard_by_team.csv và leaderboard_by_position.csv với top 3 theo đội và theo vị trí.")
+        print(f"Đã tạo file percentile_index.npz (cầu thủ có ít nhất {args.min_minutes} phút).")
+    else:
+        print("Chế độ theo luồng: bỏ qua biểu đồ và bảng xếp hạng cầu thủ (cần toàn bộ dữ liệu cầu thủ).")
@@ -1,22 +1,14 @@
-import pandas as pd
+import argparse
+import os
+import time
+
 import numpy as np
-from sklearn.preprocessing import StandardScaler
-import umap
-import matplotlib.pyplot as plt
-from sklearn.metrics import silhouette_score
-from sklearn.ensemble import IsolationForest
-from sklearn.neighbors import NearestNeighbors
-import hdbscan
-import seaborn as sns
-from sklearn.metrics import davies_bouldin_score
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score, davies_bouldin_score, calinski_harabasz_score
-from scipy.spatial import ConvexHull
-
-
-# Read CSV file ------------------------------------------------------------------------------------------------------------------------------------------
-# Đọc file CSV ------------------------------------------------------------------------------------------------------------------------------------------
-data = pd.read_csv('results.csv')
+import pandas as pd
+
+# Heavy libraries (scikit-learn, umap, matplotlib, scipy) are imported inside the stages that need them,
+# so importing this module, --help and the profile subcommand start quickly
+# Các thư viện nặng (scikit-learn, umap, matplotlib, scipy) được import bên trong các bước cần đến chúng,
+# để việc import mô-đun này, --help và lệnh profile khởi động nhanh
 
 # Select required columns for each group (e.g., 'Standard Stats' group)
 # Chọn các cột cần thiết theo từng nhóm (ví dụ nhóm 'Standard Stats')
@@ -36,260 +28,465 @@ required_cols = [
     'Aerials Won Percentage (Won%)'
 ]
 
-# Filter data to keep only required columns
-# Lọc dữ liệu chỉ giữ lại các cột cần thiết
-filtered_data = data[required_cols]
+# Player details kept next to the features (used by the similar-player index)
+# Thông tin cầu thủ giữ cùng các đặc trưng (dùng cho chỉ mục cầu thủ tương đồng)
+player_cols = ['Name', 'Team', 'Position', 'Age']
+
+K_VALUES = range(2, 11)
+# Seed of UMAP and of the KMeans sweep (the same default as cluster_selection.RANDOM_STATE), so refits of
+# the same data give the same coordinates and cluster numbers
+# Hạt giống của UMAP và của lần quét KMeans (cùng mặc định với cluster_selection.RANDOM_STATE), để các lần
+# huấn luyện lại trên cùng dữ liệu cho cùng tọa độ và cùng số thứ tự cụm
+RANDOM_STATE = 42
+CLUSTER_RESULTS_FILE = 'kmeans_cluster_results.csv'
+
+# -----------------------------------------
+def pyplot():
+    """matplotlib.pyplot with the non-interactive Agg backend: plots are only saved, never shown.
+    matplotlib.pyplot với backend Agg không tương tác: biểu đồ chỉ được lưu, không hiển thị."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+# Read data file ------------------------------------------------------------------------------------------------------------------------------------------
+# Đọc file dữ liệu ------------------------------------------------------------------------------------------------------------------------------------------
+def load(path=None):
+    """Read the task 1 players, preferring the typed Parquet export when no path is given.
+    Đọc dữ liệu cầu thủ của task 1, ưu tiên file Parquet có kiểu dữ liệu khi không chỉ định đường dẫn."""
+    # Prefer the typed Parquet export of task 1: only the needed columns are read and no strings are re-parsed
+    # Ưu tiên file Parquet có kiểu dữ liệu của task 1: chỉ đọc các cột cần thiết và không phải xử lý lại chuỗi
+    if path is None and os.path.exists('results.parquet'):
+        return pd.read_parquet('results.parquet', columns=player_cols + required_cols)
+    return pd.read_csv(path or 'results.csv')
 
 # Handle Missing Values------------------------------------------------------------------------------------------------------------------------------------
 # Xử lý Missing Values------------------------------------------------------------------------------------------------------------------------------------
-# Replace 'N/a' with NaN and convert to numeric
-# Thay thế 'N/a' thành NaN và chuyển sang kiểu số
-filtered_data = filtered_data.replace('N/a', pd.NA)
-filtered_data = filtered_data.apply(pd.to_numeric, errors='coerce')
+def impute(data):
+    """Required columns as floats with missing values filled by the column medians.
+    Returns (filtered_data, fill_values); the medians are kept so new rows can be filled the same way.
+    Các cột cần thiết ở dạng số thực với giá trị thiếu được điền bằng trung vị của cột.
+    Trả về (filtered_data, fill_values); trung vị được giữ lại để điền dòng mới theo cùng cách."""
+    # Replace 'N/a' with NaN and convert to numeric
+    # Thay thế 'N/a' thành NaN và chuyển sang kiểu số
+    filtered_data = data[required_cols].replace('N/a', pd.NA)
+    filtered_data = filtered_data.apply(pd.to_numeric, errors='coerce').astype('float64')
+
+    # Fill with median values
+    # Điền giá trị trung vị
+    fill_values = filtered_data.median()
+    filtered_data = filtered_data.fillna(fill_values)
+
+    # Check remaining missing values
+    # Kiểm tra số lượng missing values còn lại
+    print(filtered_data.isnull().sum())
+    return filtered_data, fill_values
 
-# Fill with median values
-# Điền giá trị trung vị
-for col in filtered_data.columns:
-    median_value = filtered_data[col].median()
-    filtered_data[col] = filtered_data[col].fillna(median_value)
-
-# Check remaining missing values
-# Kiểm tra số lượng missing values còn lại
-print(filtered_data.isnull().sum())
-
-# Exported CSV to verify 100% no Missing Values remaining
-# Đã xuất ra csv kiểm tra 100% không còn Missing Values
+# Data Standardization-----------------------------------------------------------------
+# Chuẩn hóa dữ liệu-----------------------------------------------------------------
+def scale(filtered_data):
+    from sklearn.preprocessing import StandardScaler
+    scaler = StandardScaler()
+    return scaler, scaler.fit_transform(filtered_data)
 
 # Dimensionality Reduction using UMAP------------------------------------------------------------------------------------------------------------
 # Giảm chiều dữ liệu phương pháp lựa chọn UMAP------------------------------------------------------------------------------------------------------------
-# Data Standardization-----------------------------------------------------------------
-# Chuẩn hóa dữ liệu-----------------------------------------------------------------
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(filtered_data)
-#print("\nDữ liệu sau chuẩn hóa (5 hàng đầu):")
-#print(X_scaled[:5])
-
-# Initialize UMAP with default parameters------------------------------------------------
-# Khởi tạo UMAP với tham số mặc định------------------------------------------------
-reducer = umap.UMAP(
-    n_components=2,          # Reduce to 2 dimensions for visualization
-    n_neighbors=15,          # Number of neighboring points to consider
-    min_dist=0.1,            # Minimum distance between points
-    metric='euclidean',      # Distance metric
-    n_jobs=-1,               # Use all CPUs
-    random_state=None        # Remove random_state to allow parallelization
-)
-
-# Perform dimensionality reduction---------------------------------------------------------------
-# Thực hiện giảm chiều---------------------------------------------------------------
-X_umap = reducer.fit_transform(X_scaled)
-#print("\nKết quả giảm chiều (5 hàng đầu):")
-#print(X_umap[:5])
-# Export to CSV file
-# xuất ra file csv
-output = pd.DataFrame({
-   'Player': data['Name'], 
-   'UMAP1': X_umap[:, 0],
-   'UMAP2': X_umap[:, 1]
-})
-output.to_csv('umap_results_clean.csv', index=False)
-
-# Visualize the results--------------------------------------------------------------
-# Trực quan hóa kết quả--------------------------------------------------------------
-plt.figure(figsize=(12, 8))
-plt.scatter(
-    X_umap[:, 0],           # x-axis - UMAP dimension 1
-    X_umap[:, 1],           # y-axis - UMAP dimension 2
-    c=X_umap[:, 0],         # Color by dimension 1
-    s=10,                   # Point size
-    alpha=0.7,              # Transparency
-    cmap='Spectral'         # Color map
-)
-
-plt.title('Player Distribution by Technical Characteristics (UMAP)', fontsize=16)
-plt.xlabel('UMAP Dimension 1', fontsize=12)
-plt.ylabel('UMAP Dimension 2', fontsize=12)
-plt.grid(alpha=0.3)
-plt.colorbar(label='Density')
-
-# Save the plot
-# Lưu đồ thị
-plt.savefig('umap_visualization.png', dpi=300, bbox_inches='tight')
-plt.show()
-
-# Evaluate dimensionality reduction quality----------------------------------------------------
-# Đánh giá chất lượng giảm chiều----------------------------------------------------
-# print("\nĐÁNH GIÁ CHẤT LƯỢNG GIẢM CHIỀU:")
-
-# Method 1: Dummy labels (for reference only)
-# Cách 1: Dummy labels (chỉ để tham khảo)
-# dummy_labels = np.random.randint(0, 4, size=len(X_umap))
-# print(f"- Silhouette Score (dummy): {silhouette_score(X_umap, dummy_labels):.3f}")
-
-# Method 2: Distance measurement (recommended)
-# Cách 2: Đo khoảng cách (khuyến nghị)
-# nbrs = NearestNeighbors(n_neighbors=5).fit(X_umap)
-# distances = np.mean(nbrs.kneighbors(X_umap)[0][:, 1:])
-# print(f"- Avg 5-NN distance: {np.mean(distances):.3f} (càng lớn càng tốt)")   #đã đánh giá khoảng 0.183(chấp nhận được)
-# print(f"- Kích thước embedding: {X_umap.shape}")
-
-# Determine optimal number of clusters using Elbow method------------------------------------------------------------------------------------------------------------
-# Xác định số cụm tối ưu bằng phương pháp Elbow------------------------------------------------------------------------------------------------------------
-range_n_clusters = range(2, 11)
-silhouette_scores = []
-davies_bouldin_scores = []
-
-for n_clusters in range_n_clusters:
-    kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    cluster_labels = kmeans.fit_predict(X_umap)
-    
-    silhouette_avg = silhouette_score(X_umap, cluster_labels)
-    silhouette_scores.append(silhouette_avg)
-    
-    db_score = davies_bouldin_score(X_umap, cluster_labels)
-    davies_bouldin_scores.append(db_score)
-    
-    print(f"With n_clusters = {n_clusters}:")
-    print(f"  - Silhouette Score: {silhouette_avg:.3f}")
-    print(f"  - Davies-Bouldin Score: {db_score:.3f}")
-    
-# Plot Elbow chart--------------------------------------------------------------------
-# Vẽ biểu đồ Elbow--------------------------------------------------------------------
-plt.figure(figsize=(12, 5))
-plt.subplot(1, 2, 1)
-plt.plot(range_n_clusters, silhouette_scores, 'bo-')
-plt.xlabel('Number of clusters')
-plt.ylabel('Silhouette Score')
-plt.title('Silhouette Score')
-
-plt.subplot(1, 2, 2)
-plt.plot(range_n_clusters, davies_bouldin_scores, 'ro-')
-plt.xlabel('Number of clusters')
-plt.ylabel('Davies-Bouldin Score')
-plt.title('Davies-Bouldin Score (lower is better)')
-
-plt.tight_layout()
-plt.show()
-
-# Export Silhouette Score plot separately
-plt.figure(figsize=(8, 6))
-plt.plot(range_n_clusters, silhouette_scores, 'bo-')
-plt.xlabel('Number of clusters')
-plt.ylabel('Silhouette Score')
-plt.title('Silhouette Score for Optimal Cluster Selection')
-plt.grid(True)
-plt.savefig('silhouette_score.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# Export Davies-Bouldin Score plot separately
-plt.figure(figsize=(8, 6))
-plt.plot(range_n_clusters, davies_bouldin_scores, 'ro-')
-plt.xlabel('Number of clusters')
-plt.ylabel('Davies-Bouldin Score')
-plt.title('Davies-Bouldin Score for Optimal Cluster Selection\n(lower is better)')
-plt.grid(True)
-plt.savefig('davies_bouldin_score.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-# Select optimal number of clusters based on Silhouette Score---------------------------------------
-# Chọn số cụm tốt nhất dựa trên Silhouette Score---------------------------------------
-optimal_clusters = range_n_clusters[np.argmax(silhouette_scores)]
-print(f"\nOptimal number of clusters selected: {optimal_clusters}")
+def embed(X_scaled, names=None, random_state=RANDOM_STATE):
+    """Fit UMAP on the scaled features; writes umap_results_clean.csv and umap_visualization.png.
+    Huấn luyện UMAP trên các đặc trưng chuẩn hóa; ghi umap_results_clean.csv và umap_visualization.png."""
+    import umap
+
+    # Initialize UMAP with default parameters------------------------------------------------
+    # Khởi tạo UMAP với tham số mặc định------------------------------------------------
+    reducer = umap.UMAP(
+        n_components=2,          # Reduce to 2 dimensions for visualization
+        n_neighbors=15,          # Number of neighboring points to consider
+        min_dist=0.1,            # Minimum distance between points
+        metric='euclidean',      # Distance metric
+        # A seeded UMAP runs its optimisation on a single thread: slower, but every refit gives the same map
+        # UMAP có hạt giống chạy bước tối ưu trên một luồng: chậm hơn, nhưng mọi lần huấn luyện lại cho cùng bản đồ
+        n_jobs=1,
+        random_state=random_state
+    )
+    X_umap = reducer.fit_transform(X_scaled)
+
+    # Export to CSV file
+    # xuất ra file csv
+    output = pd.DataFrame({
+        'Player': names,
+        'UMAP1': X_umap[:, 0],
+        'UMAP2': X_umap[:, 1]
+    })
+    output.to_csv('umap_results_clean.csv', index=False)
+
+    # Visualize the results--------------------------------------------------------------
+    # Trực quan hóa kết quả--------------------------------------------------------------
+    plt = pyplot()
+    plt.figure(figsize=(12, 8))
+    plt.scatter(
+        X_umap[:, 0],           # x-axis - UMAP dimension 1
+        X_umap[:, 1],           # y-axis - UMAP dimension 2
+        c=X_umap[:, 0],         # Color by dimension 1
+        s=10,                   # Point size
+        alpha=0.7,              # Transparency
+        cmap='Spectral'         # Color map
+    )
+    plt.title('Player Distribution by Technical Characteristics (UMAP)', fontsize=16)
+    plt.xlabel('UMAP Dimension 1', fontsize=12)
+    plt.ylabel('UMAP Dimension 2', fontsize=12)
+    plt.grid(alpha=0.3)
+    plt.colorbar(label='Density')
+    plt.savefig('umap_visualization.png', dpi=300, bbox_inches='tight')
+    plt.close()
+    return reducer, X_umap
+
+# Determine optimal number of clusters------------------------------------------------------------------------------------------------------------
+# Xác định số cụm tối ưu------------------------------------------------------------------------------------------------------------
+def sweep(X_umap, k_values=K_VALUES, random_state=RANDOM_STATE):
+    """Fit every k in parallel (see cluster_selection) and save the score charts.
+    Returns (scores indexed by k, {k: fitted KMeans}).
+    Huấn luyện mọi k song song (xem cluster_selection) và lưu các biểu đồ điểm số.
+    Trả về (điểm số theo k, {k: mô hình KMeans đã huấn luyện})."""
+    from cluster_selection import SILHOUETTE_SAMPLE_SIZE, sweep_kmeans
+
+    # Pairwise distances are computed once and shared by every silhouette,
+    # on a fixed sample of SILHOUETTE_SAMPLE_SIZE points for large data
+    # Khoảng cách từng cặp được tính một lần và dùng chung cho mọi silhouette,
+    # trên một mẫu cố định SILHOUETTE_SAMPLE_SIZE điểm khi dữ liệu lớn
+    scores, models = sweep_kmeans(X_umap, k_values, sample_size=SILHOUETTE_SAMPLE_SIZE, random_state=random_state)
+    for n_clusters, row in scores.iterrows():
+        print(f"With n_clusters = {n_clusters}:")
+        print(f"  - Silhouette Score: {row['silhouette']:.3f}")
+        print(f"  - Davies-Bouldin Score: {row['davies_bouldin']:.3f}")
+
+    # Plot Elbow chart--------------------------------------------------------------------
+    # Vẽ biểu đồ Elbow--------------------------------------------------------------------
+    plt = pyplot()
+    plt.figure(figsize=(12, 5))
+    plt.subplot(1, 2, 1)
+    plt.plot(scores.index, scores['silhouette'], 'bo-')
+    plt.xlabel('Number of clusters')
+    plt.ylabel('Silhouette Score')
+    plt.title('Silhouette Score')
+
+    plt.subplot(1, 2, 2)
+    plt.plot(scores.index, scores['davies_bouldin'], 'ro-')
+    plt.xlabel('Number of clusters')
+    plt.ylabel('Davies-Bouldin Score')
+    plt.title('Davies-Bouldin Score (lower is better)')
+
+    plt.tight_layout()
+    plt.savefig('cluster_scores.png', dpi=300, bbox_inches='tight')
+    plt.close()
+
+    # Export Silhouette Score plot separately
+    plt.figure(figsize=(8, 6))
+    plt.plot(scores.index, scores['silhouette'], 'bo-')
+    plt.xlabel('Number of clusters')
+    plt.ylabel('Silhouette Score')
+    plt.title('Silhouette Score for Optimal Cluster Selection')
+    plt.grid(True)
+    plt.savefig('silhouette_score.png', dpi=300, bbox_inches='tight')
+    plt.close()
+
+    # Export Davies-Bouldin Score plot separately
+    plt.figure(figsize=(8, 6))
+    plt.plot(scores.index, scores['davies_bouldin'], 'ro-')
+    plt.xlabel('Number of clusters')
+    plt.ylabel('Davies-Bouldin Score')
+    plt.title('Davies-Bouldin Score for Optimal Cluster Selection\n(lower is better)')
+    plt.grid(True)
+    plt.savefig('davies_bouldin_score.png', dpi=300, bbox_inches='tight')
+    plt.close()
+    return scores, models
 
 # Cluster using KMeans with optimal number of clusters------------------------------------------------
 # Phân cụm bằng KMeans với số cụm tối ưu------------------------------------------------
-kmeans = KMeans(
-    n_clusters=optimal_clusters,
-    random_state=42,
-    n_init=10
-)
-labels = kmeans.fit_predict(X_umap)
-centroids = kmeans.cluster_centers_
-
-# Visualize clustering results-------------------------------------------------------------------
-# Trực quan hóa kết quả-------------------------------------------------------------------
-plt.figure(figsize=(12, 8))
-cmap = plt.cm.get_cmap('tab20', optimal_clusters)
-
-# Draw convex hull for each cluster---------------------------------------------------------------
-# Vẽ convex hull cho mỗi cụm---------------------------------------------------------------
-for cluster in np.unique(labels):
-    cluster_points = X_umap[labels == cluster]
-    if len(cluster_points) > 2:  # ConvexHull needs at least 3 points
-        hull = ConvexHull(cluster_points)
-        plt.fill(cluster_points[hull.vertices, 0],
-                cluster_points[hull.vertices, 1],
-                alpha=0.1, color=cmap(cluster))
-
-# Plot points---------------------------------------------------------------------------
-# Vẽ các điểm---------------------------------------------------------------------------
-scatter = plt.scatter(
-    X_umap[:, 0], X_umap[:, 1],
-    c=labels, cmap=cmap,
-    s=30, alpha=0.8,
-    edgecolor='white', linewidth=0.5
-)
-
-# Plot centroids----------------------------------------------------------------------------
-# Vẽ centroid----------------------------------------------------------------------------
-plt.scatter(
-    centroids[:, 0], centroids[:, 1],
-    marker='*', s=400,
-    c='red', edgecolor='black',
-    linewidth=1.5, label='Centroids'
-)
-
-# Add cluster labels-------------------------------------------------------------------
-# Thêm nhãn cho các cụm-------------------------------------------------------------------
-for i, (x, y) in enumerate(centroids):
-    plt.annotate(
-        f"C{i}\n({sum(labels==i)})",
-        (x, y), xytext=(0, 10),
-        textcoords="offset points",
-        ha='center', fontsize=9,
-        weight='bold', color='black'
+def cluster(X_umap, scores, models, criterion='silhouette'):
+    """Pick the best k of the sweep, keep its fitted model and save kmeans_clusters.png.
+    Chọn k tốt nhất của lần quét, giữ lại mô hình đã huấn luyện và lưu kmeans_clusters.png."""
+    from cluster_selection import best_k
+    from scipy.spatial import ConvexHull
+
+    optimal_clusters = best_k(scores, criterion)
+    print(f"\nOptimal number of clusters selected: {optimal_clusters}")
+
+    # Reuse the KMeans model already fitted for the optimal number of clusters
+    # Dùng lại mô hình KMeans đã huấn luyện với số cụm tối ưu
+    kmeans = models[optimal_clusters]
+    labels = kmeans.labels_
+    centroids = kmeans.cluster_centers_
+
+    # Visualize clustering results-------------------------------------------------------------------
+    # Trực quan hóa kết quả-------------------------------------------------------------------
+    plt = pyplot()
+    plt.figure(figsize=(12, 8))
+    cmap = plt.get_cmap('tab20', optimal_clusters)
+
+    # Draw convex hull for each cluster
+    # Vẽ convex hull cho mỗi cụm
+    for cluster_id in np.unique(labels):
+        cluster_points = X_umap[labels == cluster_id]
+        if len(cluster_points) > 2:  # ConvexHull needs at least 3 points
+            hull = ConvexHull(cluster_points)
+            plt.fill(cluster_points[hull.vertices, 0],
+                     cluster_points[hull.vertices, 1],
+                     alpha=0.1, color=cmap(cluster_id))
+
+    # Plot points
+    # Vẽ các điểm
+    scatter = plt.scatter(
+        X_umap[:, 0], X_umap[:, 1],
+        c=labels, cmap=cmap,
+        s=30, alpha=0.8,
+        edgecolor='white', linewidth=0.5
     )
 
-# Calculate evaluation metrics-----------------------------------------------------------
-# Tính toán các chỉ số đánh giá-----------------------------------------------------------
-metrics = {
-    "Silhouette": silhouette_score(X_umap, labels),
-    "Davies-Bouldin": davies_bouldin_score(X_umap, labels),
-    "Calinski-Harabasz": calinski_harabasz_score(X_umap, labels)
-}
-
-# Display parameters------------------------------------------------------------------------
-# Hiển thị thông số------------------------------------------------------------------------
-plt.title(f'Player Clustering with KMeans (Silhouette: {metrics["Silhouette"]:.2f})', fontsize=16)
-plt.colorbar(scatter, label='Cluster ID')
-plt.grid(alpha=0.1)
-plt.tight_layout()
-plt.savefig('kmeans_clusters.png', dpi=300)
-plt.show()
+    # Plot centroids
+    # Vẽ centroid
+    plt.scatter(
+        centroids[:, 0], centroids[:, 1],
+        marker='*', s=400,
+        c='red', edgecolor='black',
+        linewidth=1.5, label='Centroids'
+    )
+
+    # Add cluster labels
+    # Thêm nhãn cho các cụm
+    for i, (x, y) in enumerate(centroids):
+        plt.annotate(
+            f"C{i}\n({sum(labels == i)})",
+            (x, y), xytext=(0, 10),
+            textcoords="offset points",
+            ha='center', fontsize=9,
+            weight='bold', color='black'
+        )
+
+    # Evaluation metrics were already computed during the sweep
+    # Các chỉ số đánh giá đã được tính trong lần quét
+    plt.title(f'Player Clustering with KMeans (Silhouette: {scores.loc[optimal_clusters, "silhouette"]:.2f})', fontsize=16)
+    plt.colorbar(scatter, label='Cluster ID')
+    plt.grid(alpha=0.1)
+    plt.tight_layout()
+    plt.savefig('kmeans_clusters.png', dpi=300)
+    plt.close()
+    return kmeans, labels
 
 # Analyze cluster characteristics-------------------------------------------------------------------
 # Phân tích đặc trưng cụm-------------------------------------------------------------------
-data['Cluster'] = labels
-for cluster in np.unique(labels):
-    cluster_data = filtered_data[labels == cluster]
-    print(f"\nCluster {cluster} ({len(cluster_data)} players):")
-    
-    # Top 5 distinctive features
-    # Top 5 đặc trưng nổi bật
-    top_features = cluster_data.mean().sort_values(ascending=False).head(5)
-    for feat, val in top_features.items():
-        print(f"- {feat}: {val:.2f} ({val/filtered_data[feat].mean():.1f}x average)")
-    
-    # Top 3 representative players (closest to centroid)
-    # Top 3 cầu thủ tiêu biểu (gần centroid nhất)
-    distances = np.linalg.norm(X_umap[labels == cluster] - centroids[cluster], axis=1)
-    print("Representatives:", ', '.join(data[labels == cluster].iloc[np.argsort(distances)[:3]]['Name'].values))
+def profile(names, filtered_data, X_umap, labels, centroids=None):
+    """Print the top features and the three most representative players of each cluster.
+    Without centroids the mean UMAP position of each cluster is used.
+    In các đặc trưng nổi bật và ba cầu thủ tiêu biểu nhất của từng cụm.
+    Khi không có centroid, vị trí UMAP trung bình của từng cụm được dùng."""
+    names = np.asarray(names)
+    overall_mean = filtered_data.mean()
+
+    # Density-based clustering labels noise points -1: they are reported apart from the clusters
+    # Phân cụm theo mật độ gán nhãn -1 cho điểm nhiễu: chúng được báo cáo tách khỏi các cụm
+    noise = labels == -1
+    if noise.any():
+        print(f"\nNoise ({noise.sum()} players, not assigned to any cluster): {', '.join(names[noise][:10])}"
+              + (', ...' if noise.sum() > 10 else ''))
+
+    for cluster_id in np.unique(labels[~noise]):
+        members = labels == cluster_id
+        cluster_data = filtered_data[members]
+        print(f"\nCluster {cluster_id} ({len(cluster_data)} players):")
+
+        # Top 5 distinctive features
+        # Top 5 đặc trưng nổi bật
+        top_features = cluster_data.mean().sort_values(ascending=False).head(5)
+        for feat, val in top_features.items():
+            print(f"- {feat}: {val:.2f} ({val/overall_mean[feat]:.1f}x average)")
+
+        # Top 3 representative players (closest to centroid)
+        # Top 3 cầu thủ tiêu biểu (gần centroid nhất)
+        center = X_umap[members].mean(axis=0) if centroids is None else centroids[cluster_id]
+        distances = np.linalg.norm(X_umap[members] - center, axis=1)
+        print("Representatives:", ', '.join(names[members][np.argsort(distances)[:3]]))
+
+# Density-based clustering (HDBSCAN)-------------------------------------------------------------
+# Phân cụm theo mật độ (HDBSCAN)-------------------------------------------------------------
+def density(X, X_umap, min_cluster_sizes=None, min_samples_values=None, cache_dir=None):
+    """Sweep HDBSCAN parameters on X (the UMAP coordinates or the scaled features), keep the most valid
+    clustering and save hdbscan_clusters.png. Returns (clusterer, scores).
+    Quét tham số HDBSCAN trên X (tọa độ UMAP hoặc đặc trưng chuẩn hóa), giữ cách phân cụm hợp lệ nhất
+    và lưu hdbscan_clusters.png. Trả về (clusterer, điểm số)."""
+    import density_clustering as dc
+
+    scores, models = dc.sweep_hdbscan(
+        X,
+        min_cluster_sizes or dc.MIN_CLUSTER_SIZES,
+        min_samples_values or dc.MIN_SAMPLES_VALUES,
+        cache_dir or dc.DEFAULT_GRAPH_CACHE
+    )
+    clusterer = models[dc.best_params(scores)]
+    labels = clusterer.labels_
+    print(f"\nSelected min_samples={clusterer.min_samples}, min_cluster_size={clusterer.min_cluster_size}")
+
+    plt = pyplot()
+    plt.figure(figsize=(12, 8))
+    noise = labels == dc.NOISE_LABEL
+    plt.scatter(X_umap[noise, 0], X_umap[noise, 1], c='lightgrey', s=15, alpha=0.6, label='Noise')
+    scatter = plt.scatter(
+        X_umap[~noise, 0], X_umap[~noise, 1],
+        c=labels[~noise], cmap='tab20',
+        s=30, alpha=np.clip(clusterer.probabilities_[~noise], 0.2, 1.0),
+        edgecolor='white', linewidth=0.5
+    )
+    plt.title(f'Player Clustering with HDBSCAN ({labels.max() + 1} clusters, {noise.sum()} noise)', fontsize=16)
+    plt.colorbar(scatter, label='Cluster ID')
+    plt.legend()
+    plt.grid(alpha=0.1)
+    plt.tight_layout()
+    plt.savefig('hdbscan_clusters.png', dpi=300)
+    plt.close()
+    return clusterer, scores
+
+def run_density_pipeline(input_path=None, space='umap', min_cluster_sizes=None, min_samples_values=None,
+                         cache_dir=None, random_state=RANDOM_STATE):
+    """load, impute, scale, embed, then HDBSCAN on the chosen space instead of the KMeans sweep;
+    results are written in the kmeans_cluster_results.csv layout to hdbscan_cluster_results.csv.
+    Đọc, điền thiếu, chuẩn hóa, nhúng, rồi HDBSCAN trên không gian được chọn thay cho quét KMeans;
+    kết quả được ghi theo bố cục kmeans_cluster_results.csv vào hdbscan_cluster_results.csv."""
+    import density_clustering as dc
+
+    timings = {}
+    start = time.perf_counter()
+    data = load(input_path)
+    filtered_data, _ = impute(data)
+    _, X_scaled = scale(filtered_data)
+    _, X_umap = embed(X_scaled, data['Name'], random_state)
+    timings['embedding_seconds'] = round(time.perf_counter() - start, 3)
+
+    start = time.perf_counter()
+    clusterer, scores = density(X_umap if space == 'umap' else X_scaled, X_umap,
+                                min_cluster_sizes, min_samples_values, cache_dir)
+    timings['sweep_seconds'] = round(time.perf_counter() - start, 3)
+
+    profile(data['Name'], filtered_data, X_umap, clusterer.labels_)
+    summary = {
+        'space': space,
+        'random_state': random_state,
+        'min_samples': clusterer.min_samples,
+        'min_cluster_size': clusterer.min_cluster_size,
+        'timings': timings,
+        'sweep': scores.to_dict(orient='records')
+    }
+    summary.update(dc.describe(clusterer))
+    return dc.export_density_clusters(data['Name'], clusterer, X_umap, filtered_data, summary)
 
 # Save results---------------------------------------------------------------------------------
 # Lưu kết quả---------------------------------------------------------------------------------
-output = pd.concat([
-    data[['Name', 'Cluster']],
-    pd.DataFrame(X_umap, columns=['UMAP1', 'UMAP2']),
-    filtered_data
-], axis=1)
-output.to_csv('kmeans_cluster_results.csv', index=False)
\ No newline at end of file
+def export(data, labels, X_umap, filtered_data, path=CLUSTER_RESULTS_FILE):
+    output = pd.concat([
+        pd.DataFrame({'Name': data['Name'].to_numpy(), 'Cluster': labels}),
+        pd.DataFrame(X_umap, columns=['UMAP1', 'UMAP2']),
+        filtered_data.reset_index(drop=True)
+    ], axis=1)
+    output.to_csv(path, index=False)
+    return output
+
+def load_cluster_results(path=CLUSTER_RESULTS_FILE):
+    """Names, features, UMAP coordinates and labels back from a saved kmeans_cluster_results.csv.
+    Tên, đặc trưng, tọa độ UMAP và nhãn cụm đọc lại từ file kmeans_cluster_results.csv đã lưu."""
+    results = pd.read_csv(path)
+    features = results[[col for col in required_cols if col in results.columns]]
+    return results['Name'], features, results[['UMAP1', 'UMAP2']].to_numpy(), results['Cluster'].to_numpy()
+
+# -----------------------------------------
+def run_pipeline(input_path=None, k_values=K_VALUES, criterion='silhouette', random_state=RANDOM_STATE):
+    """Every stage in order: load, impute, scale, embed, sweep, cluster, profile, export, then save
+    the player map and the similar-player index. Returns the exported cluster results.
+    Mọi bước theo thứ tự: đọc, điền thiếu, chuẩn hóa, nhúng, quét, phân cụm, phân tích, xuất, rồi lưu
+    bản đồ cầu thủ và chỉ mục cầu thủ tương đồng. Trả về kết quả phân cụm đã xuất."""
+    from player_map import DEFAULT_MODEL_FILE, PlayerMap
+    from similar_players import DEFAULT_INDEX_FILE, SimilarPlayerIndex
+
+    data = load(input_path)
+    filtered_data, fill_values = impute(data)
+    scaler, X_scaled = scale(filtered_data)
+    reducer, X_umap = embed(X_scaled, data['Name'], random_state)
+
+    # Build and save the similar-player index over the scaled features and the UMAP coordinates
+    # Dựng và lưu chỉ mục cầu thủ tương đồng trên các đặc trưng chuẩn hóa và tọa độ UMAP
+    SimilarPlayerIndex.build(data, X_scaled, X_umap).save(DEFAULT_INDEX_FILE)
+
+    scores, models = sweep(X_umap, k_values, random_state)
+    kmeans, labels = cluster(X_umap, scores, models, criterion)
+
+    # Save the fitted scaler, UMAP reducer and KMeans model so new players can be placed with player_map.py
+    # Lưu scaler, UMAP và KMeans đã huấn luyện để đặt cầu thủ mới bằng player_map.py
+    PlayerMap(required_cols, fill_values, scaler, reducer, kmeans, random_state).save(DEFAULT_MODEL_FILE)
+
+    profile(data['Name'], filtered_data, X_umap, labels, kmeans.cluster_centers_)
+    return export(data, labels, X_umap, filtered_data)
+
+# -----------------------------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Task 3 player clustering pipeline / Quy trình phân cụm cầu thủ task 3')
+    subcommands = parser.add_subparsers(dest='command')
+
+    run = subcommands.add_parser('run', help='run every stage and save all outputs (default)')
+    run.add_argument('--input', help='players CSV (default: results.parquet or results.csv)')
+    run.add_argument('--k-min', type=int, default=K_VALUES.start)
+    run.add_argument('--k-max', type=int, default=K_VALUES.stop - 1)
+    run.add_argument('--criterion', choices=['silhouette', 'davies_bouldin', 'calinski_harabasz'], default='silhouette')
+    run.add_argument('--seed', type=int, default=RANDOM_STATE, help='seed of UMAP and KMeans (default: %(default)s)')
+
+    sweep_parser = subcommands.add_parser('sweep', help='score every k on the UMAP coordinates of umap_results_clean.csv')
+    sweep_parser.add_argument('--k-min', type=int, default=K_VALUES.start)
+    sweep_parser.add_argument('--k-max', type=int, default=K_VALUES.stop - 1)
+
+    profile_parser = subcommands.add_parser('profile', help='describe the clusters of a saved kmeans_cluster_results.csv '
+                                                             '(or hdbscan_cluster_results.csv)')
+    profile_parser.add_argument('--results', default=CLUSTER_RESULTS_FILE)
+
+    density_parser = subcommands.add_parser('density', help='cluster with HDBSCAN instead of KMeans (noise reported separately)')
+    density_parser.add_argument('--input', help='players CSV (default: results.parquet or results.csv)')
+    density_parser.add_argument('--space', choices=['umap', 'features'], default='umap',
+                                help='cluster the UMAP coordinates or the scaled features')
+    density_parser.add_argument('--min-cluster-size', type=int, nargs='+', help='values to sweep')
+    density_parser.add_argument('--min-samples', type=int, nargs='+', help='values to sweep')
+    density_parser.add_argument('--cache-dir', help='cache of the core distances and spanning trees')
+    density_parser.add_argument('--seed', type=int, default=RANDOM_STATE, help='seed of UMAP (default: %(default)s)')
+
+    transform = subcommands.add_parser('transform', help='place new players on the saved player map')
+    transform.add_argument('input')
+    transform.add_argument('--output', default='player_map_assignments.csv')
+
+    similar = subcommands.add_parser('similar', help='find the players most similar to the given names')
+    similar.add_argument('names', nargs='+')
+    similar.add_argument('-k', type=int, default=10)
+    similar.add_argument('--position')
+
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    command = args.command or 'run'
+
+    if command == 'run':
+        k_values = range(args.k_min, args.k_max + 1) if args.command else K_VALUES
+        run_pipeline(getattr(args, 'input', None), k_values, getattr(args, 'criterion', 'silhouette'),
+                     getattr(args, 'seed', RANDOM_STATE))
+    elif command == 'sweep':
+        X_umap = pd.read_csv('umap_results_clean.csv')[['UMAP1', 'UMAP2']].to_numpy()
+        sweep(X_umap, range(args.k_min, args.k_max + 1))
+    elif command == 'density':
+        run_density_pipeline(args.input, args.space, args.min_cluster_size, args.min_samples, args.cache_dir,
+                             args.seed)
+    elif command == 'profile':
+        profile(*load_cluster_results(args.results))
+    elif command == 'transform':
+        from player_map import PlayerMap
+        result = PlayerMap.load().transform(pd.read_csv(args.input))
+        result.to_csv(args.output, index=False)
+        print(f"Placed {len(result)} players, written to {args.output}")
+    elif command == 'similar':
+        from similar_players import SimilarPlayerIndex
+        print(SimilarPlayerIndex.load().query(args.names, args.k, position=args.position).to_string(index=False))
+
+if __name__ == '__main__':
+    main()
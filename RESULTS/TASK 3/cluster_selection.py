@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.cluster import KMeans
+from sklearn.metrics import calinski_harabasz_score, davies_bouldin_score, pairwise_distances
+
+# -----------------------------------------
+# Above this many points the silhouette is computed on a fixed random sample of the points
+# Khi số điểm vượt ngưỡng này, silhouette được tính trên một mẫu ngẫu nhiên cố định
+SILHOUETTE_SAMPLE_SIZE = 5000
+RANDOM_STATE = 42
+N_INIT = 10
+
+# -----------------------------------------
+def silhouette_from_distances(distances, labels):
+    """Mean silhouette from a precomputed distance matrix, for every cluster at once.
+    One matrix product gives the summed distance of each point to each cluster, so the same
+    matrix can be reused for every k of a sweep.
+    Silhouette trung bình từ ma trận khoảng cách tính sẵn, cho mọi cụm cùng lúc.
+    Một phép nhân ma trận cho tổng khoảng cách từ mỗi điểm tới từng cụm, nên cùng một ma trận
+    được dùng lại cho mọi k của lần quét."""
+    clusters, codes = np.unique(labels, return_inverse=True)
+    if not 1 < len(clusters) < len(labels):
+        return np.nan
+    one_hot = np.zeros((len(labels), len(clusters)), dtype=distances.dtype)
+    one_hot[np.arange(len(labels)), codes] = 1
+    sums = distances @ one_hot
+    sizes = one_hot.sum(axis=0)
+
+    rows = np.arange(len(labels))
+    own_size = sizes[codes]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        a = sums[rows, codes] / (own_size - 1)
+        mean_other = sums / sizes
+    mean_other[rows, codes] = np.inf
+    b = mean_other.min(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        s = (b - a) / np.maximum(a, b)
+    # Points alone in their cluster score 0, as in scikit-learn
+    # Điểm đứng một mình trong cụm có điểm 0, giống scikit-learn
+    s[own_size == 1] = 0
+    return float(np.nanmean(s))
+
+def _evaluate_k(X, distances, sample, k, random_state, n_init):
+    model = KMeans(n_clusters=k, random_state=random_state, n_init=n_init).fit(X)
+    labels = model.labels_
+    scores = {
+        'k': k,
+        'silhouette': silhouette_from_distances(distances, labels[sample]),
+        'davies_bouldin': davies_bouldin_score(X, labels),
+        'calinski_harabasz': calinski_harabasz_score(X, labels),
+        'inertia': model.inertia_
+    }
+    return scores, model
+
+# -----------------------------------------
+def sweep_kmeans(X, k_values, sample_size=SILHOUETTE_SAMPLE_SIZE, n_jobs=-1,
+                 random_state=RANDOM_STATE, n_init=N_INIT):
+    """Fit KMeans for every k in parallel and score each fit.
+    Pairwise distances are computed once, on all points or on a fixed sample above sample_size,
+    and shared by every k. Returns (scores DataFrame indexed by k, {k: fitted KMeans}), so the
+    winning model is kept instead of being fitted again.
+    Huấn luyện KMeans song song cho mọi k và chấm điểm từng lần huấn luyện.
+    Khoảng cách từng cặp được tính một lần, trên mọi điểm hoặc trên một mẫu cố định khi vượt sample_size,
+    và dùng chung cho mọi k. Trả về (DataFrame điểm số theo k, {k: mô hình KMeans đã huấn luyện}),
+    nên mô hình tốt nhất được giữ lại thay vì huấn luyện lại."""
+    X = np.asarray(X, dtype='float64')
+    if sample_size and len(X) > sample_size:
+        sample = np.sort(np.random.default_rng(random_state).choice(len(X), sample_size, replace=False))
+    else:
+        sample = np.arange(len(X))
+    distances = pairwise_distances(X[sample], n_jobs=n_jobs)
+
+    # joblib memory-maps the large shared arrays, so each worker reads the same distance matrix
+    # joblib ánh xạ bộ nhớ các mảng lớn dùng chung, nên mọi tiến trình đọc cùng một ma trận khoảng cách
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate_k)(X, distances, sample, k, random_state, n_init) for k in k_values
+    )
+    scores = pd.DataFrame([row for row, _ in results]).set_index('k')
+    models = {row['k']: model for row, model in results}
+    return scores, models
+
+def best_k(scores, criterion='silhouette'):
+    """k with the best score: highest silhouette or Calinski-Harabasz, lowest Davies-Bouldin.
+    k có điểm tốt nhất: silhouette hoặc Calinski-Harabasz cao nhất, Davies-Bouldin thấp nhất."""
+    column = scores[criterion]
+    return int(column.idxmin() if criterion == 'davies_bouldin' else column.idxmax())
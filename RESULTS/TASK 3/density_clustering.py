@@ -0,0 +1,116 @@
+import json
+import time
+
+import hdbscan
+import numpy as np
+import pandas as pd
+from joblib import Memory
+
+# -----------------------------------------
+# On-disk cache of the core distances and minimum spanning trees computed by HDBSCAN
+# Bộ nhớ đệm trên đĩa của khoảng cách lõi và cây khung nhỏ nhất do HDBSCAN tính
+DEFAULT_GRAPH_CACHE = 'hdbscan_cache'
+
+MIN_CLUSTER_SIZES = (5, 10, 15, 20, 30)
+# Fixed rather than None: HDBSCAN would otherwise use min_cluster_size as min_samples,
+# so every fit of a sweep would need its own spanning tree and nothing would be reused
+# Cố định thay vì None: nếu không HDBSCAN sẽ dùng min_cluster_size làm min_samples,
+# nên mỗi lần huấn luyện của lần quét cần cây khung riêng và không gì được dùng lại
+MIN_SAMPLES_VALUES = (5,)
+
+DENSITY_RESULTS_FILE = 'hdbscan_cluster_results.csv'
+DENSITY_SUMMARY_FILE = 'hdbscan_cluster_summary.json'
+NOISE_LABEL = -1
+
+# -----------------------------------------
+def fit_hdbscan(X, min_cluster_size, min_samples=None, cache_dir=DEFAULT_GRAPH_CACHE, selection='eom'):
+    """Fit HDBSCAN and return (clusterer, seconds).
+    The mutual-reachability minimum spanning tree depends only on the data and min_samples,
+    and is cached in cache_dir: fits that change only min_cluster_size or the selection method
+    reuse it, in this run and in later ones.
+    Huấn luyện HDBSCAN và trả về (clusterer, số giây).
+    Cây khung nhỏ nhất theo khoảng cách tiếp cận tương hỗ chỉ phụ thuộc dữ liệu và min_samples,
+    và được lưu đệm trong cache_dir: các lần huấn luyện chỉ đổi min_cluster_size hoặc cách chọn cụm
+    dùng lại nó, trong lần chạy này và các lần chạy sau."""
+    start = time.perf_counter()
+    clusterer = hdbscan.HDBSCAN(
+        min_cluster_size=min_cluster_size,
+        min_samples=min_samples,
+        cluster_selection_method=selection,
+        gen_min_span_tree=True,     # Needed for the relative validity (DBCV) score
+        memory=Memory(cache_dir, verbose=0),
+        core_dist_n_jobs=-1
+    ).fit(X)
+    return clusterer, time.perf_counter() - start
+
+def describe(clusterer):
+    """Cluster count, noise count and relative validity of a fitted clusterer.
+    Số cụm, số điểm nhiễu và độ hợp lệ tương đối của một clusterer đã huấn luyện."""
+    labels = clusterer.labels_
+    n_clusters = len(set(labels) - {NOISE_LABEL})
+    return {
+        'n_clusters': n_clusters,
+        'noise': int((labels == NOISE_LABEL).sum()),
+        'noise_fraction': float((labels == NOISE_LABEL).mean()),
+        # DBCV is undefined with fewer than two clusters
+        # DBCV không xác định khi có ít hơn hai cụm
+        'relative_validity': float(clusterer.relative_validity_) if n_clusters > 1 else np.nan
+    }
+
+def sweep_hdbscan(X, min_cluster_sizes=MIN_CLUSTER_SIZES, min_samples_values=MIN_SAMPLES_VALUES,
+                  cache_dir=DEFAULT_GRAPH_CACHE):
+    """Fit every (min_samples, min_cluster_size) pair, grouped by min_samples so each graph is built once.
+    A min_samples of None is replaced by the smallest min_cluster_size, so it still shares one graph.
+    Returns (scores DataFrame, {(min_samples, min_cluster_size): clusterer}).
+    Huấn luyện mọi cặp (min_samples, min_cluster_size), nhóm theo min_samples để mỗi đồ thị chỉ dựng một lần.
+    min_samples bằng None được thay bằng min_cluster_size nhỏ nhất, để vẫn dùng chung một đồ thị.
+    Trả về (DataFrame điểm số, {(min_samples, min_cluster_size): clusterer})."""
+    rows, models = [], {}
+    resolved = dict.fromkeys(min(min_cluster_sizes) if value is None else value for value in min_samples_values)
+    for min_samples in resolved:
+        for min_cluster_size in min_cluster_sizes:
+            clusterer, seconds = fit_hdbscan(X, min_cluster_size, min_samples, cache_dir)
+            row = {'min_samples': min_samples, 'min_cluster_size': min_cluster_size, 'seconds': round(seconds, 4)}
+            row.update(describe(clusterer))
+            rows.append(row)
+            models[(min_samples, min_cluster_size)] = clusterer
+            print(f"min_samples={min_samples}, min_cluster_size={min_cluster_size}: "
+                  f"{row['n_clusters']} clusters, {row['noise']} noise, "
+                  f"validity {row['relative_validity']:.3f} ({seconds:.2f}s)")
+    return pd.DataFrame(rows), models
+
+def best_params(scores):
+    """(min_samples, min_cluster_size) with the highest relative validity.
+    (min_samples, min_cluster_size) có độ hợp lệ tương đối cao nhất."""
+    best = scores.loc[scores['relative_validity'].fillna(-np.inf).idxmax()]
+    return int(best['min_samples']), int(best['min_cluster_size'])
+
+def clusters_at_level(clusterer, cut_distance, min_cluster_size=None):
+    """Flat DBSCAN-like clusters cut from the cached single-linkage tree at a mutual-reachability distance,
+    without recomputing any distances.
+    Các cụm phẳng kiểu DBSCAN cắt từ cây liên kết đơn đã có tại một khoảng cách tiếp cận tương hỗ,
+    không phải tính lại khoảng cách nào."""
+    size = clusterer.min_cluster_size if min_cluster_size is None else min_cluster_size
+    return clusterer.single_linkage_tree_.get_clusters(cut_distance, min_cluster_size=size)
+
+# -----------------------------------------
+def export_density_clusters(names, clusterer, X_umap, filtered_data, summary, path=DENSITY_RESULTS_FILE,
+                            summary_path=DENSITY_SUMMARY_FILE):
+    """Write the clusters in the kmeans_cluster_results.csv layout (noise has Cluster -1), plus a Probability
+    column, and a JSON summary with the chosen parameters, timings and the noise players.
+    Ghi các cụm theo bố cục của kmeans_cluster_results.csv (điểm nhiễu có Cluster -1), thêm cột Probability,
+    cùng một bản tóm tắt JSON gồm tham số được chọn, thời gian và các cầu thủ nhiễu."""
+    output = pd.concat([
+        pd.DataFrame({'Name': np.asarray(names), 'Cluster': clusterer.labels_}),
+        pd.DataFrame(X_umap, columns=['UMAP1', 'UMAP2']),
+        filtered_data.reset_index(drop=True)
+    ], axis=1)
+    output['Probability'] = clusterer.probabilities_
+    output.to_csv(path, index=False)
+
+    noise = output.loc[output['Cluster'] == NOISE_LABEL, 'Name']
+    summary = dict(summary, noise_players=noise.tolist())
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+    print(f"{len(noise)} noise players reported separately in {summary_path}")
+    return output
@@ -0,0 +1,93 @@
+import argparse
+import time
+
+import joblib
+import pandas as pd
+
+# -----------------------------------------
+# Default location of the fitted scaler + UMAP + KMeans artifact
+# Vị trí mặc định của bộ mô hình scaler + UMAP + KMeans đã huấn luyện
+DEFAULT_MODEL_FILE = 'player_map.joblib'
+
+# -----------------------------------------
+class PlayerMap:
+    """Fitted preprocessing, UMAP embedding and KMeans clusters of task 3, saved as one artifact.
+    The full embedding job fits it once; transform() then places new or updated players on the same map
+    and assigns them to the existing clusters without refitting anything.
+    Tiền xử lý, phép nhúng UMAP và các cụm KMeans đã huấn luyện của task 3, lưu thành một bộ mô hình.
+    Công việc nhúng đầy đủ huấn luyện nó một lần; transform() sau đó đặt cầu thủ mới hoặc được cập nhật
+    lên cùng bản đồ và gán vào các cụm có sẵn mà không huấn luyện lại."""
+
+    def __init__(self, columns, fill_values, scaler, reducer, kmeans, random_state=None):
+        self.columns = list(columns)
+        # Training medians used to fill missing values, so new rows are preprocessed exactly like the training rows
+        # Trung vị của dữ liệu huấn luyện dùng để điền giá trị thiếu, để dòng mới được xử lý giống hệt lúc huấn luyện
+        self.fill_values = pd.Series(fill_values, dtype='float64').reindex(self.columns)
+        self.scaler = scaler
+        self.reducer = reducer
+        self.kmeans = kmeans
+        # Seed of the UMAP and KMeans fits: maps fitted with the same seed on the same data are identical
+        # Hạt giống của UMAP và KMeans: các bản đồ huấn luyện cùng hạt giống trên cùng dữ liệu là giống hệt nhau
+        self.random_state = random_state
+        self.fitted_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    # -----------------------------------------
+    def preprocess(self, data):
+        """Select the model columns, convert 'N/a' and text to numbers and fill gaps with the training medians.
+        Chọn các cột của mô hình, chuyển 'N/a' và chuỗi thành số và điền chỗ trống bằng trung vị huấn luyện."""
+        features = data.reindex(columns=self.columns).replace('N/a', pd.NA)
+        features = features.apply(pd.to_numeric, errors='coerce').astype('float64')
+        return features.fillna(self.fill_values)
+
+    def transform(self, data):
+        """UMAP coordinates and cluster of each row, as a DataFrame with UMAP1, UMAP2 and Cluster.
+        The first call in a fresh process spends tens of seconds compiling UMAP's numba code;
+        later calls in the same process take milliseconds, so keep one process alive for many lookups.
+        Tọa độ UMAP và cụm của từng dòng, dưới dạng DataFrame gồm UMAP1, UMAP2 và Cluster.
+        Lần gọi đầu tiên trong một tiến trình mới mất hàng chục giây để biên dịch mã numba của UMAP;
+        các lần gọi sau trong cùng tiến trình chỉ mất vài mili giây, nên hãy giữ một tiến trình cho nhiều lần tra cứu."""
+        # UMAP returns float32 but KMeans was fitted on float64 coordinates (see cluster_selection)
+        # UMAP trả về float32 nhưng KMeans được huấn luyện trên tọa độ float64 (xem cluster_selection)
+        X_umap = self.reducer.transform(self.scaler.transform(self.preprocess(data))).astype('float64')
+        result = pd.DataFrame(X_umap, columns=['UMAP1', 'UMAP2'], index=data.index)
+        result.insert(0, 'Cluster', self.kmeans.predict(X_umap))
+        if 'Name' in data.columns:
+            result.insert(0, 'Name', data['Name'])
+        return result
+
+    # -----------------------------------------
+    def save(self, path=DEFAULT_MODEL_FILE):
+        joblib.dump(self, path)
+        print(f"Player map saved to {path}")
+
+    @staticmethod
+    def load(path=DEFAULT_MODEL_FILE):
+        return joblib.load(path)
+
+# -----------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description='Place new players on the saved task 3 map / Đặt cầu thủ mới lên bản đồ task 3 đã lưu')
+    parser.add_argument('input', help='CSV of new or updated players (same columns as results.csv)')
+    parser.add_argument('--model', default=DEFAULT_MODEL_FILE, help='Saved player map artifact')
+    parser.add_argument('--output', default='player_map_assignments.csv', help='CSV written with UMAP1, UMAP2 and Cluster')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    player_map = PlayerMap.load(args.model)
+    data = pd.read_csv(args.input)
+
+    # Timed separately: the first transform of a process includes the UMAP/numba warm-up
+    # Đo riêng: lần transform đầu tiên của tiến trình gồm cả thời gian khởi động UMAP/numba
+    start = time.perf_counter()
+    result = player_map.transform(data)
+    elapsed = time.perf_counter() - start
+
+    result.to_csv(args.output, index=False)
+    print(f"Placed {len(result)} players with the map fitted at {player_map.fitted_at} "
+          f"(seed {getattr(player_map, 'random_state', None)}) in {elapsed * 1000:.1f} ms "
+          f"(including the one-off UMAP warm-up of a fresh process)")
+    print(result['Cluster'].value_counts().sort_index().to_string())
+
+if __name__ == '__main__':
+    main()
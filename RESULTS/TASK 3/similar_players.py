@@ -0,0 +1,160 @@
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import NearestNeighbors
+
+# -----------------------------------------
+# Default location of the persisted similarity index
+# Vị trí mặc định của chỉ mục tìm kiếm tương đồng đã lưu
+DEFAULT_INDEX_FILE = 'similar_players.joblib'
+
+# Above this many players an approximate NN-descent graph replaces the exact tree
+# Khi số cầu thủ vượt ngưỡng này, đồ thị NN-descent xấp xỉ thay cho cây chính xác
+APPROXIMATE_MIN_PLAYERS = 50_000
+
+# KD-trees lose their advantage in high dimensions, so ball trees are used above this many features
+# KD-tree mất lợi thế ở số chiều cao, nên ball tree được dùng khi số đặc trưng vượt ngưỡng này
+KD_TREE_MAX_DIMENSIONS = 15
+
+METADATA_COLUMNS = ['Name', 'Team', 'Position', 'Age']
+
+# -----------------------------------------
+class _NeighborSearch:
+    """Exact tree (KD or ball) or approximate NN-descent search over one feature space.
+    Tìm kiếm chính xác bằng cây (KD hoặc ball) hoặc xấp xỉ bằng NN-descent trên một không gian đặc trưng."""
+
+    def __init__(self, X):
+        self.X = np.ascontiguousarray(X, dtype='float64')
+        if len(self.X) >= APPROXIMATE_MIN_PLAYERS:
+            # pynndescent is installed together with umap-learn
+            # pynndescent được cài đặt cùng với umap-learn
+            from pynndescent import NNDescent
+            self.method = 'nndescent'
+            self.index = NNDescent(self.X, n_neighbors=30, random_state=42)
+            self.index.prepare()
+        else:
+            self.method = 'kd_tree' if self.X.shape[1] <= KD_TREE_MAX_DIMENSIONS else 'ball_tree'
+            self.index = NearestNeighbors(algorithm=self.method).fit(self.X)
+
+    def neighbors(self, rows, n):
+        """Indices and distances of the n nearest players of the given player rows, closest first.
+        Chỉ số và khoảng cách của n cầu thủ gần nhất với các cầu thủ đã cho, gần nhất trước."""
+        n = min(n, len(self.X))
+        if self.method == 'nndescent':
+            return self.index.query(self.X[rows], k=n)
+        distances, indices = self.index.kneighbors(self.X[rows], n_neighbors=n)
+        return indices, distances
+
+# -----------------------------------------
+def parse_age(age):
+    # fbref ages may be written as "years-days" (e.g. "26-123")
+    # Tuổi trên fbref có thể ở dạng "năm-ngày" (ví dụ "26-123")
+    return pd.to_numeric(age.astype(str).str.split('-').str[0], errors='coerce')
+
+class SimilarPlayerIndex:
+    """Persisted nearest-neighbour index over the scaled task 3 features and the UMAP coordinates.
+    Answers batches of "k most similar players to X" queries, optionally filtered by position, age or team.
+    Chỉ mục láng giềng gần nhất đã lưu trên các đặc trưng chuẩn hóa của task 3 và tọa độ UMAP.
+    Trả lời theo lô các truy vấn "k cầu thủ giống X nhất", có thể lọc theo vị trí, tuổi hoặc đội."""
+
+    def __init__(self, players, spaces):
+        self.players = players.reset_index(drop=True)
+        self.ages = parse_age(self.players['Age']).to_numpy()
+        self.positions = self.players['Position'].astype(str).str.split(',')
+        # A name listed more than once (e.g. a player transferred mid-season) is looked up by its first row
+        # Tên xuất hiện nhiều lần (ví dụ cầu thủ chuyển nhượng giữa mùa) được tra theo dòng đầu tiên
+        first = ~self.players['Name'].duplicated().to_numpy()
+        self.rows_by_name = pd.Series(np.flatnonzero(first), index=self.players['Name'][first])
+        self.searches = {space: _NeighborSearch(X) for space, X in spaces.items()}
+
+    @classmethod
+    def build(cls, data, X_scaled, X_umap):
+        players = data.reindex(columns=METADATA_COLUMNS)
+        return cls(players, {'features': X_scaled, 'umap': X_umap})
+
+    # -----------------------------------------
+    def eligible(self, position=None, min_age=None, max_age=None, team=None):
+        """Boolean mask of the players passing the filters.
+        Mặt nạ boolean của các cầu thủ thỏa các điều kiện lọc."""
+        mask = np.ones(len(self.players), dtype=bool)
+        if position is not None:
+            mask &= self.positions.apply(lambda listed: position in listed).to_numpy()
+        if min_age is not None:
+            mask &= self.ages >= min_age
+        if max_age is not None:
+            mask &= self.ages <= max_age
+        if team is not None:
+            mask &= (self.players['Team'] == team).to_numpy()
+        return mask
+
+    def query(self, names, k=10, space='features', **filters):
+        """k most similar players for each name, as a long DataFrame (Query, Rank, Name, Team, Position, Age, Distance).
+        Neighbours are fetched for the whole batch at once; queries short of k matches after filtering
+        are fetched again with a doubled candidate list.
+        k cầu thủ giống nhất cho mỗi tên, dưới dạng DataFrame dài (Query, Rank, Name, Team, Position, Age, Distance).
+        Láng giềng được lấy cho cả lô một lần; truy vấn chưa đủ k kết quả sau khi lọc
+        được lấy lại với danh sách ứng viên gấp đôi."""
+        names = [names] if isinstance(names, str) else list(names)
+        unknown = [name for name in names if name not in self.rows_by_name.index]
+        if unknown:
+            raise KeyError(f"Unknown players: {', '.join(unknown)}")
+        query_rows = self.rows_by_name.loc[names].to_numpy()
+
+        search = self.searches[space]
+        allowed = self.eligible(**filters)
+        results = [None] * len(names)
+        pending = np.arange(len(names))
+        fetch = 2 * k + 1
+        while len(pending):
+            indices, distances = search.neighbors(query_rows[pending], fetch)
+            keep = allowed[indices] & (indices != query_rows[pending][:, None])
+            done = (keep.sum(axis=1) >= k) | (fetch >= len(self.players))
+            for i in np.flatnonzero(done):
+                chosen = np.flatnonzero(keep[i])[:k]
+                results[pending[i]] = (indices[i, chosen], distances[i, chosen])
+            pending = pending[~done]
+            fetch *= 2
+
+        frames = []
+        for name, (indices, distances) in zip(names, results):
+            frame = self.players.iloc[indices].reset_index(drop=True)
+            frame.insert(0, 'Rank', np.arange(1, len(indices) + 1))
+            frame.insert(0, 'Query', name)
+            frame['Distance'] = distances
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+    # -----------------------------------------
+    def save(self, path=DEFAULT_INDEX_FILE):
+        joblib.dump(self, path)
+        print(f"Similar player index saved to {path}")
+
+    @staticmethod
+    def load(path=DEFAULT_INDEX_FILE):
+        return joblib.load(path)
+
+# -----------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description='Find similar players / Tìm cầu thủ tương đồng')
+    parser.add_argument('names', nargs='+', help='Player names to query')
+    parser.add_argument('-k', type=int, default=10, help='Number of similar players per query')
+    parser.add_argument('--space', choices=['features', 'umap'], default='features',
+                        help='Search the scaled features or the UMAP coordinates')
+    parser.add_argument('--position', help='Only players listed at this position (e.g. MF)')
+    parser.add_argument('--min-age', type=int)
+    parser.add_argument('--max-age', type=int)
+    parser.add_argument('--team')
+    parser.add_argument('--index', default=DEFAULT_INDEX_FILE, help='Saved similarity index')
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    index = SimilarPlayerIndex.load(args.index)
+    result = index.query(args.names, args.k, args.space, position=args.position,
+                         min_age=args.min_age, max_age=args.max_age, team=args.team)
+    print(result.to_string(index=False))
+
+if __name__ == '__main__':
+    main()
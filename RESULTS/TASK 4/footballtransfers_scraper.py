@@ -0,0 +1,357 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from bs4 import BeautifulSoup, SoupStrainer
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+import os
+import re
+import sys
+import time
+import uuid
+from urllib.parse import urlparse
+
+# Share the HTML cache of the task 1 scraper
+# Dùng chung bộ nhớ đệm HTML với chương trình thu thập của task 1
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'TASK 1'))
+from page_cache import DEFAULT_CACHE_DIR, DEFAULT_TTL_SECONDS, PageCache
+from rate_limiter import RetryPolicy
+from staging import DEFAULT_STAGING_DIR, StagingArea
+from instrumentation import DEFAULT_METRICS_DIR, METRICS
+from assignment_01_task_01 import HTTP_TIMEOUT, ResourcePool, create_session
+
+# === SCRAPER SETTINGS ===
+# Cấu hình: địa chỉ danh sách cầu thủ, giải đấu và số trang mặc định
+BASE_URL = "https://www.footballtransfers.com/en/players"
+DEFAULT_LEAGUE = 'uk-premier-league'
+DEFAULT_MAX_PAGES = 22
+TABLE_SELECTOR = 'table.table.table-striped.leaguetable.mvp-table.similar-players-table'
+BROWSER_WAIT_SECONDS = 10  # a timeout is retried by the RetryPolicy / hết thời gian chờ sẽ được thử lại
+PAGE_WORKERS = 4  # pages downloaded at the same time in parallel mode / số trang tải cùng lúc ở chế độ song song
+
+# Only the player table is handed to the parser, the rest of the page is skipped.
+# While straining, bs4 compares the whole unsplit class attribute ("table table-striped ... similar-players-table"),
+# so the class is matched with a callable that splits it
+# Chỉ bảng cầu thủ được đưa vào bộ phân tích, phần còn lại của trang bị bỏ qua.
+# Khi lọc, bs4 so sánh nguyên chuỗi thuộc tính class chưa tách ("table table-striped ... similar-players-table"),
+# nên class được so khớp bằng một hàm tách chuỗi
+TABLE_CLASS = 'similar-players-table'
+TABLE_STRAINER = SoupStrainer('table', class_=lambda value: bool(value) and TABLE_CLASS in value.split())
+
+# === INITIALIZE BROWSER ===
+# Khởi tạo trình duyệt
+def initialize_browser():
+    options = Options()
+    options.add_argument('--headless')  # Run in headless mode
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--no-sandbox')
+    with METRICS.stage('browser_start'):
+        browser = webdriver.Chrome(options=options)
+    return browser
+
+# === EXTRACT DATA FROM PAGE ===
+# Trích xuất dữ liệu từ trang web
+def load_page_with_browser(browser, page_url):
+    # Load the page and wait for table to load
+    # Tải trang và chờ bảng dữ liệu xuất hiện
+    with METRICS.stage('page_load', page_url):
+        browser.get(page_url)
+    with METRICS.stage('table_wait', page_url):
+        WebDriverWait(browser, BROWSER_WAIT_SECONDS).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, 'table.table-striped.leaguetable'))
+        )
+    page_source = browser.page_source
+    METRICS.count('pages_downloaded', host=urlparse(page_url).netloc, backend='selenium')
+    METRICS.count('bytes_downloaded', len(page_source.encode('utf-8')), host=urlparse(page_url).netloc)
+    return page_source
+
+def build_page_url(league, page_num):
+    # Page 1 has no page number in its URL
+    # Trang 1 không có số trang trong đường dẫn
+    league_url = f"{BASE_URL}/{league}"
+    return league_url if page_num == 1 else f"{league_url}/{page_num}"
+
+def parse_page_html(html_content, page_url):
+    with METRICS.stage('html_parse', page_url):
+        soup = BeautifulSoup(html_content, 'lxml', parse_only=TABLE_STRAINER)
+    
+    # Find the target table containing player data
+    # Tìm bảng chứa thông tin cầu thủ
+    target_table = soup.select_one(TABLE_SELECTOR)
+    if not target_table:
+        print(f"No table found on {page_url}")
+        return []
+    
+    extracted_data = []
+    table_rows = target_table.select('tbody tr')
+    
+    # Process each row in the table
+    # Xử lý từng hàng trong bảng
+    row_start = time.perf_counter()
+    for row in table_rows:
+        try:
+            # Extract skill and potential ratings
+            # Trích xuất chỉ số kỹ năng và tiềm năng
+            skill_elem = row.select_one('div.table-skill__skill')
+            potential_elem = row.select_one('div.table-skill__pot')
+            skill_value = float(skill_elem.get_text(strip=True)) if skill_elem else None
+            potential_value = float(potential_elem.get_text(strip=True)) if potential_elem else None
+            combined_rating = f"{skill_value}/{potential_value}" if skill_value and potential_value else None
+            
+            # Extract player name
+            # Trích xuất tên cầu thủ
+            name_elem = row.select_one('span.d-none')
+            player_name = name_elem.get_text(strip=True) if name_elem else None
+            
+            # Extract team name
+            # Trích xuất tên đội bóng
+            team_elem = row.select_one('span.td-team__teamname')
+            team_name = team_elem.get_text(strip=True) if team_elem else None
+            
+            # Extract market value
+            # Trích xuất giá trị thị trường
+            value_elem = row.select_one('span.player-tag')
+            market_value = value_elem.get_text(strip=True) if value_elem else None
+            
+            if player_name and team_name:
+                extracted_data.append({
+                    'player': player_name,
+                    'club': team_name,
+                    'market_value': market_value,
+                    'rating': combined_rating
+                })
+            else:
+                METRICS.count('rows_dropped', table='footballtransfers', reason='missing name or club')
+        except Exception as e:
+            print(f"Error processing row: {e}")
+            METRICS.count('rows_dropped', table='footballtransfers', reason='error')
+            continue
+    METRICS.record('row_extract', time.perf_counter() - row_start, page_url)
+    METRICS.count('rows_parsed', len(extracted_data), table='footballtransfers')
+    
+    return extracted_data
+
+# Returns the rows of the page, or None when the page still failed after every retry
+# Trả về các hàng của trang, hoặc None nếu trang vẫn lỗi sau tất cả các lần thử lại
+def extract_page_data(browser, page_url, cache=None, retry=None):
+    retry = RetryPolicy() if retry is None else retry
+    
+    def load(url, request_headers):
+        return 200, retry.call(url, lambda: load_page_with_browser(browser, url)), {}
+    
+    try:
+        # Read the page from the cache when possible, otherwise load it with the browser
+        # Đọc trang từ bộ nhớ đệm nếu có, nếu không thì tải bằng trình duyệt
+        html_content = load(page_url, {})[1] if cache is None else cache.fetch(page_url, load)
+        return parse_page_html(html_content, page_url)
+    except Exception as e:
+        print(f"Error loading page {page_url}: {e}")
+        METRICS.count('pages_failed', table='footballtransfers')
+        return None
+
+# === PARALLEL PAGINATION ===
+# Phân trang song song
+def find_last_page(html_content, league):
+    # The pager links to the other pages as /players/<league>/<n>; the largest n is the last page
+    # Thanh phân trang liên kết tới các trang khác dạng /players/<league>/<n>; n lớn nhất là trang cuối
+    page_numbers = [int(n) for n in re.findall(rf'/players/{re.escape(league)}/(\d+)', html_content)]
+    return max(page_numbers) if page_numbers else None
+
+def load_page_with_session(session, page_url, request_headers=None):
+    # Plain HTTP download; fails when the player table is not in the HTML (e.g. rendered by JavaScript)
+    # Tải bằng HTTP thông thường; báo lỗi nếu HTML không chứa bảng cầu thủ (ví dụ do JavaScript tạo ra)
+    with METRICS.stage('http_get', page_url):
+        response = session.get(page_url, headers=request_headers, timeout=HTTP_TIMEOUT)
+    METRICS.count('pages_downloaded', host=urlparse(page_url).netloc, backend='http')
+    METRICS.count('bytes_downloaded', len(response.content), host=urlparse(page_url).netloc)
+    if response.status_code == 304:
+        return 304, None, response.headers
+    response.raise_for_status()
+    if 'similar-players-table' not in response.text:
+        raise ValueError("player table not found in the HTML")
+    return response.status_code, response.text, response.headers
+
+class PageLoader:
+    # Downloads listing pages through the cache with pooled HTTP sessions, falling back to pooled browsers
+    # Tải các trang danh sách qua bộ nhớ đệm bằng các phiên HTTP dùng chung, dự phòng bằng trình duyệt dùng chung
+    def __init__(self, cache=None, retry=None):
+        self.cache = cache
+        self.retry = RetryPolicy() if retry is None else retry
+        self.sessions = ResourcePool(create_session, lambda session: session.close())
+        self.browsers = ResourcePool(initialize_browser, lambda browser: browser.quit())
+    
+    def load_http(self, url, request_headers):
+        with self.sessions.borrow() as session:
+            return load_page_with_session(session, url, request_headers)
+    
+    def load_browser(self, url):
+        with self.browsers.borrow() as browser:
+            return 200, load_page_with_browser(browser, url), {}
+    
+    def load(self, url, request_headers):
+        try:
+            return self.retry.call(url, lambda: self.load_http(url, request_headers))
+        except Exception as e:
+            print(f"HTTP download of {url} failed ({e}), falling back to Selenium")
+        return self.retry.call(url, lambda: self.load_browser(url))
+    
+    def fetch(self, url):
+        if self.cache is None:
+            return self.load(url, {})[1]
+        return self.cache.fetch(url, self.load)
+    
+    def close(self):
+        self.sessions.close_all()
+        self.browsers.close_all()
+
+# Marker for pages that an interrupted run already staged; they are neither downloaded nor yielded again
+# Đánh dấu các trang đã được lưu tạm bởi lần chạy bị gián đoạn; không tải lại và không trả về lại
+ALREADY_STAGED = object()
+
+def iter_league_pages(league=DEFAULT_LEAGUE, max_pages=DEFAULT_MAX_PAGES, cache=None, workers=PAGE_WORKERS,
+                      staged_pages=()):
+    # Yields (page_num, rows) in page order; rows is None for a page that failed after every retry.
+    # Page 1 is loaded first to read the pager. With a pager every remaining page is fetched at once;
+    # without one, pages are fetched in waves of `workers` until the first empty page.
+    # Trả về lần lượt (page_num, rows) theo thứ tự trang; rows là None nếu trang vẫn lỗi sau mọi lần thử lại.
+    # Trang 1 được tải trước để đọc thanh phân trang. Nếu có, mọi trang còn lại được tải cùng lúc;
+    # nếu không, các trang được tải theo từng đợt `workers` trang cho tới trang rỗng đầu tiên.
+    loader = PageLoader(cache)
+    
+    def fetch(page_num):
+        if page_num in staged_pages and page_num != 1:
+            return page_num, ALREADY_STAGED, None
+        page_url = build_page_url(league, page_num)
+        try:
+            html_content = loader.fetch(page_url)
+        except Exception as e:
+            print(f"Error loading page {page_url}: {e}")
+            METRICS.count('pages_failed', table='footballtransfers')
+            return page_num, None, None
+        return page_num, parse_page_html(html_content, page_url), html_content
+    
+    try:
+        # Page 1 is always read (from the cache when possible) because the pager is on it
+        # Trang 1 luôn được đọc (từ bộ nhớ đệm nếu có) vì thanh phân trang nằm trên đó
+        _, first_rows, first_html = fetch(1)
+        last_page = find_last_page(first_html, league) if first_html else None
+        limit = max_pages if last_page is None else min(last_page, max_pages)
+        print(f"Last page: {last_page if last_page else 'unknown, stopping at the first empty page'}")
+        if first_rows == []:
+            return
+        if 1 not in staged_pages:
+            yield 1, first_rows
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            next_page = 2
+            while next_page <= limit:
+                wave_end = limit if last_page else min(limit, next_page + workers - 1)
+                for page_num, rows, _ in executor.map(fetch, range(next_page, wave_end + 1)):
+                    # An empty page means the previous page was the last one
+                    # Trang rỗng nghĩa là trang trước đó là trang cuối
+                    if rows == []:
+                        limit = page_num - 1
+                        break
+                    if rows is not ALREADY_STAGED:
+                        yield page_num, rows
+                next_page = wave_end + 1
+    finally:
+        loader.close()
+
+def iter_league_pages_serial(league, max_pages, cache, offline, staged_pages=()):
+    retry = RetryPolicy()
+    
+    # Initialize browser (not needed when replaying from the cache)
+    # Khởi tạo trình duyệt (không cần khi chỉ đọc lại từ bộ nhớ đệm)
+    browser = None if offline else initialize_browser()
+    
+    try:
+        # Loop through each page
+        # Lặp qua từng trang
+        for page_num in range(1, max_pages + 1):
+            if page_num in staged_pages:
+                continue
+            page_url = build_page_url(league, page_num)
+            print(f"Scraping page {page_num}")
+            # Pacing between pages is left to the shared per-host rate limiter
+            # Nhịp giữa các trang do bộ giới hạn tốc độ theo máy chủ dùng chung đảm nhận
+            yield page_num, extract_page_data(browser, page_url, cache, retry)
+    finally:
+        # Close browser when done
+        # Đóng trình duyệt khi hoàn thành
+        if browser is not None:
+            browser.quit()
+
+def export_staged_pages(staging, output_file):
+    # Stream the staged pages to CSV in page order, one row per player and club
+    # Ghi dần các trang đã lưu tạm ra CSV theo thứ tự trang, mỗi cầu thủ và câu lạc bộ một hàng
+    seen = set()
+    written = 0
+    for key in sorted(staging.completed, key=int):
+        page_df = pd.DataFrame(list(staging.iter_rows(key)), columns=['player', 'club', 'market_value', 'rating'])
+        page_df = page_df.drop_duplicates(subset=['player', 'club'])
+        page_df = page_df[[(player, club) not in seen for player, club in zip(page_df['player'], page_df['club'])]]
+        seen.update(zip(page_df['player'], page_df['club']))
+        page_df.to_csv(output_file, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += len(page_df)
+    return written
+
+# === MAIN EXECUTION ===
+# Hàm thực thi chính
+# offline = True chỉ đọc lại các trang đã lưu trong bộ nhớ đệm, không truy cập mạng
+# parallel = True tìm trang cuối tự động và tải nhiều trang cùng lúc
+# Each page is staged on disk as soon as it is parsed; a restarted run resumes after the staged pages
+# Mỗi trang được lưu tạm xuống đĩa ngay khi phân tích xong; lần chạy lại sẽ tiếp tục sau các trang đã lưu
+def main(league=DEFAULT_LEAGUE, max_pages=DEFAULT_MAX_PAGES, offline=False,
+         cache_dir=DEFAULT_CACHE_DIR, cache_ttl=DEFAULT_TTL_SECONDS, parallel=True, workers=PAGE_WORKERS,
+         staging_dir=DEFAULT_STAGING_DIR, metrics_dir=DEFAULT_METRICS_DIR):
+    # The run report is written even when the scrape fails part-way
+    # Báo cáo lần chạy vẫn được ghi kể cả khi quá trình thu thập lỗi giữa chừng
+    try:
+        with METRICS.stage('total'):
+            scrape_and_export(league, max_pages, offline, cache_dir, cache_ttl, parallel, workers, staging_dir)
+    finally:
+        METRICS.write('footballtransfers', metrics_dir)
+
+def scrape_and_export(league, max_pages, offline, cache_dir, cache_ttl, parallel, workers, staging_dir):
+    cache = PageCache(cache_dir, ttl=cache_ttl, offline=offline)
+    staging = StagingArea(os.path.join(staging_dir, 'footballtransfers', league))
+    staged_pages = {int(key) for key in staging.completed}
+    if staged_pages:
+        print(f"Resuming: {len(staged_pages)} pages already staged in {staging.directory}")
+    
+    if parallel:
+        pages = iter_league_pages(league, max_pages, cache, workers, staged_pages)
+    else:
+        pages = iter_league_pages_serial(league, max_pages, cache, offline, staged_pages)
+    
+    failed_pages = []  # Pages that failed after every retry / Các trang lỗi sau mọi lần thử lại
+    for page_num, rows in pages:
+        if rows is None:
+            failed_pages.append(build_page_url(league, page_num))
+        elif rows:
+            staging.commit(str(page_num), rows)
+    
+    if failed_pages:
+        print(f"{len(failed_pages)} pages failed permanently:")
+        for page_url in failed_pages:
+            print(f"  {page_url}")
+    
+    # Save data to CSV if we collected anything
+    # Lưu dữ liệu vào file CSV nếu có dữ liệu
+    if staging.completed:
+        output_file = f'player_data_{uuid.uuid4().hex[:8]}.csv'
+        with METRICS.stage('export'):
+            records = export_staged_pages(staging, output_file)
+        print(f"Data saved with {records} records")
+        # Keep the checkpoint while pages are missing so the next run only scrapes those
+        # Giữ điểm lưu khi còn thiếu trang để lần chạy sau chỉ thu thập các trang đó
+        if not failed_pages:
+            staging.clear()
+    else:
+        print("No data collected")
+
+if __name__ == "__main__":
+    main()
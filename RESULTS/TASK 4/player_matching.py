@@ -0,0 +1,201 @@
+import hashlib
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+# -----------------------------------------
+# Club names used by footballtransfers.com mapped to the fbref.com names (both normalized)
+# Tên câu lạc bộ trên footballtransfers.com ánh xạ sang tên trên fbref.com (đều đã chuẩn hóa)
+CLUB_ALIASES = {
+    'b mouth': 'bournemouth',
+    'c palace': 'crystal palace',
+    'leicester': 'leicester city',
+    'man city': 'manchester city',
+    'man utd': 'manchester utd',
+    'man united': 'manchester utd',
+    'manchester united': 'manchester utd',
+    'newcastle': 'newcastle utd',
+    'newcastle united': 'newcastle utd',
+    'nottingham': 'nott ham forest',
+    'nottingham forest': 'nott ham forest',
+    'spurs': 'tottenham',
+    'tottenham hotspur': 'tottenham',
+    'west ham united': 'west ham',
+    'wolverhampton': 'wolves',
+    'wolverhampton wanderers': 'wolves',
+    'brighton hove albion': 'brighton',
+    'ipswich': 'ipswich town'
+}
+
+# Letters that Unicode decomposition does not reduce to plain ASCII
+# Các chữ cái mà phép tách Unicode không đưa về ASCII thường
+SPECIAL_LETTERS = str.maketrans({
+    'ø': 'o', 'ł': 'l', 'đ': 'd', 'ð': 'd', 'þ': 'th', 'æ': 'ae', 'œ': 'oe', 'ß': 'ss', 'ı': 'i'
+})
+
+# -----------------------------------------
+# Matching thresholds: minimum name similarity for players of the same club and of different clubs,
+# and how many players a name token may point to before it stops being used for blocking
+# Ngưỡng ghép cặp: độ tương đồng tên tối thiểu cho cầu thủ cùng câu lạc bộ và khác câu lạc bộ,
+# và số cầu thủ tối đa một từ trong tên được trỏ tới trước khi không còn dùng để phân khối
+SAME_CLUB_THRESHOLD = 0.55
+OTHER_CLUB_THRESHOLD = 0.85
+MAX_TOKEN_FREQUENCY = 50
+
+CROSSWALK_FILE = 'player_crosswalk.csv'
+CROSSWALK_COLUMNS = ['player_id', 'fbref_name', 'fbref_team', 'ft_player', 'ft_club', 'score', 'method']
+
+# -----------------------------------------
+def normalize_name(name):
+    """Lowercase a name, strip accents and punctuation, and collapse spaces.
+    Chuyển tên về chữ thường, bỏ dấu và dấu câu, gộp các khoảng trắng."""
+    if not isinstance(name, str):
+        return ''
+    name = unicodedata.normalize('NFKD', name.lower().translate(SPECIAL_LETTERS))
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', name).split())
+
+# -----------------------------------------
+def normalize_club(club):
+    """Normalize a club name and map it to the fbref naming.
+    Chuẩn hóa tên câu lạc bộ và ánh xạ sang cách đặt tên của fbref."""
+    club = normalize_name(club)
+    return CLUB_ALIASES.get(club, club)
+
+# -----------------------------------------
+def make_player_id(name, team):
+    """Stable player id derived from the normalized fbref name and club.
+    Mã cầu thủ ổn định được tạo từ tên và câu lạc bộ fbref đã chuẩn hóa."""
+    key = f"{normalize_name(name)}|{normalize_club(team)}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+
+# -----------------------------------------
+def generate_candidates(left_keys, right_keys):
+    """Build candidate pairs by blocking on the club and on shared name tokens, never all n x m pairs.
+    Tạo các cặp ứng viên bằng cách phân khối theo câu lạc bộ và theo từ chung trong tên, không xét toàn bộ n x m cặp."""
+    left = pd.DataFrame({'lid': np.arange(len(left_keys)), 'club': left_keys['club'].values,
+                         'name': left_keys['name'].values})
+    right = pd.DataFrame({'rid': np.arange(len(right_keys)), 'club': right_keys['club'].values,
+                          'name': right_keys['name'].values})
+
+    # Block 1: players of the same club
+    # Khối 1: các cầu thủ cùng câu lạc bộ
+    club_pairs = left[['lid', 'club']].merge(right[['rid', 'club']], on='club')[['lid', 'rid']]
+
+    # Block 2: players sharing a name token that is not too common (covers transfers and unknown clubs)
+    # Khối 2: các cầu thủ có chung một từ trong tên không quá phổ biến (bao gồm chuyển nhượng và câu lạc bộ lạ)
+    left_tokens = left.assign(token=left['name'].str.split()).explode('token')[['lid', 'token']]
+    right_tokens = right.assign(token=right['name'].str.split()).explode('token')[['rid', 'token']]
+    token_counts = right_tokens['token'].value_counts()
+    usable = token_counts.index[token_counts <= MAX_TOKEN_FREQUENCY]
+    right_tokens = right_tokens[right_tokens['token'].isin(usable)]
+    token_pairs = left_tokens.dropna().merge(right_tokens, on='token')[['lid', 'rid']]
+
+    return pd.concat([club_pairs, token_pairs]).drop_duplicates().reset_index(drop=True)
+
+# -----------------------------------------
+def score_candidates(left_keys, right_keys, pairs):
+    """Score candidate pairs with the cosine similarity of character n-gram TF-IDF vectors, all pairs at once.
+    Chấm điểm các cặp ứng viên bằng độ tương đồng cosine của vector TF-IDF n-gram ký tự, cho tất cả các cặp cùng lúc."""
+    vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 3))
+    vectorizer.fit(pd.concat([left_keys['name'], right_keys['name']]))
+    left_vectors = vectorizer.transform(left_keys['name'])
+    right_vectors = vectorizer.transform(right_keys['name'])
+
+    lids = pairs['lid'].to_numpy()
+    rids = pairs['rid'].to_numpy()
+    # Rows are L2-normalized, so the row-wise dot product is the cosine similarity
+    # Các hàng đã được chuẩn hóa L2 nên tích vô hướng theo hàng chính là độ tương đồng cosine
+    similarity = np.asarray(left_vectors[lids].multiply(right_vectors[rids]).sum(axis=1)).ravel()
+    same_club = left_keys['club'].to_numpy()[lids] == right_keys['club'].to_numpy()[rids]
+
+    scored = pairs.assign(score=similarity, same_club=same_club)
+    accepted = np.where(same_club, similarity >= SAME_CLUB_THRESHOLD, similarity >= OTHER_CLUB_THRESHOLD)
+    return scored[accepted]
+
+# -----------------------------------------
+def assign_matches(scored):
+    """Keep one-to-one matches, taking the best-scoring pairs first (same club wins ties).
+    Giữ các cặp ghép một-một, ưu tiên các cặp có điểm cao nhất (cùng câu lạc bộ được ưu tiên khi bằng điểm)."""
+    ordered = scored.sort_values(['score', 'same_club', 'lid', 'rid'],
+                                 ascending=[False, False, True, True], kind='stable')
+    used_left, used_right, matches = set(), set(), []
+    for lid, rid, score in zip(ordered['lid'], ordered['rid'], ordered['score']):
+        if lid in used_left or rid in used_right:
+            continue
+        used_left.add(lid)
+        used_right.add(rid)
+        matches.append((lid, rid, score))
+    return matches
+
+# -----------------------------------------
+def load_crosswalk(cache_file=CROSSWALK_FILE):
+    """Load the crosswalk saved by a previous run, or an empty one.
+    Tải bảng đối chiếu đã lưu từ lần chạy trước, hoặc bảng rỗng."""
+    if cache_file and os.path.exists(cache_file):
+        return pd.read_csv(cache_file, dtype={'player_id': str}, keep_default_na=False)
+    return pd.DataFrame(columns=CROSSWALK_COLUMNS)
+
+# -----------------------------------------
+def match_players(df_stats, df_players, stats_name='Name', stats_team='Team',
+                  players_name='player', players_club='club', cache_file=CROSSWALK_FILE):
+    """Link fbref players to footballtransfers players and return a player-id crosswalk.
+    Pairs already in the cached crosswalk are reused; only the remaining players are matched.
+    Liên kết cầu thủ fbref với cầu thủ footballtransfers và trả về bảng đối chiếu mã cầu thủ.
+    Các cặp đã có trong bảng đối chiếu đã lưu được dùng lại; chỉ ghép các cầu thủ còn lại."""
+    left = pd.DataFrame({'fbref_name': df_stats[stats_name].astype(str).values,
+                         'fbref_team': df_stats[stats_team].astype(str).values}).drop_duplicates()
+    right = pd.DataFrame({'ft_player': df_players[players_name].astype(str).values,
+                          'ft_club': df_players[players_club].astype(str).values}).drop_duplicates()
+
+    # Reuse cached pairs whose both sides still exist
+    # Dùng lại các cặp đã lưu mà cả hai phía vẫn còn tồn tại
+    cached = load_crosswalk(cache_file)
+    cached = cached.merge(left, on=['fbref_name', 'fbref_team']).merge(right, on=['ft_player', 'ft_club'])
+    cached = cached.assign(method='cached')[CROSSWALK_COLUMNS]
+
+    left = left.merge(cached[['fbref_name', 'fbref_team']], how='left', indicator=True)
+    left = left[left['_merge'] == 'left_only'].drop(columns='_merge').reset_index(drop=True)
+    right = right.merge(cached[['ft_player', 'ft_club']], how='left', indicator=True)
+    right = right[right['_merge'] == 'left_only'].drop(columns='_merge').reset_index(drop=True)
+
+    new_rows = []
+    if len(left) and len(right):
+        left_keys = pd.DataFrame({'name': left['fbref_name'].map(normalize_name),
+                                  'club': left['fbref_team'].map(normalize_club)})
+        right_keys = pd.DataFrame({'name': right['ft_player'].map(normalize_name),
+                                   'club': right['ft_club'].map(normalize_club)})
+        pairs = generate_candidates(left_keys, right_keys)
+        scored = score_candidates(left_keys, right_keys, pairs)
+
+        for lid, rid, score in assign_matches(scored):
+            exact = left_keys.at[lid, 'name'] == right_keys.at[rid, 'name']
+            new_rows.append({
+                'player_id': make_player_id(left.at[lid, 'fbref_name'], left.at[lid, 'fbref_team']),
+                'fbref_name': left.at[lid, 'fbref_name'],
+                'fbref_team': left.at[lid, 'fbref_team'],
+                'ft_player': right.at[rid, 'ft_player'],
+                'ft_club': right.at[rid, 'ft_club'],
+                'score': round(float(score), 4),
+                'method': 'exact' if exact else 'fuzzy'
+            })
+
+    crosswalk = pd.concat([cached, pd.DataFrame(new_rows, columns=CROSSWALK_COLUMNS)], ignore_index=True)
+    crosswalk = crosswalk.sort_values(['fbref_name', 'fbref_team']).reset_index(drop=True)
+    if cache_file:
+        crosswalk.to_csv(cache_file, index=False, encoding='utf-8')
+    return crosswalk
+
+# -----------------------------------------
+def merge_with_crosswalk(df_stats, df_players, crosswalk, stats_name='Name', stats_team='Team',
+                         players_name='player', players_club='club'):
+    """Inner-join the two tables through the crosswalk and add the player_id column.
+    Nối hai bảng thông qua bảng đối chiếu và thêm cột player_id."""
+    links = crosswalk[['player_id', 'fbref_name', 'fbref_team', 'ft_player', 'ft_club']]
+    merged = df_stats.merge(links, left_on=[stats_name, stats_team], right_on=['fbref_name', 'fbref_team'])
+    merged = merged.merge(df_players, left_on=['ft_player', 'ft_club'], right_on=[players_name, players_club])
+    return merged.drop(columns=['fbref_name', 'fbref_team', 'ft_player', 'ft_club'])